@@ -1,13 +1,14 @@
 from agno.agent import Agent
 import os
 from datetime import datetime
-import tempfile
 import numpy as np
-import soundfile as sf
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 from utils.load_api_keys import load_api_key
+from utils.audio_assembly import StreamingAudioAssembler
+from utils.audio_encoding import finalize_podcast_audio
+from utils.tts_cache import TTSSegmentCache, get_tts_segment_cache, synthesize_with_cache
+from utils.tts_synthesis import TTS_MAX_CONCURRENCY, call_with_rate_limit_retry, decode_audio_bytes, iter_synthesized_segments
 from openai import OpenAI
-from scipy import signal
 
 
 PODCASTS_FOLDER = "podcasts"
@@ -20,86 +21,14 @@ INTRO_MUSIC_FILE = os.path.join(PODCAST_MUSIC_FOLDER, "intro_audio.mp3")
 OUTRO_MUSIC_FILE = os.path.join(PODCAST_MUSIC_FOLDER, "intro_audio.mp3")
 
 
-def resample_audio_scipy(audio, original_sr, target_sr):
-    if original_sr == target_sr:
-        return audio
-    resampling_ratio = target_sr / original_sr
-    num_samples = int(len(audio) * resampling_ratio)
-    resampled = signal.resample(audio, num_samples)
-    return resampled
-
-
-def create_silence_audio(silence_duration: float, sampling_rate: int) -> np.ndarray:
-    if sampling_rate <= 0:
-        print(f"Invalid sampling rate ({sampling_rate}) for silence generation")
-        return np.zeros(0, dtype=np.float32)
-    return np.zeros(int(sampling_rate * silence_duration), dtype=np.float32)
-
-
-def combine_audio_segments(audio_segments: List[np.ndarray], silence_duration: float, sampling_rate: int) -> np.ndarray:
-    if not audio_segments:
-        return np.zeros(0, dtype=np.float32)
-    silence = create_silence_audio(silence_duration, sampling_rate)
-    combined_segments = []
-    for i, segment in enumerate(audio_segments):
-        combined_segments.append(segment)
-        if i < len(audio_segments) - 1:
-            combined_segments.append(silence)
-    combined = np.concatenate(combined_segments)
-    max_amp = np.max(np.abs(combined))
-    if max_amp > 0:
-        combined = combined / max_amp * 0.95
-    return combined
-
-
-def process_audio_file(temp_path: str) -> Optional[Tuple[np.ndarray, int]]:
-    try:
-        from pydub import AudioSegment
-
-        audio_segment = AudioSegment.from_mp3(temp_path)
-        channels = audio_segment.channels
-        sample_width = audio_segment.sample_width
-        frame_rate = audio_segment.frame_rate
-        samples = np.array(audio_segment.get_array_of_samples())
-        if channels == 2:
-            samples = samples.reshape(-1, 2).mean(axis=1)
-        max_possible_value = float(2 ** (8 * sample_width - 1))
-        samples = samples.astype(np.float32) / max_possible_value
-        return samples, frame_rate
-    except ImportError:
-        print("Pydub not available, falling back to soundfile")
-    except Exception as e:
-        print(f"Pydub processing failed: {e}")
+def add_music(assembler: StreamingAudioAssembler, music_file: str, label: str) -> None:
+    if not os.path.exists(music_file):
+        return
     try:
-        audio_np, samplerate = sf.read(temp_path)
-        return audio_np, samplerate
+        frames = assembler.add_file(music_file, normalize=False)
+        print(f"Added {label} music: {frames / assembler.sampling_rate:.1f} seconds")
     except Exception as e:
-        print(f"Failed to process audio with soundfile: {e}")
-        try:
-            from pydub import AudioSegment
-
-            sound = AudioSegment.from_mp3(temp_path)
-            wav_path = temp_path.replace(".mp3", ".wav")
-            sound.export(wav_path, format="wav")
-            audio_np, samplerate = sf.read(wav_path)
-            os.unlink(wav_path)
-            return audio_np, samplerate
-        except Exception as e:
-            print(f"All audio processing methods failed: {e}")
-    return None
-
-
-def resample_audio(audio, orig_sr, target_sr):
-    try:
-        import librosa
-
-        return librosa.resample(audio, orig_sr=orig_sr, target_sr=target_sr)
-    except ImportError:
-        print("Librosa not available for resampling")
-        return audio
-    except Exception as e:
-        print(f"Resampling failed: {e}")
-        return audio
+        print(f"Could not add {label} music: {e}")
 
 
 def text_to_speech_openai(
@@ -122,27 +51,20 @@ def text_to_speech_openai(
         print(f"No voice mapping for speaker {speaker_id}, using {voice}")
     try:
         print(f"Generating TTS for speaker {speaker_id} using voice '{voice}'")
-        response = client.audio.speech.create(
-            model=model,
-            voice=voice,
-            input=text,
-            response_format="mp3",
+        response = call_with_rate_limit_retry(
+            lambda: client.audio.speech.create(
+                model=model,
+                voice=voice,
+                input=text,
+                response_format="mp3",
+            )
         )
         audio_data = response.content
         if not audio_data:
             print("OpenAI TTS returned empty response")
             return None
         print(f"Received {len(audio_data)} bytes from OpenAI TTS")
-        temp_file = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
-        temp_path = temp_file.name
-        temp_file.close()
-        with open(temp_path, "wb") as f:
-            f.write(audio_data)
-        try:
-            return process_audio_file(temp_path)
-        finally:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        return decode_audio_bytes(audio_data)
     except Exception as e:
         print(f"OpenAI TTS API error: {e}")
         import traceback
@@ -159,6 +81,8 @@ def create_podcast(
     silence_duration: float = 0.7,
     voice_map: Dict[int, str] = None,
     model: str = TTS_MODEL,
+    max_workers: int = TTS_MAX_CONCURRENCY,
+    segment_cache: Optional[TTSSegmentCache] = None,
 ) -> Optional[str]:
     if tts_engine.lower() != "openai":
         print(f"Only OpenAI TTS engine is available in this standalone version. Requested: {tts_engine}")
@@ -181,93 +105,58 @@ def create_podcast(
     if model == "tts-1" and language_code == "en":
         model_to_use = "tts-1-hd"
         print(f"Using high-definition TTS model for English: {model_to_use}")
-    generated_segments = []
-    sampling_rate_detected = None
+    assembler = None
+    segment_count = 0
 
     if hasattr(script, "entries"):
         entries = script.entries
     else:
         entries = script
 
-    print(f"Processing {len(entries)} script entries")
-    for i, entry in enumerate(entries):
-        if hasattr(entry, "speaker"):
-            speaker_id = entry.speaker
-            entry_text = entry.text
-        else:
-            speaker_id = entry["speaker"]
-            entry_text = entry["text"]
-        print(f"Processing entry {i + 1}/{len(entries)}: Speaker {speaker_id}")
-        result = text_to_speech_openai(
-            client=client,
-            text=entry_text,
-            speaker_id=speaker_id,
-            voice_map=voice_map,
-            model=model_to_use,
+    print(f"Processing {len(entries)} script entries with up to {max_workers} requests in flight")
+
+    def synthesize(speaker_id, entry_text):
+        key_parts = {"engine": "openai", "model": model_to_use, "voice": voice_map.get(speaker_id, speaker_id), "text": entry_text}
+        return synthesize_with_cache(
+            segment_cache,
+            key_parts,
+            lambda: text_to_speech_openai(
+                client=client,
+                text=entry_text,
+                speaker_id=speaker_id,
+                voice_map=voice_map,
+                model=model_to_use,
+            ),
         )
-        if result:
-            segment_audio, segment_rate = result
-            if sampling_rate_detected is None:
-                sampling_rate_detected = segment_rate
-                print(f"Using sample rate: {sampling_rate_detected} Hz")
-            elif sampling_rate_detected != segment_rate:
-                print(f"Sample rate mismatch: {sampling_rate_detected} vs {segment_rate}")
-                try:
-                    segment_audio = resample_audio(segment_audio, segment_rate, sampling_rate_detected)
-                    print(f"Resampled to {sampling_rate_detected} Hz")
-                except Exception as e:
-                    sampling_rate_detected = segment_rate
-                    print(f"Resampling failed: {e}")
-            generated_segments.append(segment_audio)
-        else:
-            print(f"Failed to generate audio for entry {i + 1}")
-    if not generated_segments:
-        print("No audio segments were generated")
-        return None
-    if sampling_rate_detected is None:
-        print("Could not determine sample rate")
-        return None
-    print(f"Combining {len(generated_segments)} audio segments")
-    full_audio = combine_audio_segments(generated_segments, silence_duration, sampling_rate_detected)
-    if full_audio.size == 0:
-        print("Combined audio is empty")
-        return None
-
-    try:
-        if os.path.exists(INTRO_MUSIC_FILE):
-            intro_music, intro_sr = sf.read(INTRO_MUSIC_FILE)
-            print(f"Loaded intro music: {len(intro_music) / intro_sr:.1f} seconds")
-
-            if intro_music.ndim == 2:
-                intro_music = np.mean(intro_music, axis=1)
-
-            if intro_sr != sampling_rate_detected:
-                intro_music = resample_audio_scipy(intro_music, intro_sr, sampling_rate_detected)
-
-            full_audio = np.concatenate([intro_music, full_audio])
-            print("Added intro music")
 
-        if os.path.exists(OUTRO_MUSIC_FILE):
-            outro_music, outro_sr = sf.read(OUTRO_MUSIC_FILE)
-            print(f"Loaded outro music: {len(outro_music) / outro_sr:.1f} seconds")
-
-            if outro_music.ndim == 2:
-                outro_music = np.mean(outro_music, axis=1)
-
-            if outro_sr != sampling_rate_detected:
-                outro_music = resample_audio_scipy(outro_music, outro_sr, sampling_rate_detected)
-
-            full_audio = np.concatenate([full_audio, outro_music])
-            print("Added outro music")
-
-    except Exception as e:
-        print(f"Could not add intro/outro music: {e}")
-        print("Continuing without background music")
-
-    print(f"Writing audio to {output_path}")
     try:
-        sf.write(output_path, full_audio, sampling_rate_detected)
+        for i, result in iter_synthesized_segments(synthesize, entries, max_workers):
+            print(f"Processed entry {i + 1}/{len(entries)}")
+            if not result:
+                print(f"Failed to generate audio for entry {i + 1}")
+                continue
+            segment_audio, segment_rate = result
+            if assembler is None:
+                print(f"Using sample rate: {segment_rate} Hz")
+                assembler = StreamingAudioAssembler(output_path, segment_rate)
+                add_music(assembler, INTRO_MUSIC_FILE, "intro")
+            else:
+                if segment_rate != assembler.sampling_rate:
+                    print(f"Sample rate mismatch: {assembler.sampling_rate} vs {segment_rate}, resampling")
+                assembler.add_silence(silence_duration)
+            assembler.add(segment_audio, segment_rate)
+            segment_count += 1
+        if assembler is None:
+            print("No audio segments were generated")
+            return None
+        add_music(assembler, OUTRO_MUSIC_FILE, "outro")
+        print(f"Writing {segment_count} audio segments to {output_path}")
+        if not assembler.finish():
+            print("Combined audio is empty")
+            return None
     except Exception as e:
+        if assembler is not None:
+            assembler.abort()
         print(f"Failed to write audio file: {e}")
         return None
     if os.path.exists(output_path):
@@ -337,11 +226,13 @@ def audio_generate_agent_run(agent: Agent) -> str:
                 output_path=audio_path,
                 tts_engine=tts_engine,
                 language_code=language_code,
+                segment_cache=get_tts_segment_cache(),
             )
             if not full_audio_path:
                 error_msg = f"Failed to generate podcast audio with {tts_engine} TTS engine."
                 print(error_msg)
                 return error_msg
+            full_audio_path = finalize_podcast_audio(full_audio_path)
 
             audio_url = f"{os.path.basename(full_audio_path)}"
             session_state["audio_url"] = audio_url
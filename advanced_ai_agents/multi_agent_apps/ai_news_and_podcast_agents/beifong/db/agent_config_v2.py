@@ -3,6 +3,8 @@ from db.config import get_agent_session_db_path
 import json
 
 AGENT_MODEL = "gpt-4o"
+AGENT_HISTORY_RUNS = 6
+HISTORY_SUMMARY_MODEL = "gpt-4o-mini"
 AVAILABLE_LANGS = [
     {"code": "en", "name": "English"},
     {"code": "zh", "name": "Chinese"},
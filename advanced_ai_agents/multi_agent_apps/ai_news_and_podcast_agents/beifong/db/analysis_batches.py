@@ -0,0 +1,62 @@
+import json
+from datetime import datetime
+from .connection import db_connection, execute_query
+
+
+def create_analysis_batch_table(tracking_db_path):
+    with db_connection(tracking_db_path) as conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS analysis_batches (
+            batch_id TEXT PRIMARY KEY,
+            article_ids TEXT NOT NULL,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            completed_at TEXT
+        )
+        """)
+        conn.commit()
+
+
+def store_analysis_batch(tracking_db_path, batch_id, article_ids, status):
+    with db_connection(tracking_db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO analysis_batches (batch_id, article_ids, status, created_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (batch_id, json.dumps(article_ids), status, datetime.now().isoformat()),
+        )
+        placeholders = ",".join(["?"] * len(article_ids))
+        cursor.execute(
+            f"""
+            UPDATE crawled_articles
+            SET ai_status = 'batched'
+            WHERE id IN ({placeholders})
+            """,
+            article_ids,
+        )
+        conn.commit()
+
+
+def get_open_analysis_batches(tracking_db_path):
+    query = """
+    SELECT batch_id, article_ids, status, created_at
+    FROM analysis_batches
+    WHERE completed_at IS NULL
+    ORDER BY created_at
+    """
+    batches = execute_query(tracking_db_path, query, fetch=True)
+    for batch in batches:
+        batch["article_ids"] = json.loads(batch["article_ids"])
+    return batches
+
+
+def update_analysis_batch_status(tracking_db_path, batch_id, status, completed=False):
+    query = """
+    UPDATE analysis_batches
+    SET status = ?, completed_at = ?
+    WHERE batch_id = ?
+    """
+    completed_at = datetime.now().isoformat() if completed else None
+    return execute_query(tracking_db_path, query, (status, completed_at, batch_id))
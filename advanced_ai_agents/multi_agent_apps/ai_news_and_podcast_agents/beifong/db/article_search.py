@@ -0,0 +1,121 @@
+import sqlite3
+from .connection import db_connection
+
+ARTICLE_FTS_TABLE = "articles_fts"
+ARTICLE_FTS_WEIGHTS = (10.0, 4.0, 1.0)
+ARTICLE_FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+        title, summary, content,
+        content='crawled_articles', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS crawled_articles_fts_insert AFTER INSERT ON crawled_articles BEGIN
+        INSERT INTO articles_fts(rowid, title, summary, content)
+        VALUES (new.id, new.title, new.summary, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS crawled_articles_fts_delete AFTER DELETE ON crawled_articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, title, summary, content)
+        VALUES ('delete', old.id, old.title, old.summary, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS crawled_articles_fts_update AFTER UPDATE OF title, summary, content ON crawled_articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, title, summary, content)
+        VALUES ('delete', old.id, old.title, old.summary, old.content);
+        INSERT INTO articles_fts(rowid, title, summary, content)
+        VALUES (new.id, new.title, new.summary, new.content);
+    END
+    """,
+]
+
+
+def has_article_fts(conn):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (ARTICLE_FTS_TABLE,)).fetchone()
+    return row is not None
+
+
+def create_article_fts(conn):
+    existed = has_article_fts(conn)
+    try:
+        for statement in ARTICLE_FTS_SCHEMA:
+            conn.execute(statement)
+    except sqlite3.OperationalError as e:
+        print(f"FTS5 not available, article search will use LIKE scans: {str(e)}")
+        return False
+    if not existed:
+        conn.execute(f"INSERT INTO {ARTICLE_FTS_TABLE}({ARTICLE_FTS_TABLE}) VALUES ('rebuild')")
+        print("Built full-text index for crawled articles")
+    return True
+
+
+def rebuild_article_fts(tracking_db_path):
+    with db_connection(tracking_db_path) as conn:
+        create_article_fts(conn)
+        conn.execute(f"INSERT INTO {ARTICLE_FTS_TABLE}({ARTICLE_FTS_TABLE}) VALUES ('rebuild')")
+        conn.execute(f"INSERT INTO {ARTICLE_FTS_TABLE}({ARTICLE_FTS_TABLE}) VALUES ('optimize')")
+        conn.commit()
+
+
+def build_fts_query(terms, operator="OR", prefix=False):
+    phrases = []
+    for term in terms:
+        term = " ".join(str(term).split())
+        if not term:
+            continue
+        phrase = '"' + term.replace('"', '""') + '"'
+        phrases.append(phrase + "*" if prefix else phrase)
+    joiner = " AND " if operator.upper() == "AND" else " OR "
+    return joiner.join(phrases)
+
+
+def search_articles_ranked(conn, terms, limit=20, operator="OR", from_date=None, prefix=False):
+    match_query = build_fts_query(terms, operator, prefix)
+    if not match_query:
+        return []
+    title_weight, summary_weight, content_weight = ARTICLE_FTS_WEIGHTS
+    query = f"""
+        SELECT ca.id, ca.title, ca.url, ca.published_date,
+               COALESCE(ca.summary, ca.content) as content,
+               ca.source_id, ca.feed_id
+        FROM {ARTICLE_FTS_TABLE}
+        JOIN crawled_articles ca ON ca.id = {ARTICLE_FTS_TABLE}.rowid
+        WHERE {ARTICLE_FTS_TABLE} MATCH ?
+          AND ca.processed = 1
+    """
+    params = [match_query]
+    if from_date:
+        query += " AND ca.published_date >= ?"
+        params.append(from_date)
+    query += f" ORDER BY bm25({ARTICLE_FTS_TABLE}, {title_weight}, {summary_weight}, {content_weight}), ca.published_date DESC LIMIT ?"
+    params.append(limit)
+    return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+
+def search_articles_by_category(conn, terms, limit=20, from_date=None, exclude_ids=()):
+    categories = [str(term).lower().strip() for term in terms if str(term).strip()]
+    if not categories or limit <= 0:
+        return []
+    placeholders = ",".join(["?"] * len(categories))
+    query = f"""
+        SELECT DISTINCT ca.id, ca.title, ca.url, ca.published_date,
+               COALESCE(ca.summary, ca.content) as content,
+               ca.source_id, ca.feed_id
+        FROM article_categories ac
+        JOIN crawled_articles ca ON ca.id = ac.article_id
+        WHERE ac.category_name IN ({placeholders})
+          AND ca.processed = 1
+    """
+    params = list(categories)
+    if from_date:
+        query += " AND ca.published_date >= ?"
+        params.append(from_date)
+    query += " ORDER BY ca.published_date DESC LIMIT ?"
+    params.append(limit + len(exclude_ids))
+    excluded = set(exclude_ids)
+    results = [dict(row) for row in conn.execute(query, params).fetchall()]
+    return [row for row in results if row["id"] not in excluded][:limit]
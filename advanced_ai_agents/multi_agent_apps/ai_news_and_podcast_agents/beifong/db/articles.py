@@ -1,45 +1,75 @@
 import json
 from datetime import datetime
 from .connection import db_connection, execute_query
+from .raw_content import build_raw_content_insert, get_raw_content, get_raw_contents
 
 
-def store_crawled_article(tracking_db_path, entry, raw_content, metadata):
+def store_crawled_article(tracking_db_path, entry, raw_content, metadata, batch=None, callback=None):
     metadata_json = json.dumps(metadata)
     query = """
-    INSERT INTO crawled_articles 
-    (entry_id, source_id, feed_id, title, url, published_date, raw_content, metadata)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    INSERT {conflict}INTO crawled_articles 
+    (entry_id, source_id, feed_id, title, url, published_date, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
     """
     try:
+        url = entry.get("link", "")
         params = (
             entry["id"],
             entry.get("source_id"),
             entry.get("feed_id"),
             entry.get("title", ""),
-            entry.get("link", ""),
+            url,
             entry.get("published_date", datetime.now().isoformat()),
-            raw_content,
             metadata_json,
         )
-        execute_query(tracking_db_path, query, params)
+        raw_query, raw_params = build_raw_content_insert(raw_content, "url = ?")
+        raw_params = (*raw_params, url)
+        if batch is not None:
+
+            def on_insert(rowcount):
+                if rowcount:
+                    batch.add(raw_query, raw_params)
+                if callback:
+                    callback(rowcount)
+
+            batch.add(query.format(conflict="OR IGNORE "), params, on_insert)
+            return True
+        with db_connection(tracking_db_path) as conn:
+            conn.execute(query.format(conflict=""), params)
+            conn.execute(raw_query, raw_params)
+            conn.commit()
         return True
     except Exception:
         return False
 
 
-def update_entry_status(tracking_db_path, entry_id, status):
+def update_entry_status(tracking_db_path, entry_id, status, batch=None):
     query = """
     UPDATE feed_entries
     SET crawl_attempts = crawl_attempts + 1, crawl_status = ?
     WHERE id = ?
     """
+    if batch is not None:
+        return batch.add(query, (status, entry_id))
     return execute_query(tracking_db_path, query, (status, entry_id))
 
 
-def get_unprocessed_articles(tracking_db_path, limit=5, max_attempts=1):
-    reset_stuck_articles(tracking_db_path)
+def store_crawl_result(batch, entry, raw_content, metadata, stats=None, stored_ids=None):
+    def on_insert(rowcount):
+        update_entry_status(batch.db_path, entry["id"], "success" if rowcount else "failed", batch=batch)
+        if stats is not None:
+            stats["success_count" if rowcount else "failed_count"] += 1
+        if rowcount and stored_ids is not None:
+            stored_ids.append(entry["id"])
+
+    return store_crawled_article(batch.db_path, entry, raw_content, metadata, batch=batch, callback=on_insert)
+
+
+def get_unprocessed_articles(tracking_db_path, limit=5, max_attempts=1, reset_stuck=True):
+    if reset_stuck:
+        reset_stuck_articles(tracking_db_path)
     query = """
-    SELECT id, entry_id, source_id, feed_id, title, url, published_date, raw_content, metadata, ai_attempts
+    SELECT id, entry_id, source_id, feed_id, title, url, published_date, metadata, ai_attempts
     FROM crawled_articles
     WHERE (ai_status = 'pending' OR ai_status = 'error')
           AND ai_attempts < ?
@@ -57,6 +87,9 @@ def get_unprocessed_articles(tracking_db_path, limit=5, max_attempts=1):
     if articles:
         article_ids = [a["id"] for a in articles]
         mark_articles_as_processing(tracking_db_path, article_ids)
+        raw_contents = get_raw_contents(tracking_db_path, article_ids)
+        for article in articles:
+            article["raw_content"] = raw_contents.get(article["id"]) or ""
     return articles
 
 
@@ -204,7 +237,7 @@ def get_articles_by_date_range(tracking_db_path, start_date=None, end_date=None,
 def get_article_by_id(tracking_db_path, article_id):
     query = """
     SELECT id, entry_id, source_id, feed_id, title, url, published_date, 
-           raw_content, content, summary, metadata, ai_status, ai_error, 
+           content, summary, metadata, ai_status, ai_error, 
            ai_attempts, crawled_date, processed
     FROM crawled_articles
     WHERE id = ?
@@ -216,6 +249,7 @@ def get_article_by_id(tracking_db_path, article_id):
                 article["metadata"] = json.loads(article["metadata"])
             except json.JSONDecodeError:
                 article["metadata"] = {}
+        article["raw_content"] = get_raw_content(tracking_db_path, article_id)
         article["categories"] = get_article_categories(tracking_db_path, article_id)
     return article
 
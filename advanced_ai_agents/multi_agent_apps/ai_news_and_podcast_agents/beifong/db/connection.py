@@ -1,15 +1,100 @@
+import os
 import sqlite3
+import threading
 from contextlib import contextmanager
 
+SQLITE_BUSY_TIMEOUT = 30
+SQLITE_STATEMENT_CACHE_SIZE = 256
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=10000",
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+)
+
+_thread_local = threading.local()
+
+
+def configure_connection(conn):
+    conn.row_factory = sqlite3.Row
+    for pragma in SQLITE_PRAGMAS:
+        try:
+            conn.execute(pragma)
+        except sqlite3.OperationalError as e:
+            print(f"Could not apply {pragma}: {str(e)}")
+    return conn
+
+
+def open_connection(db_path):
+    conn = sqlite3.connect(db_path, timeout=SQLITE_BUSY_TIMEOUT, cached_statements=SQLITE_STATEMENT_CACHE_SIZE)
+    return configure_connection(conn)
+
+
+def get_file_id(db_path):
+    try:
+        stat = os.stat(db_path)
+        return stat.st_dev, stat.st_ino
+    except FileNotFoundError:
+        return None
+
+
+def _thread_connections():
+    if getattr(_thread_local, "pid", None) != os.getpid():
+        _thread_local.pid = os.getpid()
+        _thread_local.connections = {}
+    return _thread_local.connections
+
+
+def _checkout(db_path):
+    if db_path == ":memory:":
+        return None
+    connections = _thread_connections()
+    key = os.path.abspath(db_path)
+    pooled = connections.get(key)
+    if pooled is not None:
+        if pooled["in_use"]:
+            return None
+        if pooled["file_id"] == get_file_id(db_path):
+            pooled["in_use"] = True
+            return pooled
+        pooled["conn"].close()
+    conn = open_connection(db_path)
+    pooled = {"conn": conn, "file_id": get_file_id(db_path), "in_use": True}
+    connections[key] = pooled
+    return pooled
+
 
 @contextmanager
 def db_connection(db_path):
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    pooled = _checkout(db_path)
+    if pooled is None:
+        conn = open_connection(db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+    conn = pooled["conn"]
     try:
         yield conn
     finally:
-        conn.close()
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            _thread_connections().pop(os.path.abspath(db_path), None)
+            conn.close()
+        pooled["in_use"] = False
+
+
+def close_thread_connections():
+    connections = _thread_connections()
+    for key, pooled in list(connections.items()):
+        if not pooled["in_use"]:
+            pooled["conn"].close()
+            del connections[key]
 
 
 def execute_query(db_path, query, params=(), fetch=False, fetch_one=False):
@@ -25,3 +110,52 @@ def execute_query(db_path, query, params=(), fetch=False, fetch_one=False):
         else:
             conn.commit()
             return cursor.lastrowid
+
+
+class WriteBatch:
+    """Buffers write statements and applies them in one transaction per flush."""
+
+    def __init__(self, db_path, max_pending=500):
+        self.db_path = db_path
+        self.max_pending = max_pending
+        self._operations = []
+        self._flushing = False
+
+    def add(self, query, params=(), callback=None):
+        self._operations.append((query, params, callback))
+        if not self._flushing and len(self._operations) >= self.max_pending:
+            self.flush()
+
+    def flush(self):
+        if not self._operations:
+            return 0
+        self._flushing = True
+        executed = 0
+        try:
+            with db_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                index = 0
+                while index < len(self._operations):
+                    query, params, callback = self._operations[index]
+                    index += 1
+                    try:
+                        cursor.execute(query, params)
+                        rowcount = cursor.rowcount
+                        executed += 1
+                    except sqlite3.Error as e:
+                        print(f"Batched write failed: {str(e)}")
+                        rowcount = 0
+                    if callback:
+                        callback(rowcount)
+                conn.commit()
+        finally:
+            self._operations = []
+            self._flushing = False
+        return executed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
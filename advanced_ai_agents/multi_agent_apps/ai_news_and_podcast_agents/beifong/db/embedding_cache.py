@@ -0,0 +1,73 @@
+import hashlib
+import re
+import unicodedata
+from datetime import datetime
+import numpy as np
+from .connection import db_connection, execute_query
+
+
+def create_embedding_cache_table(tracking_db_path):
+    with db_connection(tracking_db_path) as conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+            content_hash TEXT NOT NULL,
+            embedding_model TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (content_hash, embedding_model)
+        )
+        """)
+        conn.commit()
+
+
+def normalize_text(text):
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def content_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def get_cached_embeddings(tracking_db_path, hashes, model):
+    hashes = list(set(hashes))
+    cached = {}
+    for start in range(0, len(hashes), 500):
+        chunk = hashes[start : start + 500]
+        placeholders = ",".join(["?"] * len(chunk))
+        query = f"""
+        SELECT content_hash, embedding
+        FROM embedding_cache
+        WHERE embedding_model = ? AND content_hash IN ({placeholders})
+        """
+        for row in execute_query(tracking_db_path, query, (model, *chunk), fetch=True):
+            cached[row["content_hash"]] = np.frombuffer(row["embedding"], dtype=np.float32).tolist()
+    return cached
+
+
+def get_cached_embedding(tracking_db_path, text, model):
+    hash_value = content_hash(text)
+    return get_cached_embeddings(tracking_db_path, [hash_value], model).get(hash_value)
+
+
+def store_cached_embeddings(tracking_db_path, rows, model):
+    if not rows:
+        return 0
+    created_at = datetime.now().isoformat()
+    params = [(hash_value, model, np.array(embedding, dtype=np.float32).tobytes(), created_at) for hash_value, embedding in rows]
+    with db_connection(tracking_db_path) as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            """
+            INSERT OR IGNORE INTO embedding_cache
+            (content_hash, embedding_model, embedding, created_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            params,
+        )
+        conn.commit()
+        return len(params)
+
+
+def store_cached_embedding(tracking_db_path, text, embedding, model):
+    return store_cached_embeddings(tracking_db_path, [(content_hash(text), embedding)], model)
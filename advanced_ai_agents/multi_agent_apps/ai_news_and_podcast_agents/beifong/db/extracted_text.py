@@ -0,0 +1,53 @@
+from datetime import datetime
+from .connection import db_connection
+
+
+def create_extracted_text_table(tracking_db_path):
+    with db_connection(tracking_db_path) as conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS article_extracted_text (
+            article_id INTEGER PRIMARY KEY,
+            extractor_version INTEGER NOT NULL,
+            max_tokens INTEGER NOT NULL,
+            token_count INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (article_id) REFERENCES crawled_articles(id)
+        )
+        """)
+        conn.commit()
+
+
+def get_extracted_texts(tracking_db_path, article_ids, extractor_version, max_tokens):
+    article_ids = list(article_ids)
+    texts = {}
+    for start in range(0, len(article_ids), 500):
+        chunk = article_ids[start : start + 500]
+        placeholders = ",".join(["?"] * len(chunk))
+        query = f"""
+        SELECT article_id, text, token_count
+        FROM article_extracted_text
+        WHERE extractor_version = ? AND max_tokens = ? AND article_id IN ({placeholders})
+        """
+        with db_connection(tracking_db_path) as conn:
+            for row in conn.execute(query, (extractor_version, max_tokens, *chunk)).fetchall():
+                texts[row["article_id"]] = (row["text"], row["token_count"])
+    return texts
+
+
+def store_extracted_texts(tracking_db_path, rows, extractor_version, max_tokens):
+    if not rows:
+        return 0
+    created_at = datetime.now().isoformat()
+    params = [(article_id, extractor_version, max_tokens, token_count, text, created_at) for article_id, text, token_count in rows]
+    with db_connection(tracking_db_path) as conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO article_extracted_text
+            (article_id, extractor_version, max_tokens, token_count, text, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            params,
+        )
+        conn.commit()
+    return len(params)
@@ -41,16 +41,48 @@ def get_feed_tracking_info(tracking_db_path, feed_id):
     return execute_query(tracking_db_path, query, (feed_id,), fetch=True, fetch_one=True)
 
 
-def update_feed_tracking(tracking_db_path, feed_id, etag, modified, entry_hash):
+def get_feed_tracking_infos(tracking_db_path, feed_ids):
+    if not feed_ids:
+        return {}
+    placeholders = ",".join(["?"] * len(feed_ids))
+    query = f"SELECT * FROM feed_tracking WHERE feed_id IN ({placeholders})"
+    rows = execute_query(tracking_db_path, query, tuple(feed_ids), fetch=True)
+    return {row["feed_id"]: row for row in rows}
+
+
+def update_feed_tracking(tracking_db_path, feed_id, etag, modified, entry_hash, batch=None):
     query = """
     UPDATE feed_tracking 
     SET last_processed = ?, last_etag = ?, last_modified = ?, entry_hash = ?
     WHERE feed_id = ?
     """
     params = (datetime.now().isoformat(), etag, modified, entry_hash, feed_id)
+    if batch is not None:
+        return batch.add(query, params)
     return execute_query(tracking_db_path, query, params)
 
 
+def store_feed_entries_batched(batch, feed_id, source_id, entries, callback=None):
+    query = """
+    INSERT OR IGNORE INTO feed_entries 
+    (feed_id, source_id, entry_id, title, link, published_date, content, summary)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    for entry in entries:
+        params = (
+            feed_id,
+            source_id,
+            entry.get("entry_id", ""),
+            entry.get("title", ""),
+            entry.get("link", ""),
+            entry.get("published_date", datetime.now().isoformat()),
+            entry.get("content", ""),
+            entry.get("summary", ""),
+        )
+        batch.add(query, params, callback)
+    return len(entries)
+
+
 def store_feed_entries(tracking_db_path, feed_id, source_id, entries):
     count = 0
     with db_connection(tracking_db_path) as conn:
@@ -96,8 +128,9 @@ def update_tracking_info(tracking_db_path, feeds):
         conn.commit()
 
 
-def get_uncrawled_entries(tracking_db_path, limit=20, max_attempts=3):
-    reset_stuck_entries(tracking_db_path)
+def get_uncrawled_entries(tracking_db_path, limit=20, max_attempts=3, reset_stuck=True):
+    if reset_stuck:
+        reset_stuck_entries(tracking_db_path)
     query = """
     SELECT e.id, e.feed_id, e.source_id, e.title, e.link, e.published_date,
            e.crawl_attempts, e.entry_id as original_entry_id
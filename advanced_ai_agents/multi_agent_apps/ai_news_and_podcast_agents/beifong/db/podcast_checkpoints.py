@@ -0,0 +1,50 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from .connection import db_connection, execute_query
+
+CHECKPOINT_TTL_HOURS = 24
+
+
+def create_stage_checkpoint_table(podcasts_db_path):
+    with db_connection(podcasts_db_path) as conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS podcast_stage_checkpoints (
+            run_key TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            output_json TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (run_key, stage)
+        )
+        """)
+        conn.commit()
+
+
+def build_run_key(**params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def get_stage_checkpoints(podcasts_db_path, run_key, max_age_hours=CHECKPOINT_TTL_HOURS):
+    query = """
+    SELECT stage, output_json
+    FROM podcast_stage_checkpoints
+    WHERE run_key = ? AND created_at >= ?
+    """
+    since = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
+    rows = execute_query(podcasts_db_path, query, (run_key, since), fetch=True)
+    return {row["stage"]: json.loads(row["output_json"]) for row in rows}
+
+
+def store_stage_checkpoint(podcasts_db_path, run_key, stage, output):
+    query = """
+    INSERT OR REPLACE INTO podcast_stage_checkpoints (run_key, stage, output_json, created_at)
+    VALUES (?, ?, ?, ?)
+    """
+    return execute_query(podcasts_db_path, query, (run_key, stage, json.dumps(output), datetime.now().isoformat()))
+
+
+def clear_stage_checkpoints(podcasts_db_path, run_key=None, older_than_hours=None):
+    if run_key is not None:
+        return execute_query(podcasts_db_path, "DELETE FROM podcast_stage_checkpoints WHERE run_key = ?", (run_key,))
+    cutoff = (datetime.now() - timedelta(hours=older_than_hours or CHECKPOINT_TTL_HOURS)).isoformat()
+    return execute_query(podcasts_db_path, "DELETE FROM podcast_stage_checkpoints WHERE created_at < ?", (cutoff,))
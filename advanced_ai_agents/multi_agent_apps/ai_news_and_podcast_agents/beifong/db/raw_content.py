@@ -0,0 +1,132 @@
+import zstandard
+from datetime import datetime
+from .connection import db_connection
+from .extracted_text import create_extracted_text_table
+
+RAW_CONTENT_CODEC = "zstd"
+RAW_CONTENT_COMPRESSION_LEVEL = 6
+
+
+def create_raw_content_table(tracking_db_path):
+    with db_connection(tracking_db_path) as conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS article_raw_content (
+            article_id INTEGER PRIMARY KEY,
+            codec TEXT NOT NULL,
+            raw_size INTEGER NOT NULL,
+            content BLOB NOT NULL,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (article_id) REFERENCES crawled_articles(id)
+        )
+        """)
+        conn.commit()
+
+
+def compress_html(html):
+    raw = (html or "").encode("utf-8")
+    return raw, zstandard.ZstdCompressor(level=RAW_CONTENT_COMPRESSION_LEVEL).compress(raw)
+
+
+def decompress_html(codec, content):
+    if content is None:
+        return None
+    if codec == RAW_CONTENT_CODEC:
+        return zstandard.ZstdDecompressor().decompress(content).decode("utf-8")
+    return bytes(content).decode("utf-8")
+
+
+def build_raw_content_insert(html, where_clause):
+    raw, compressed = compress_html(html)
+    query = f"""
+    INSERT OR REPLACE INTO article_raw_content (article_id, codec, raw_size, content, created_at)
+    SELECT id, ?, ?, ?, ? FROM crawled_articles WHERE {where_clause}
+    """
+    return query, (RAW_CONTENT_CODEC, len(raw), compressed, datetime.now().isoformat())
+
+
+def get_raw_contents(tracking_db_path, article_ids):
+    article_ids = list(article_ids)
+    contents = {}
+    for start in range(0, len(article_ids), 500):
+        chunk = article_ids[start : start + 500]
+        placeholders = ",".join(["?"] * len(chunk))
+        query = f"""
+        SELECT ca.id, ca.raw_content, rc.codec, rc.content
+        FROM crawled_articles ca
+        LEFT JOIN article_raw_content rc ON rc.article_id = ca.id
+        WHERE ca.id IN ({placeholders})
+        """
+        with db_connection(tracking_db_path) as conn:
+            for row in conn.execute(query, chunk).fetchall():
+                if row["content"] is not None:
+                    contents[row["id"]] = decompress_html(row["codec"], row["content"])
+                else:
+                    contents[row["id"]] = row["raw_content"]
+    return contents
+
+
+def get_raw_content(tracking_db_path, article_id):
+    return get_raw_contents(tracking_db_path, [article_id]).get(article_id)
+
+
+def migrate_raw_content(tracking_db_path, batch_size=500):
+    create_raw_content_table(tracking_db_path)
+    migrated = 0
+    saved_bytes = 0
+    last_id = 0
+    while True:
+        with db_connection(tracking_db_path) as conn:
+            rows = conn.execute(
+                """
+                SELECT id, raw_content FROM crawled_articles
+                WHERE raw_content IS NOT NULL AND id > ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            created_at = datetime.now().isoformat()
+            params = []
+            for row in rows:
+                raw, compressed = compress_html(row["raw_content"])
+                params.append((row["id"], RAW_CONTENT_CODEC, len(raw), compressed, created_at))
+                saved_bytes += len(raw) - len(compressed)
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO article_raw_content (article_id, codec, raw_size, content, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                params,
+            )
+            conn.executemany("UPDATE crawled_articles SET raw_content = NULL WHERE id = ?", [(row["id"],) for row in rows])
+            conn.commit()
+            migrated += len(rows)
+            last_id = rows[-1]["id"]
+    return {"migrated": migrated, "saved_bytes": saved_bytes}
+
+
+def purge_analyzed_raw_content(tracking_db_path, older_than_days=7):
+    create_raw_content_table(tracking_db_path)
+    create_extracted_text_table(tracking_db_path)
+    cutoff = f"-{int(older_than_days)} days"
+    analyzed = """
+    SELECT id FROM crawled_articles
+    WHERE processed = 1 AND ai_status = 'success' AND crawled_date < datetime('now', ?)
+    """
+    with db_connection(tracking_db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"DELETE FROM article_raw_content WHERE article_id IN ({analyzed})", (cutoff,))
+        purged = cursor.rowcount
+        cursor.execute(f"DELETE FROM article_extracted_text WHERE article_id IN ({analyzed})", (cutoff,))
+        purged += cursor.rowcount
+        cursor.execute(f"UPDATE crawled_articles SET raw_content = NULL WHERE raw_content IS NOT NULL AND id IN ({analyzed})", (cutoff,))
+        purged += cursor.rowcount
+        conn.commit()
+    return purged
+
+
+def vacuum_database(tracking_db_path):
+    with db_connection(tracking_db_path) as conn:
+        conn.execute("VACUUM")
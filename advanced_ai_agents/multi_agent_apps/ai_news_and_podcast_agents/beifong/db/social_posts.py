@@ -0,0 +1,182 @@
+import sqlite3
+from datetime import date, datetime, timedelta
+from .connection import db_connection
+from .article_search import build_fts_query
+
+POST_FTS_TABLE = "posts_fts"
+POST_LABEL_TABLES = {"categories": "post_categories", "tags": "post_tags"}
+
+# categories and tags are JSON arrays on posts; these tables keep one row per label with the
+# post's timestamp so label filters can walk (label, post_timestamp, post_id) in feed order
+POST_LABEL_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS post_categories (
+        post_id TEXT NOT NULL,
+        category TEXT NOT NULL,
+        post_timestamp TEXT,
+        PRIMARY KEY (post_id, category)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS post_tags (
+        post_id TEXT NOT NULL,
+        tag TEXT NOT NULL,
+        post_timestamp TEXT,
+        PRIMARY KEY (post_id, tag)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_post_categories_feed ON post_categories(category, post_timestamp, post_id)",
+    "CREATE INDEX IF NOT EXISTS idx_post_tags_feed ON post_tags(tag, post_timestamp, post_id)",
+    "CREATE INDEX IF NOT EXISTS idx_post_tags_post_timestamp ON post_tags(post_timestamp)",
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_labels_insert AFTER INSERT ON posts BEGIN
+        INSERT OR IGNORE INTO post_categories(post_id, category, post_timestamp)
+        SELECT new.post_id, value, new.post_timestamp
+        FROM json_each(CASE WHEN json_valid(new.categories) THEN new.categories ELSE '[]' END) WHERE type = 'text';
+        INSERT OR IGNORE INTO post_tags(post_id, tag, post_timestamp)
+        SELECT new.post_id, value, new.post_timestamp
+        FROM json_each(CASE WHEN json_valid(new.tags) THEN new.tags ELSE '[]' END) WHERE type = 'text';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_labels_delete AFTER DELETE ON posts BEGIN
+        DELETE FROM post_categories WHERE post_id = old.post_id;
+        DELETE FROM post_tags WHERE post_id = old.post_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_labels_update AFTER UPDATE OF post_id, categories, tags, post_timestamp ON posts BEGIN
+        DELETE FROM post_categories WHERE post_id = old.post_id;
+        DELETE FROM post_tags WHERE post_id = old.post_id;
+        INSERT OR IGNORE INTO post_categories(post_id, category, post_timestamp)
+        SELECT new.post_id, value, new.post_timestamp
+        FROM json_each(CASE WHEN json_valid(new.categories) THEN new.categories ELSE '[]' END) WHERE type = 'text';
+        INSERT OR IGNORE INTO post_tags(post_id, tag, post_timestamp)
+        SELECT new.post_id, value, new.post_timestamp
+        FROM json_each(CASE WHEN json_valid(new.tags) THEN new.tags ELSE '[]' END) WHERE type = 'text';
+    END
+    """,
+]
+
+POST_LABEL_BACKFILL = [
+    "DELETE FROM post_categories",
+    "DELETE FROM post_tags",
+    """
+    INSERT OR IGNORE INTO post_categories(post_id, category, post_timestamp)
+    SELECT p.post_id, j.value, p.post_timestamp FROM posts p, json_each(p.categories) j
+    WHERE json_valid(p.categories) AND j.type = 'text'
+    """,
+    """
+    INSERT OR IGNORE INTO post_tags(post_id, tag, post_timestamp)
+    SELECT p.post_id, j.value, p.post_timestamp FROM posts p, json_each(p.tags) j
+    WHERE json_valid(p.tags) AND j.type = 'text'
+    """,
+]
+
+# external content over the implicit rowid of posts; VACUUM may renumber it, so run
+# rebuild_post_search afterwards
+POST_FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        post_text, user_display_name, user_handle,
+        content='posts', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, post_text, user_display_name, user_handle)
+        VALUES (new.rowid, new.post_text, new.user_display_name, new.user_handle);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, post_text, user_display_name, user_handle)
+        VALUES ('delete', old.rowid, old.post_text, old.user_display_name, old.user_handle);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF post_text, user_display_name, user_handle ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, post_text, user_display_name, user_handle)
+        VALUES ('delete', old.rowid, old.post_text, old.user_display_name, old.user_handle);
+        INSERT INTO posts_fts(rowid, post_text, user_display_name, user_handle)
+        VALUES (new.rowid, new.post_text, new.user_display_name, new.user_handle);
+    END
+    """,
+]
+
+
+def _has_table(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+def has_post_fts(conn):
+    return _has_table(conn, POST_FTS_TABLE)
+
+
+def create_post_search_tables(conn):
+    """Create the label tables and full-text index over posts, backfilling them on first creation."""
+    labels_existed = _has_table(conn, "post_categories")
+    for statement in POST_LABEL_SCHEMA:
+        conn.execute(statement)
+    if not labels_existed:
+        for statement in POST_LABEL_BACKFILL:
+            conn.execute(statement)
+        print("Built category and tag tables for social media posts")
+    fts_existed = has_post_fts(conn)
+    try:
+        for statement in POST_FTS_SCHEMA:
+            conn.execute(statement)
+    except sqlite3.OperationalError as e:
+        print(f"FTS5 not available, social media search will use LIKE scans: {str(e)}")
+        return False
+    if not fts_existed:
+        conn.execute(f"INSERT INTO {POST_FTS_TABLE}({POST_FTS_TABLE}) VALUES ('rebuild')")
+        print("Built full-text index for social media posts")
+    return True
+
+
+def rebuild_post_search(social_media_db_path):
+    with db_connection(social_media_db_path) as conn:
+        create_post_search_tables(conn)
+        for statement in POST_LABEL_BACKFILL:
+            conn.execute(statement)
+        if has_post_fts(conn):
+            conn.execute(f"INSERT INTO {POST_FTS_TABLE}({POST_FTS_TABLE}) VALUES ('rebuild')")
+            conn.execute(f"INSERT INTO {POST_FTS_TABLE}({POST_FTS_TABLE}) VALUES ('optimize')")
+        conn.commit()
+
+
+def build_post_match_query(search):
+    """Every word of the search has to appear, as a prefix, in the text, display name or handle."""
+    return build_fts_query(str(search).split(), operator="AND", prefix=True)
+
+
+def _timestamp_bound(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value).strip().replace(" ", "T")
+
+
+def timestamp_range_clauses(column, date_from=None, date_to=None):
+    """
+    Compare the stored ISO timestamps directly so the timestamp indexes stay usable.
+    A date-only date_to covers that whole day.
+    """
+    clauses, params = [], []
+    if date_from:
+        clauses.append(f"{column} >= ?")
+        params.append(_timestamp_bound(date_from))
+    if date_to:
+        bound = _timestamp_bound(date_to)
+        try:
+            day = date.fromisoformat(bound)
+        except ValueError:
+            clauses.append(f"{column} <= ?")
+            params.append(bound)
+        else:
+            clauses.append(f"{column} < ?")
+            params.append((day + timedelta(days=1)).isoformat())
+    return clauses, params
@@ -138,21 +138,21 @@ def create_task_execution(tasks_db_path, task_id, status, error_message=None, ou
         return None  #
 
 
-def update_task_execution(tasks_db_path, execution_id, status, error_message=None, output=None):
+def update_task_execution(tasks_db_path, execution_id, status, error_message=None, output=None, cpu_time=None, peak_rss_kb=None):
     end_time = datetime.now().isoformat()
     query = """
     UPDATE task_executions
-    SET end_time = ?, status = ?, error_message = ?, output = ?
+    SET end_time = ?, status = ?, error_message = ?, output = ?, cpu_time = ?, peak_rss_kb = ?
     WHERE id = ?
     """
-    params = (end_time, status, error_message, output, execution_id)
+    params = (end_time, status, error_message, output, cpu_time, peak_rss_kb, execution_id)
     return execute_query(tasks_db_path, query, params)
 
 
 def get_recent_task_executions(tasks_db_path, task_id=None, limit=10):
     if task_id:
         query = """
-        SELECT id, task_id, start_time, end_time, status, error_message, output
+        SELECT id, task_id, start_time, end_time, status, error_message, output, cpu_time, peak_rss_kb
         FROM task_executions
         WHERE task_id = ?
         ORDER BY start_time DESC
@@ -161,7 +161,7 @@ def get_recent_task_executions(tasks_db_path, task_id=None, limit=10):
         params = (task_id, limit)
     else:
         query = """
-        SELECT id, task_id, start_time, end_time, status, error_message, output
+        SELECT id, task_id, start_time, end_time, status, error_message, output, cpu_time, peak_rss_kb
         FROM task_executions
         ORDER BY start_time DESC
         LIMIT ?
@@ -172,7 +172,7 @@ def get_recent_task_executions(tasks_db_path, task_id=None, limit=10):
 
 def get_task_execution(tasks_db_path, execution_id):
     query = """
-    SELECT id, task_id, start_time, end_time, status, error_message, output
+    SELECT id, task_id, start_time, end_time, status, error_message, output, cpu_time, peak_rss_kb
     FROM task_executions
     WHERE id = ?
     """
@@ -1,9 +1,10 @@
 import os
 import re
-import sqlite3
 import asyncio
 import aiohttp
 import json
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
 from slack_bolt import App
 from slack_bolt.adapter.socket_mode import SocketModeHandler
@@ -11,6 +12,7 @@ from dotenv import load_dotenv
 from typing import Dict, List
 from datetime import datetime
 from db.config import get_slack_sessions_db_path
+from db.connection import db_connection, execute_query
 
 load_dotenv()
 
@@ -19,6 +21,8 @@ app = App(token=os.environ["SLACK_BOT_TOKEN"])
 # you can use ngrok to port forward local url to https and replace this local url with ngrok url
 API_BASE_URL = os.environ.get("API_BASE_URL", "http://localhost:7000")
 executor = ThreadPoolExecutor(max_workers=10)
+TASK_EVENTS_TIMEOUT_SEC = 600
+PROGRESS_NOTICE_INTERVAL_SEC = 30
 active_sessions: Dict[str, Dict] = {}
 DB_PATH = get_slack_sessions_db_path()
 
@@ -29,76 +33,62 @@ def send_error_message(thread_key: str, error_message: str):
 
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS thread_sessions (
-            thread_key TEXT PRIMARY KEY,
-            session_id TEXT NOT NULL,
-            channel_id TEXT NOT NULL,
-            user_id TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS session_state (
-            session_id TEXT PRIMARY KEY,
-            state_data TEXT,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conn.commit()
-    conn.close()
+    with db_connection(DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS thread_sessions (
+                thread_key TEXT PRIMARY KEY,
+                session_id TEXT NOT NULL,
+                channel_id TEXT NOT NULL,
+                user_id TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS session_state (
+                session_id TEXT PRIMARY KEY,
+                state_data TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
 
 
 def save_session_mapping(thread_key: str, session_id: str, channel_id: str, user_id: str = None):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
+    execute_query(
+        DB_PATH,
         "INSERT OR REPLACE INTO thread_sessions (thread_key, session_id, channel_id, user_id, updated_at) VALUES (?, ?, ?, ?, ?)",
         (thread_key, session_id, channel_id, user_id, datetime.now().isoformat()),
     )
-    conn.commit()
-    conn.close()
 
 
 def get_session_info(thread_key: str):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT session_id, channel_id, user_id FROM thread_sessions WHERE thread_key = ?",
-        (thread_key,),
-    )
-    result = cursor.fetchone()
-    conn.close()
-    return result if result else None
+    with db_connection(DB_PATH) as conn:
+        result = conn.execute(
+            "SELECT session_id, channel_id, user_id FROM thread_sessions WHERE thread_key = ?",
+            (thread_key,),
+        ).fetchone()
+    return tuple(result) if result else None
 
 
 def save_session_state(session_id: str, state_data):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
     if isinstance(state_data, str):
         json_data = state_data
     else:
         json_data = json.dumps(state_data)
-    cursor.execute(
+    execute_query(
+        DB_PATH,
         "INSERT OR REPLACE INTO session_state (session_id, state_data, updated_at) VALUES (?, ?, ?)",
         (session_id, json_data, datetime.now().isoformat()),
     )
-    conn.commit()
-    conn.close()
 
 
 def get_session_state(session_id: str):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT state_data FROM session_state WHERE session_id = ?", (session_id,))
-    result = cursor.fetchone()
-    conn.close()
+    result = execute_query(DB_PATH, "SELECT state_data FROM session_state WHERE session_id = ?", (session_id,), fetch_one=True)
     if result:
         try:
-            return json.loads(result[0])
+            return json.loads(result["state_data"])
         except:
             return {}
     return {}
@@ -131,6 +121,22 @@ class PodcastAgentClient:
             print(f"API chat error: {e}")
             raise
 
+    async def stream_events(self, session_id: str, task_id=None):
+        """Yield events from the server-sent event stream of a session until it closes."""
+        params = {"task_id": task_id} if task_id else {}
+        timeout = aiohttp.ClientTimeout(total=TASK_EVENTS_TIMEOUT_SEC, sock_connect=10)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(f"{self.base_url}/api/podcast-agent/events/{session_id}", params=params) as resp:
+                resp.raise_for_status()
+                data_lines = []
+                async for raw_line in resp.content:
+                    line = raw_line.decode("utf-8").rstrip("\r\n")
+                    if line.startswith("data:"):
+                        data_lines.append(line[5:].strip())
+                    elif not line and data_lines:
+                        yield json.loads("\n".join(data_lines))
+                        data_lines = []
+
     async def check_status(self, session_id: str, task_id=None):
         try:
             async with aiohttp.ClientSession(timeout=self.timeout) as session:
@@ -167,17 +173,21 @@ async def get_or_create_session(thread_key: str, channel_id: str, user_id: str =
         return session_info[0]
 
 
-def run_async_in_thread(coro):
-    def run():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(coro)
-        finally:
-            loop.close()
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
 
-    future = executor.submit(run)
-    return future
+def get_background_loop():
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="slack-task-events", daemon=True).start()
+        return _background_loop
+
+
+def run_async_in_thread(coro):
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop())
 
 
 async def poll_for_completion(session_id: str, thread_key: str, task_id=None):
@@ -218,10 +228,42 @@ async def poll_for_completion(session_id: str, thread_key: str, task_id=None):
             del active_sessions[session_id]
 
 
-def start_background_polling(session_id: str, thread_key: str, task_id=None):
+async def wait_for_completion(session_id: str, thread_key: str, task_id=None):
+    print(f"Subscribing to events for session: {session_id}, task: {task_id}")
+    active_sessions[session_id] = {
+        "thread_key": thread_key,
+        "task_id": task_id,
+        "start_time": datetime.now(),
+    }
+    started = time.monotonic()
+    last_notice = started
+    try:
+        async for event in api_client.stream_events(session_id, task_id):
+            if event["type"] in ("completed", "failed"):
+                result = event.get("result", {})
+                if result.get("session_state"):
+                    save_session_state(session_id, result["session_state"])
+                await send_completion_message(thread_key, result)
+                return
+            if time.monotonic() - last_notice >= PROGRESS_NOTICE_INTERVAL_SEC:
+                last_notice = time.monotonic()
+                await send_slack_message(
+                    thread_key,
+                    f"🔄 Still processing {event.get('stage') or 'request'}... ({int(last_notice - started)}s elapsed)",
+                )
+        print(f"Event stream closed before completion for session: {session_id}")
+    except Exception as e:
+        print(f"Event stream error for session {session_id}, falling back to polling: {e}")
+    finally:
+        if session_id in active_sessions:
+            del active_sessions[session_id]
+    await poll_for_completion(session_id, thread_key, task_id)
+
+
+def start_background_updates(session_id: str, thread_key: str, task_id=None):
     if session_id in active_sessions:
-        print(f"Replacing existing poll for session: {session_id}")
-    future = run_async_in_thread(poll_for_completion(session_id, thread_key, task_id))
+        print(f"Replacing existing subscription for session: {session_id}")
+    future = run_async_in_thread(wait_for_completion(session_id, thread_key, task_id))
     active_sessions[session_id] = {
         "thread_key": thread_key,
         "task_id": task_id,
@@ -834,7 +876,7 @@ async def process_source_confirmation(thread_key: str, message: str):
         chat_response = await api_client.chat(session_id, message)
         if chat_response.get("is_processing"):
             task_id = chat_response.get("task_id")
-            start_background_polling(session_id, thread_key, task_id)
+            start_background_updates(session_id, thread_key, task_id)
         else:
             response_text = chat_response.get("response", "Selection processed!")
             await send_slack_message(thread_key, response_text)
@@ -1060,7 +1102,7 @@ async def process_approval_action(body, approval_message: str):
         chat_response = await api_client.chat(session_id, approval_message)
         if chat_response.get("is_processing"):
             task_id = chat_response.get("task_id")
-            start_background_polling(session_id, thread_key, task_id)
+            start_background_updates(session_id, thread_key, task_id)
         else:
             response_text = chat_response.get("response", "Approved! Processing next step...")
             await send_slack_message(thread_key, response_text)
@@ -1193,7 +1235,7 @@ async def handle_user_message(
                 say(text=response_text)
         if chat_response.get("is_processing"):
             task_id = chat_response.get("task_id")
-            start_background_polling(session_id, thread_key, task_id)
+            start_background_updates(session_id, thread_key, task_id)
             processing_msg = "🔄 Processing your request... This may take a moment."
             if not is_dm and not is_mention:
                 say(text=processing_msg, thread_ts=thread_key)
@@ -1,13 +1,17 @@
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
 import uvicorn
 import os
-import aiofiles
+from typing import Optional
 from contextlib import asynccontextmanager
 from routers import article_router, podcast_router, source_router, task_router, podcast_config_router, async_podcast_agent_router, social_media_router
 from services.db_init import init_databases
+from services.db_service import close_database_pools
+from utils.audio_encoding import AUDIO_FORMATS, PODCAST_AUDIO_FORMAT, audio_format_for_path, audio_media_type, get_audio_rendition
+from utils.faiss_index import warm_resident_index
 from dotenv import load_dotenv
 
 
@@ -17,6 +21,7 @@ CLIENT_BUILD_PATH = os.environ.get(
     "CLIENT_BUILD_PATH",
     "../web/build",
 )
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get("MEDIA_ACCEL_REDIRECT_PREFIX", "")
 
 
 @asynccontextmanager
@@ -28,11 +33,13 @@ async def lifespan(app: FastAPI):
     os.makedirs("podcasts/images", exist_ok=True)
     os.makedirs("podcasts/recordings", exist_ok=True)
     await init_databases()
+    warm_resident_index()
     if not os.path.exists(CLIENT_BUILD_PATH):
         print(f"WARNING: React client build path not found: {CLIENT_BUILD_PATH}")
     print("Application startup complete!")
     yield
     print("Shutting down application...")
+    await close_database_pools()
     print("Shutdown complete")
 
 
@@ -56,88 +63,41 @@ app.include_router(async_podcast_agent_router.router, prefix="/api/podcast-agent
 app.include_router(social_media_router.router, prefix="/api/social-media", tags=["social-media"])
 
 
+def media_file_response(path: str, media_type: str) -> Response:
+    if MEDIA_ACCEL_REDIRECT_PREFIX:
+        # let the fronting nginx send the file (sendfile + Range handling) from an internal location mapped to this directory
+        return Response(
+            headers={
+                "X-Accel-Redirect": MEDIA_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + path.replace(os.sep, "/"),
+                "Content-Type": media_type,
+            }
+        )
+    # FileResponse answers Range requests itself and hands the file to the server via pathsend when it supports it
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path), content_disposition_type="inline")
+
+
 @app.get("/stream-audio/{filename}")
-async def stream_audio(filename: str, request: Request):
+async def stream_audio(filename: str, format: Optional[str] = None):
     audio_path = os.path.join("podcasts/audio", filename)
-    if not os.path.exists(audio_path):
+    if os.path.basename(filename) != filename or not os.path.exists(audio_path):
         return Response(status_code=404, content="Audio file not found")
-    file_size = os.path.getsize(audio_path)
-    range_header = request.headers.get("Range", "").strip()
-    start = 0
-    end = file_size - 1
-    if range_header:
+    audio_format = format or (PODCAST_AUDIO_FORMAT if audio_format_for_path(audio_path) == "wav" else None)
+    if audio_format and audio_format not in AUDIO_FORMATS:
+        return Response(status_code=400, content=f"Unsupported audio format: {audio_format}")
+    if audio_format:
         try:
-            range_data = range_header.replace("bytes=", "").split("-")
-            start = int(range_data[0]) if range_data[0] else 0
-            end = int(range_data[1]) if len(range_data) > 1 and range_data[1] else file_size - 1
-        except ValueError:
-            return Response(status_code=400, content="Invalid range header")
-    end = min(end, file_size - 1)
-    content_length = end - start + 1
-    headers = {
-        "Accept-Ranges": "bytes",
-        "Content-Range": f"bytes {start}-{end}/{file_size}",
-        "Content-Length": str(content_length),
-        "Content-Disposition": f"inline; filename={filename}",
-        "Content-Type": "audio/wav",
-    }
-
-    async def file_streamer():
-        async with aiofiles.open(audio_path, "rb") as f:
-            await f.seek(start)
-            remaining = content_length
-            chunk_size = 64 * 1024
-            while remaining > 0:
-                chunk = await f.read(min(chunk_size, remaining))
-                if not chunk:
-                    break
-                remaining -= len(chunk)
-                yield chunk
-
-    status_code = 206 if range_header else 200
-    return StreamingResponse(file_streamer(), status_code=status_code, headers=headers)
+            audio_path = await run_in_threadpool(get_audio_rendition, audio_path, audio_format)
+        except Exception as e:
+            print(f"Could not encode {filename} to {audio_format}, serving the original: {e}")
+    return media_file_response(audio_path, audio_media_type(audio_path))
 
 
 @app.get("/stream-recording/{session_id}/{filename}")
-async def stream_recording(session_id: str, filename: str, request: Request):
+async def stream_recording(session_id: str, filename: str):
     recording_path = os.path.join("podcasts/recordings", session_id, filename)
-    if not os.path.exists(recording_path):
+    if os.path.basename(filename) != filename or os.path.basename(session_id) != session_id or not os.path.exists(recording_path):
         return Response(status_code=404, content="Recording video not found")
-    file_size = os.path.getsize(recording_path)
-    range_header = request.headers.get("Range", "").strip()
-    start = 0
-    end = file_size - 1
-    if range_header:
-        try:
-            range_data = range_header.replace("bytes=", "").split("-")
-            start = int(range_data[0]) if range_data[0] else 0
-            end = int(range_data[1]) if len(range_data) > 1 and range_data[1] else file_size - 1
-        except ValueError:
-            return Response(status_code=400, content="Invalid range header")
-    end = min(end, file_size - 1)
-    content_length = end - start + 1
-    headers = {
-        "Accept-Ranges": "bytes",
-        "Content-Range": f"bytes {start}-{end}/{file_size}",
-        "Content-Length": str(content_length),
-        "Content-Disposition": f"inline; filename={filename}",
-        "Content-Type": "video/webm",
-    }
-
-    async def file_streamer():
-        async with aiofiles.open(recording_path, "rb") as f:
-            await f.seek(start)
-            remaining = content_length
-            chunk_size = 64 * 1024
-            while remaining > 0:
-                chunk = await f.read(min(chunk_size, remaining))
-                if not chunk:
-                    break
-                remaining -= len(chunk)
-                yield chunk
-
-    status_code = 206 if range_header else 200
-    return StreamingResponse(file_streamer(), status_code=status_code, headers=headers)
+    return media_file_response(recording_path, "video/webm")
 
 
 app.mount("/audio", StaticFiles(directory="podcasts/audio"), name="audio")
@@ -12,6 +12,7 @@ class TaskType(str, Enum):
     faiss_indexer = "faiss_indexer"
     social_x_scraper = "social_x_scraper"
     social_fb_scraper = "social_fb_scraper"
+    raw_content_maintenance = "raw_content_maintenance"
 
 
 TASK_TYPES = {
@@ -51,6 +52,11 @@ TASK_TYPES = {
         "command": "python -m processors.fb_scraper_processor",
         "description": "Scrapes Facebook.com profiles and analyzes sentiment",
     },
+    "raw_content_maintenance": {
+        "name": "Raw HTML Maintenance",
+        "command": "python -m processors.raw_content_processor",
+        "description": "Compresses stored article HTML and purges it once articles are analyzed",
+    },
 }
 
 
@@ -101,6 +107,8 @@ class TaskExecution(BaseModel):
     status: str
     error_message: Optional[str] = None
     output: Optional[str] = None
+    cpu_time: Optional[float] = None
+    peak_rss_kb: Optional[int] = None
 
 
 class PaginatedTaskExecutions(BaseModel):
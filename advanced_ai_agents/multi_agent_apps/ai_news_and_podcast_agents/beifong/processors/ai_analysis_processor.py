@@ -2,31 +2,56 @@ import json
 import time
 import random
 import argparse
-from bs4 import BeautifulSoup
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import ProcessPoolExecutor
 from openai import OpenAI
 from db.config import get_tracking_db_path
-from db.articles import get_unprocessed_articles, update_article_status
+from db.articles import get_unprocessed_articles, reset_stuck_articles, update_article_status
+from db.analysis_batches import create_analysis_batch_table, get_open_analysis_batches, store_analysis_batch, update_analysis_batch_status
 from utils.load_api_keys import load_api_key
+from db.extracted_text import create_extracted_text_table, get_extracted_texts, store_extracted_texts
+from utils.text_extraction import EXTRACTOR_VERSION, extract_for_prompt
+from utils.token_bucket import TokenBucket
+from utils.stage_queue import publish_stage_items
 
 WEB_PAGE_ANALYSE_MODEL = "gpt-4o"
+ANALYSIS_MAX_INPUT_TOKENS = 8000
+ANALYSIS_MAX_OUTPUT_TOKENS = 1500
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
 MODEL_INSTRUCTION = "You are a helpful assistant that analyzes articles and extracts structured information."
 
 
-def extract_clean_text(raw_html, max_tokens=8000):
-    soup = BeautifulSoup(raw_html, "html.parser")
-    for element in soup(["script", "style", "nav", "header", "footer", "aside"]):
-        element.decompose()
-    text = soup.get_text(separator="\n", strip=True)
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    text = "\n".join(lines)
-    approx_tokens = len(text) / 4
-    if approx_tokens > max_tokens:
-        text = text[: max_tokens * 4]
+def extract_clean_text(raw_html, max_tokens=ANALYSIS_MAX_INPUT_TOKENS):
+    text, _ = extract_for_prompt(raw_html, max_tokens)
     return text
 
 
-def process_article_with_ai(client, article, max_tokens=8000):
-    clean_text = extract_clean_text(article["raw_content"], max_tokens)
+def attach_clean_texts(tracking_db_path, articles, executor=None, max_tokens=ANALYSIS_MAX_INPUT_TOKENS):
+    if not articles:
+        return articles
+    texts = get_extracted_texts(tracking_db_path, [article["id"] for article in articles], EXTRACTOR_VERSION, max_tokens)
+    missing = [article for article in articles if article["id"] not in texts]
+    if missing:
+        raw_htmls = [article.get("raw_content") or "" for article in missing]
+        if executor is not None:
+            extracted = list(executor.map(extract_for_prompt, raw_htmls, [max_tokens] * len(missing), chunksize=4))
+        else:
+            extracted = [extract_for_prompt(raw_html, max_tokens) for raw_html in raw_htmls]
+        rows = [(article["id"], text, token_count) for article, (text, token_count) in zip(missing, extracted)]
+        store_extracted_texts(tracking_db_path, rows, EXTRACTOR_VERSION, max_tokens)
+        texts.update({article_id: (text, token_count) for article_id, text, token_count in rows})
+    for article in articles:
+        article["clean_text"], article["clean_text_tokens"] = texts[article["id"]]
+        article.pop("raw_content", None)
+    return articles
+
+
+def build_analysis_messages(article, max_tokens=ANALYSIS_MAX_INPUT_TOKENS):
+    if "clean_text" in article:
+        clean_text = article["clean_text"]
+    else:
+        clean_text = extract_clean_text(article["raw_content"], max_tokens)
     metadata = article.get("metadata", {})
     title = article["title"]
     url = article["url"]
@@ -36,50 +61,71 @@ def process_article_with_ai(client, article, max_tokens=8000):
             description = metadata["description"]
         elif "og" in metadata and "description" in metadata["og"]:
             description = metadata["og"]["description"]
+    return [
+        {
+            "role": "system",
+            "content": MODEL_INSTRUCTION,
+        },
+        {
+            "role": "user",
+            "content": f"""
+                        Analyze this article and provide a structured output with three components:
+
+                        1. A list of 3-5 relevant categories for this article
+                        2. A concise 2-3 sentence summary of the article
+                        3. The extracted main article content, removing any navigation, ads, or irrelevant elements
+
+                        Article Title: {title}
+                        Article URL: {url}
+                        Description: {description}
+
+                        Article Text:
+                        {clean_text}
+
+                        Provide your response as a JSON object with these keys:
+                        - categories: an array of 3-5 relevant categories (as strings)
+                        - summary: a 2-3 sentence summary of the article
+                        - content: the cleaned main article content
+                        """,
+        },
+    ]
+
+
+def build_analysis_request(messages):
+    return {
+        "model": WEB_PAGE_ANALYSE_MODEL,
+        "response_format": {"type": "json_object"},
+        "messages": messages,
+        "temperature": 0.3,
+        "max_tokens": ANALYSIS_MAX_OUTPUT_TOKENS,
+    }
+
+
+def parse_analysis_response(content):
+    response_json = json.loads(content)
+    categories = response_json.get("categories", [])
+    if isinstance(categories, str):
+        categories = [cat.strip() for cat in categories.split(",") if cat.strip()]
+    return {
+        "categories": categories,
+        "summary": response_json.get("summary", ""),
+        "content": response_json.get("content", ""),
+    }
+
+
+def estimate_request_tokens(messages):
+    return sum(len(message["content"]) for message in messages) // 4 + ANALYSIS_MAX_OUTPUT_TOKENS
+
+
+def process_article_with_ai(client, article, max_tokens=ANALYSIS_MAX_INPUT_TOKENS, request_bucket=None, token_bucket=None):
+    messages = build_analysis_messages(article, max_tokens)
     try:
-        response = client.chat.completions.create(
-            model=WEB_PAGE_ANALYSE_MODEL,
-            response_format={"type": "json_object"},
-            messages=[
-                {
-                    "role": "system",
-                    "content": MODEL_INSTRUCTION,
-                },
-                {
-                    "role": "user",
-                    "content": f"""
-                                Analyze this article and provide a structured output with three components:
-
-                                1. A list of 3-5 relevant categories for this article
-                                2. A concise 2-3 sentence summary of the article
-                                3. The extracted main article content, removing any navigation, ads, or irrelevant elements
-
-                                Article Title: {title}
-                                Article URL: {url}
-                                Description: {description}
-
-                                Article Text:
-                                {clean_text}
-
-                                Provide your response as a JSON object with these keys:
-                                - categories: an array of 3-5 relevant categories (as strings)
-                                - summary: a 2-3 sentence summary of the article
-                                - content: the cleaned main article content
-                                """,
-                },
-            ],
-            temperature=0.3,
-            max_tokens=1500,
-        )
-        response_json = json.loads(response.choices[0].message.content)
-        categories = response_json.get("categories", [])
-        if isinstance(categories, str):
-            categories = [cat.strip() for cat in categories.split(",") if cat.strip()]
-        results = {
-            "categories": categories,
-            "summary": response_json.get("summary", ""),
-            "content": response_json.get("content", ""),
-        }
+        if request_bucket is not None:
+            request_bucket.acquire(1)
+        if token_bucket is not None:
+            token_bucket.acquire(estimate_request_tokens(messages))
+        response = client.chat.completions.create(**build_analysis_request(messages))
+        results = parse_analysis_response(response.choices[0].message.content)
         return results, True, None
     except Exception as e:
         error_message = str(e)
@@ -87,13 +133,26 @@ def process_article_with_ai(client, article, max_tokens=8000):
         return None, False, error_message
 
 
+def report_result(article, results, success, error_message, stats):
+    article_id = article["id"]
+    if success:
+        categories_display = ", ".join(results["categories"])
+        print(f"Successfully processed article ID {article_id}")
+        print(f"Categories: {categories_display}")
+        print(f"Summary: {results['summary'][:100]}..." if len(results["summary"]) > 100 else f"Summary: {results['summary']}")
+        stats["success_count"] += 1
+    else:
+        print(f"Failed to process article ID {article_id}: {error_message}")
+        stats["failed_count"] += 1
+
+
 def analyze_articles(tracking_db_path=None, openai_api_key=None, batch_size=5, delay_range=(1, 3)):
     if tracking_db_path is None:
         tracking_db_path = get_tracking_db_path()
     if openai_api_key is None:
         raise ValueError("OpenAI API key is required")
     client = OpenAI(api_key=openai_api_key)
-    articles = get_unprocessed_articles(tracking_db_path, limit=batch_size)
+    articles = attach_clean_texts(tracking_db_path, get_unprocessed_articles(tracking_db_path, limit=batch_size))
     stats = {"total_articles": len(articles), "success_count": 0, "failed_count": 0}
     for i, article in enumerate(articles):
         article_id = article["id"]
@@ -102,15 +161,9 @@ def analyze_articles(tracking_db_path=None, openai_api_key=None, batch_size=5, d
         print(f"[{i + 1}/{len(articles)}] Processing article: {title} (Attempt {attempt})")
         results, success, error_message = process_article_with_ai(client, article)
         update_article_status(tracking_db_path, article_id, results, success, error_message)
+        report_result(article, results, success, error_message, stats)
         if success:
-            categories_display = ", ".join(results["categories"])
-            print(f"Successfully processed article ID {article_id}")
-            print(f"Categories: {categories_display}")
-            print(f"Summary: {results['summary'][:100]}..." if len(results["summary"]) > 100 else f"Summary: {results['summary']}")
-            stats["success_count"] += 1
-        else:
-            print(f"Failed to process article ID {article_id}: {error_message}")
-            stats["failed_count"] += 1
+            publish_stage_items("embedding", [article_id])
 
         if i < len(articles) - 1:
             delay = random.uniform(delay_range[0], delay_range[1])
@@ -123,6 +176,8 @@ def print_stats(stats):
     print(f"Total articles processed: {stats['total_articles']}")
     print(f"Successfully analyzed: {stats['success_count']}")
     print(f"Failed: {stats['failed_count']}")
+    if "pending_batches" in stats:
+        print(f"Batches still running: {stats['pending_batches']}")
 
 
 def analyze_in_batches(
@@ -156,21 +211,173 @@ def analyze_in_batches(
     return total_stats
 
 
+def analyze_articles_concurrently(
+    tracking_db_path=None,
+    openai_api_key=None,
+    batch_size=50,
+    total_batches=20,
+    max_in_flight=8,
+    requests_per_minute=500,
+    tokens_per_minute=150000,
+    extract_workers=None,
+):
+    if tracking_db_path is None:
+        tracking_db_path = get_tracking_db_path()
+    if openai_api_key is None:
+        raise ValueError("OpenAI API key is required")
+    client = OpenAI(api_key=openai_api_key)
+    request_bucket = TokenBucket(requests_per_minute)
+    token_bucket = TokenBucket(tokens_per_minute)
+    reset_stuck_articles(tracking_db_path)
+    stats = {"total_articles": 0, "success_count": 0, "failed_count": 0}
+    in_flight = {}
+    analyzed_ids = []
+    batches_taken = 0
+    exhausted = False
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool, ProcessPoolExecutor(max_workers=extract_workers) as extract_pool:
+        while True:
+            if not exhausted and batches_taken < total_batches and len(in_flight) < max_in_flight:
+                articles = get_unprocessed_articles(tracking_db_path, limit=batch_size, reset_stuck=False)
+                attach_clean_texts(tracking_db_path, articles, extract_pool)
+                batches_taken += 1
+                exhausted = not articles
+                stats["total_articles"] += len(articles)
+                for article in articles:
+                    future = pool.submit(process_article_with_ai, client, article, ANALYSIS_MAX_INPUT_TOKENS, request_bucket, token_bucket)
+                    in_flight[future] = article
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                article = in_flight.pop(future)
+                results, success, error_message = future.result()
+                update_article_status(tracking_db_path, article["id"], results, success, error_message)
+                report_result(article, results, success, error_message, stats)
+                if success:
+                    analyzed_ids.append(article["id"])
+            publish_stage_items("embedding", analyzed_ids)
+            analyzed_ids.clear()
+    return stats
+
+
+def submit_analysis_batch(tracking_db_path=None, openai_api_key=None, limit=1000):
+    if tracking_db_path is None:
+        tracking_db_path = get_tracking_db_path()
+    if openai_api_key is None:
+        raise ValueError("OpenAI API key is required")
+    client = OpenAI(api_key=openai_api_key)
+    articles = get_unprocessed_articles(tracking_db_path, limit=limit)
+    if not articles:
+        return None
+    with ProcessPoolExecutor() as extract_pool:
+        attach_clean_texts(tracking_db_path, articles, extract_pool)
+    lines = []
+    for article in articles:
+        request = {
+            "custom_id": f"article-{article['id']}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": build_analysis_request(build_analysis_messages(article)),
+        }
+        lines.append(json.dumps(request))
+    try:
+        input_file = client.files.create(file=("analysis_batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+        batch = client.batches.create(input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window=BATCH_COMPLETION_WINDOW)
+    except Exception as e:
+        print(f"Error submitting analysis batch: {str(e)}")
+        reset_stuck_articles(tracking_db_path)
+        return None
+    article_ids = [article["id"] for article in articles]
+    store_analysis_batch(tracking_db_path, batch.id, article_ids, batch.status)
+    print(f"Submitted analysis batch {batch.id} with {len(article_ids)} articles")
+    return batch.id
+
+
+def read_batch_file(client, file_id):
+    if not file_id:
+        return []
+    content = client.files.content(file_id).text
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def collect_analysis_batches(tracking_db_path=None, openai_api_key=None):
+    if tracking_db_path is None:
+        tracking_db_path = get_tracking_db_path()
+    if openai_api_key is None:
+        raise ValueError("OpenAI API key is required")
+    client = OpenAI(api_key=openai_api_key)
+    stats = {"total_articles": 0, "success_count": 0, "failed_count": 0, "pending_batches": 0}
+    for open_batch in get_open_analysis_batches(tracking_db_path):
+        batch_id = open_batch["batch_id"]
+        try:
+            batch = client.batches.retrieve(batch_id)
+        except Exception as e:
+            print(f"Error retrieving analysis batch {batch_id}: {str(e)}")
+            stats["pending_batches"] += 1
+            continue
+        if batch.status not in BATCH_TERMINAL_STATUSES:
+            update_analysis_batch_status(tracking_db_path, batch_id, batch.status)
+            stats["pending_batches"] += 1
+            print(f"Analysis batch {batch_id} is {batch.status}")
+            continue
+        articles_by_id = {article_id: {"id": article_id} for article_id in open_batch["article_ids"]}
+        analyzed_ids = []
+        for line in read_batch_file(client, batch.output_file_id) + read_batch_file(client, batch.error_file_id):
+            article_id = int(line["custom_id"].split("-", 1)[1])
+            article = articles_by_id.pop(article_id, None)
+            if article is None:
+                continue
+            response = line.get("response") or {}
+            if response.get("status_code") == 200:
+                try:
+                    results = parse_analysis_response(response["body"]["choices"][0]["message"]["content"])
+                    results_tuple = (results, True, None)
+                except Exception as e:
+                    results_tuple = (None, False, f"Invalid batch response: {str(e)}")
+            else:
+                error = line.get("error") or response.get("body", {}).get("error") or {}
+                results_tuple = (None, False, error.get("message", f"Batch request failed with status {response.get('status_code')}"))
+            update_article_status(tracking_db_path, article_id, *results_tuple)
+            report_result(article, *results_tuple, stats)
+            stats["total_articles"] += 1
+            if results_tuple[1]:
+                analyzed_ids.append(article_id)
+        for article_id, article in articles_by_id.items():
+            error_message = f"Analysis batch {batch.status} without a result"
+            update_article_status(tracking_db_path, article_id, None, False, error_message)
+            report_result(article, None, False, error_message, stats)
+            stats["total_articles"] += 1
+        update_analysis_batch_status(tracking_db_path, batch_id, batch.status, completed=True)
+        publish_stage_items("embedding", analyzed_ids)
+    return stats
+
+
 def parse_arguments():
     parser = argparse.ArgumentParser(description="Process articles with AI analysis")
     parser.add_argument("--api_key", help="OpenAI API Key (overrides environment variables)")
+    parser.add_argument(
+        "--mode",
+        choices=["concurrent", "sequential", "batch"],
+        default="concurrent",
+        help="concurrent analyzes with bounded parallelism, batch collects finished and submits new provider batch jobs",
+    )
     parser.add_argument(
         "--batch_size",
         type=int,
-        default=10,
-        help="Number of articles to process in each batch",
+        default=None,
+        help="Number of articles to process in each batch (default 50 concurrent, 10 sequential)",
     )
     parser.add_argument(
         "--total_batches",
         type=int,
-        default=1,
-        help="Total number of batches to process",
+        default=None,
+        help="Total number of batches to process (default 20 concurrent, 1 sequential)",
     )
+    parser.add_argument("--max_in_flight", type=int, default=8, help="Maximum concurrent analysis requests")
+    parser.add_argument("--requests_per_minute", type=int, default=500, help="Request rate limit for the analysis model")
+    parser.add_argument("--tokens_per_minute", type=int, default=150000, help="Token rate limit for the analysis model")
+    parser.add_argument("--extract_workers", type=int, default=None, help="Processes used for HTML text extraction (default: CPU count)")
+    parser.add_argument("--batch_limit", type=int, default=1000, help="Maximum articles per provider batch job in batch mode")
     return parser.parse_args()
 
 
@@ -180,9 +387,26 @@ if __name__ == "__main__":
     if not api_key:
         print("Error: No OpenAI API key provided. Please provide via --api_key or set OPENAI_API_KEY in .env file")
         exit(1)
-    stats = analyze_in_batches(
-        openai_api_key=api_key,
-        batch_size=args.batch_size,
-        total_batches=args.total_batches,
-    )
+    tracking_db_path = get_tracking_db_path()
+    create_extracted_text_table(tracking_db_path)
+    if args.mode == "batch":
+        create_analysis_batch_table(tracking_db_path)
+        stats = collect_analysis_batches(tracking_db_path=tracking_db_path, openai_api_key=api_key)
+        submit_analysis_batch(tracking_db_path=tracking_db_path, openai_api_key=api_key, limit=args.batch_limit)
+    elif args.mode == "concurrent":
+        stats = analyze_articles_concurrently(
+            openai_api_key=api_key,
+            batch_size=args.batch_size or 50,
+            total_batches=args.total_batches or 20,
+            max_in_flight=args.max_in_flight,
+            requests_per_minute=args.requests_per_minute,
+            tokens_per_minute=args.tokens_per_minute,
+            extract_workers=args.extract_workers,
+        )
+    else:
+        stats = analyze_in_batches(
+            openai_api_key=api_key,
+            batch_size=args.batch_size or 10,
+            total_batches=args.total_batches or 1,
+        )
     print_stats(stats)
@@ -1,13 +1,30 @@
+import re
 import time
 import argparse
 import random
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
+import tiktoken
 from openai import OpenAI
 from db.config import get_tracking_db_path
 from db.connection import db_connection, execute_query
+from db.embedding_cache import (
+    content_hash,
+    create_embedding_cache_table,
+    get_cached_embedding,
+    get_cached_embeddings,
+    store_cached_embedding,
+    store_cached_embeddings,
+)
 from utils.load_api_keys import load_api_key
+from utils.stage_queue import publish_stage_items
 
 EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_MAX_INPUT_TOKENS = 8191
+REQUEST_TOKEN_BUDGET = 100_000
+REQUEST_MAX_INPUTS = 256
 
 def create_embedding_table(tracking_db_path):
     with db_connection(tracking_db_path) as conn:
@@ -41,6 +58,29 @@ def create_embedding_table(tracking_db_path):
             print("Article embeddings table created successfully.")
         else:
             print("Article embeddings table already exists.")
+        create_article_embedding_unique_index(conn)
+    create_embedding_cache_table(tracking_db_path)
+
+
+def create_article_embedding_unique_index(conn):
+    """One embedding per article; duplicates from earlier runs are dropped first, keeping an indexed row."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_article_embeddings_article_unique'"
+    ).fetchone()
+    if exists:
+        return
+    cursor = conn.execute("""
+    DELETE FROM article_embeddings WHERE id NOT IN (
+        SELECT id FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY article_id ORDER BY in_faiss_index DESC, id) AS position
+            FROM article_embeddings
+        ) WHERE position = 1
+    )
+    """)
+    if cursor.rowcount:
+        print(f"Removed {cursor.rowcount} duplicate article embeddings")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_article_embeddings_article_unique ON article_embeddings(article_id)")
+    conn.commit()
 
 
 def get_articles_without_embeddings(tracking_db_path, limit=20):
@@ -104,18 +144,19 @@ def prepare_article_text(article):
     return full_text
 
 
-def store_embedding(tracking_db_path, article_id, embedding, model):
-    from datetime import datetime
+def store_embedding(tracking_db_path, article_id, embedding, model, text=None):
     import sqlite3
     embedding_blob = np.array(embedding, dtype=np.float32).tobytes()
     query = """
-    INSERT INTO article_embeddings 
+    INSERT OR IGNORE INTO article_embeddings 
     (article_id, embedding, embedding_model, created_at, in_faiss_index)
     VALUES (?, ?, ?, ?, 0)
     """
     params = (article_id, embedding_blob, model, datetime.now().isoformat())
     try:
         execute_query(tracking_db_path, query, params)
+        if text is not None:
+            store_cached_embedding(tracking_db_path, text, embedding, model)
         return True
     except sqlite3.IntegrityError:
         print(f"Warning: Embedding already exists for article {article_id}")
@@ -144,12 +185,18 @@ def process_articles_for_embedding(tracking_db_path=None, openai_api_key=None, b
         try:
             print(f"[{i + 1}/{len(articles)}] Generating embedding for article {article_id}: {article['title']}")
             text = prepare_article_text(article)
-            embedding, model = generate_embedding(client, text)
+            embedding, model = get_cached_embedding(tracking_db_path, text, EMBEDDING_MODEL), EMBEDDING_MODEL
+            cache_hit = embedding is not None
+            if cache_hit:
+                print(f"Reusing cached embedding for article {article_id}")
+            else:
+                embedding, model = generate_embedding(client, text)
             if embedding:
-                success = store_embedding(tracking_db_path, article_id, embedding, model)
+                success = store_embedding(tracking_db_path, article_id, embedding, model, text=None if cache_hit else text)
                 if success:
                     print(f"Successfully stored embedding for article {article_id}")
                     stats["success_count"] += 1
+                    publish_stage_items("faiss", [article_id])
                 else:
                     print(f"Failed to store embedding for article {article_id}")
                     stats["failed_count"] += 1
@@ -159,17 +206,206 @@ def process_articles_for_embedding(tracking_db_path=None, openai_api_key=None, b
         except Exception as e:
             print(f"Error processing article {article_id}: {str(e)}")
             stats["failed_count"] += 1
-        if i < len(articles) - 1:
+            cache_hit = False
+        if i < len(articles) - 1 and not cache_hit:
             delay = random.uniform(delay_range[0], delay_range[1])
             time.sleep(delay)
     return stats
 
 
+_encoding = None
+
+
+def get_encoding():
+    global _encoding
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
+
+
+def truncate_to_tokens(text, max_tokens=EMBEDDING_MAX_INPUT_TOKENS):
+    tokens = get_encoding().encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text, len(tokens)
+    return get_encoding().decode(tokens[:max_tokens]), max_tokens
+
+
+def pack_requests(items, token_budget=REQUEST_TOKEN_BUDGET, max_inputs=REQUEST_MAX_INPUTS):
+    requests = []
+    current = []
+    current_tokens = 0
+    for item in items:
+        if current and (current_tokens + item["tokens"] > token_budget or len(current) >= max_inputs):
+            requests.append(current)
+            current = []
+            current_tokens = 0
+        current.append(item)
+        current_tokens += item["tokens"]
+    if current:
+        requests.append(current)
+    return requests
+
+
+def parse_reset_duration(value):
+    if not value:
+        return 0.0
+    total = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|s|m|h)", value):
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total
+
+
+class HeaderRateLimiter:
+    """Throttles requests using the x-ratelimit-* headers of previous responses."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._remaining_requests = None
+        self._remaining_tokens = None
+        self._requests_reset_at = 0.0
+        self._tokens_reset_at = 0.0
+
+    def acquire(self, tokens):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = 0.0
+                if self._remaining_requests is not None and self._remaining_requests < 1 and now < self._requests_reset_at:
+                    wait = max(wait, self._requests_reset_at - now)
+                if self._remaining_tokens is not None and self._remaining_tokens < tokens and now < self._tokens_reset_at:
+                    wait = max(wait, self._tokens_reset_at - now)
+                if wait <= 0:
+                    if self._remaining_requests is not None:
+                        self._remaining_requests -= 1
+                    if self._remaining_tokens is not None:
+                        self._remaining_tokens -= tokens
+                    return
+            time.sleep(wait)
+
+    def update(self, headers):
+        with self._lock:
+            now = time.monotonic()
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_requests is not None:
+                self._remaining_requests = int(remaining_requests)
+                self._requests_reset_at = now + parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+            if remaining_tokens is not None:
+                self._remaining_tokens = int(remaining_tokens)
+                self._tokens_reset_at = now + parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+
+
+def generate_embeddings_batch(client, texts, rate_limiter, tokens, model=EMBEDDING_MODEL):
+    rate_limiter.acquire(tokens)
+    raw_response = client.embeddings.with_raw_response.create(input=texts, model=model)
+    rate_limiter.update(raw_response.headers)
+    response = raw_response.parse()
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+def store_embeddings_batch(tracking_db_path, rows, model):
+    """Store one embedding per article, skipping articles that already have one; returns the stored article ids."""
+    if not rows:
+        return []
+    created_at = datetime.now().isoformat()
+    query = """
+    INSERT OR IGNORE INTO article_embeddings
+    (article_id, embedding, embedding_model, created_at, in_faiss_index)
+    VALUES (?, ?, ?, ?, 0)
+    """
+    stored_ids = []
+    with db_connection(tracking_db_path) as conn:
+        cursor = conn.cursor()
+        for article_id, embedding in rows:
+            try:
+                cursor.execute(query, (article_id, np.array(embedding, dtype=np.float32).tobytes(), model, created_at))
+            except Exception as e:
+                print(f"Error storing embedding for article {article_id}: {str(e)}")
+                continue
+            if cursor.rowcount:
+                stored_ids.append(article_id)
+        conn.commit()
+    return stored_ids
+
+
+def process_articles_for_embedding_batched(
+    tracking_db_path=None,
+    openai_api_key=None,
+    batch_size=1000,
+    max_concurrency=4,
+    token_budget=REQUEST_TOKEN_BUDGET,
+    model=EMBEDDING_MODEL,
+):
+    if tracking_db_path is None:
+        tracking_db_path = get_tracking_db_path()
+    if openai_api_key is None:
+        raise ValueError("OpenAI API key is required")
+    create_embedding_table(tracking_db_path)
+    client = OpenAI(api_key=openai_api_key, max_retries=5)
+    articles = get_articles_without_embeddings(tracking_db_path, limit=batch_size)
+    if not articles:
+        print("No articles found that need embeddings")
+        return {"total_articles": 0, "success_count": 0, "failed_count": 0}
+    mark_articles_as_processing(tracking_db_path, [article["id"] for article in articles])
+    items = []
+    for article in articles:
+        text = prepare_article_text(article)
+        items.append({"article_id": article["id"], "text": text, "hash": content_hash(text)})
+    cached = get_cached_embeddings(tracking_db_path, [item["hash"] for item in items], model)
+    pending = {}
+    for item in items:
+        if item["hash"] not in cached and item["hash"] not in pending:
+            item["text"], item["tokens"] = truncate_to_tokens(item["text"])
+            pending[item["hash"]] = item
+    requests = pack_requests(list(pending.values()), token_budget=token_budget)
+    print(f"{len(items) - len(pending)} of {len(items)} articles served from the embedding cache")
+    print(f"Embedding {len(pending)} unique texts in {len(requests)} requests with up to {max_concurrency} in flight")
+    rate_limiter = HeaderRateLimiter()
+    stats = {"total_articles": len(articles), "success_count": 0, "failed_count": 0, "cache_hits": len(items) - len(pending)}
+    generated = []
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        futures = {
+            executor.submit(
+                generate_embeddings_batch,
+                client,
+                [item["text"] for item in request],
+                rate_limiter,
+                sum(item["tokens"] for item in request),
+                model,
+            ): request
+            for request in requests
+        }
+        for future in as_completed(futures):
+            request = futures[future]
+            try:
+                embeddings = future.result()
+                generated.extend((item["hash"], embedding) for item, embedding in zip(request, embeddings))
+            except Exception as e:
+                print(f"Error generating embeddings for {len(request)} texts: {str(e)}")
+    cached.update(generated)
+    rows = [(item["article_id"], cached[item["hash"]]) for item in items if item["hash"] in cached]
+    try:
+        store_cached_embeddings(tracking_db_path, generated, model)
+    except Exception as e:
+        print(f"Error caching embeddings: {str(e)}")
+    try:
+        stored_ids = store_embeddings_batch(tracking_db_path, rows, model)
+    except Exception as e:
+        print(f"Error storing embeddings: {str(e)}")
+        stored_ids = []
+    stats["success_count"] = len(stored_ids)
+    stats["failed_count"] = len(items) - len(stored_ids)
+    publish_stage_items("faiss", stored_ids)
+    return stats
+
+
 def print_stats(stats):
     print("\nEmbedding Generation Statistics:")
     print(f"Total articles processed: {stats['total_articles']}")
     print(f"Successfully embedded: {stats['success_count']}")
     print(f"Failed: {stats['failed_count']}")
+    if "cache_hits" in stats:
+        print(f"Served from embedding cache: {stats['cache_hits']}")
 
 
 def parse_arguments():
@@ -178,8 +414,20 @@ def parse_arguments():
     parser.add_argument(
         "--batch_size",
         type=int,
-        default=20,
-        help="Number of articles to process in each batch",
+        default=None,
+        help="Number of articles to process in each batch (default: 1000 batched, 20 sequential)",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["batched", "sequential"],
+        default="batched",
+        help="batched packs articles into concurrent multi-input requests; sequential sends one request per article",
+    )
+    parser.add_argument(
+        "--max_concurrency",
+        type=int,
+        default=4,
+        help="Maximum embedding requests in flight in batched mode",
     )
     return parser.parse_args()
 
@@ -221,9 +469,16 @@ if __name__ == "__main__":
     if not api_key:
         print("Error: No OpenAI API key provided. Please provide via --api_key or set OPENAI_API_KEY in .env file")
         exit(1)
-    stats = process_in_batches(
-        openai_api_key=api_key,
-        batch_size=args.batch_size,
-        total_batches=3,
-    )
+    if args.mode == "batched":
+        stats = process_articles_for_embedding_batched(
+            openai_api_key=api_key,
+            batch_size=args.batch_size or 1000,
+            max_concurrency=args.max_concurrency,
+        )
+    else:
+        stats = process_in_batches(
+            openai_api_key=api_key,
+            batch_size=args.batch_size or 20,
+            total_batches=3,
+        )
     print_stats(stats)
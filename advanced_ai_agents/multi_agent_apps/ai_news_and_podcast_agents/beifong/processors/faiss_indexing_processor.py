@@ -1,13 +1,57 @@
 import os
+import json
 import time
 import argparse
+import threading
 import numpy as np
 import faiss
 from db.config import get_tracking_db_path, get_faiss_db_path
 from db.connection import db_connection, execute_query
+from utils.faiss_index import ResidentFaissIndex, get_delta_index_path, index_write_lock, is_id_mapped
 
 
-def initialize_faiss_index(dimension=1536, index_path=None, index_type="hnsw", n_list=100):
+MIN_POINTS_PER_CENTROID = 39
+PQ_MIN_TRAINING_POINTS = 256
+IMBALANCE_THRESHOLD = 3.0
+DRIFT_THRESHOLD = 1.5
+GROWTH_THRESHOLD = 4.0
+
+
+def choose_n_list(corpus_size):
+    n_list = int(4 * np.sqrt(max(corpus_size, 1)))
+    return max(1, min(n_list, corpus_size // MIN_POINTS_PER_CENTROID))
+
+
+def sample_training_vectors(tracking_db_path, dimension, sample_size=50000):
+    rows = execute_query(
+        tracking_db_path,
+        "SELECT embedding FROM article_embeddings ORDER BY RANDOM() LIMIT ?",
+        (sample_size,),
+        fetch=True,
+    )
+    vectors = [np.frombuffer(row["embedding"], dtype=np.float32) for row in rows]
+    vectors = [vector for vector in vectors if vector.shape[0] == dimension]
+    if not vectors:
+        return np.zeros((0, dimension), dtype=np.float32)
+    return np.vstack(vectors).astype(np.float32)
+
+
+def train_ivf_index(index, dimension, n_list, train_vectors=None):
+    min_points = n_list * MIN_POINTS_PER_CENTROID
+    if isinstance(index, faiss.IndexIVFPQ):
+        min_points = max(min_points, PQ_MIN_TRAINING_POINTS)
+    if train_vectors is not None and len(train_vectors) >= min_points:
+        print(f"Training IVF index on {len(train_vectors)} stored embeddings with n_list={n_list}...")
+    else:
+        print("Not enough stored embeddings to train on, training IVF index with random vectors...")
+        train_size = max(10000, n_list * 10)
+        train_vectors = np.random.random((train_size, dimension)).astype(np.float32)
+    index.train(train_vectors)
+    index.nprobe = max(1, min(10, n_list // 10))
+    return index
+
+
+def initialize_faiss_index(dimension=1536, index_path=None, index_type="hnsw", n_list=100, train_vectors=None):
     if index_path and os.path.exists(index_path):
         print(f"Loading existing FAISS index from {index_path}")
         try:
@@ -17,30 +61,21 @@ def initialize_faiss_index(dimension=1536, index_path=None, index_type="hnsw", n
         except Exception as e:
             print(f"Error loading FAISS index: {str(e)}")
             print("Creating a new index instead")
+    if n_list is None:
+        n_list = choose_n_list(len(train_vectors) if train_vectors is not None else 0)
     print(f"Creating new FAISS index with dimension {dimension}, type: {index_type}")
     if index_type == "flat":
         return faiss.IndexFlatL2(dimension)
-
     elif index_type == "ivfflat":
         quantizer = faiss.IndexFlatL2(dimension)
         index = faiss.IndexIVFFlat(quantizer, dimension, n_list)
-        print("Training IVF index with random vectors...")
-        train_size = max(10000, n_list * 10)
-        train_vectors = np.random.random((train_size, dimension)).astype(np.float32)
-        index.train(train_vectors)
-        index.nprobe = min(10, n_list // 10)
-        return index
+        return train_ivf_index(index, dimension, n_list, train_vectors)
     elif index_type == "ivfpq":
         quantizer = faiss.IndexFlatL2(dimension)
         m = 16
         bits = 8
         index = faiss.IndexIVFPQ(quantizer, dimension, n_list, m, bits)
-        print("Training IVF-PQ index with random vectors...")
-        train_size = max(10000, n_list * 10)
-        train_vectors = np.random.random((train_size, dimension)).astype(np.float32)
-        index.train(train_vectors)
-        index.nprobe = min(10, n_list // 10)
-        return index
+        return train_ivf_index(index, dimension, n_list, train_vectors)
     elif index_type == "hnsw":
         m = 32
         ef_construction = 100
@@ -52,12 +87,7 @@ def initialize_faiss_index(dimension=1536, index_path=None, index_type="hnsw", n
         print(f"Unknown index type '{index_type}', falling back to IVF Flat")
         quantizer = faiss.IndexFlatL2(dimension)
         index = faiss.IndexIVFFlat(quantizer, dimension, n_list)
-        print("Training IVF index with random vectors...")
-        train_size = max(10000, n_list * 10)
-        train_vectors = np.random.random((train_size, dimension)).astype(np.float32)
-        index.train(train_vectors)
-        index.nprobe = min(10, n_list // 10)
-        return index
+        return train_ivf_index(index, dimension, n_list, train_vectors)
 
 
 def save_faiss_index(index, index_path):
@@ -78,7 +108,10 @@ def save_id_mapping(id_map, mapping_path):
     try:
         mapping_dir = os.path.dirname(mapping_path)
         os.makedirs(mapping_dir, exist_ok=True)
-        np.save(mapping_path, np.array(id_map))
+        temp_path = f"{mapping_path}.tmp"
+        with open(temp_path, "wb") as f:
+            np.save(f, np.array(id_map, dtype=np.int64))
+        os.replace(temp_path, mapping_path)
         print(f"ID mapping saved to {mapping_path}")
         return True
     except Exception as e:
@@ -152,9 +185,12 @@ def add_embeddings_to_index(embeddings_data, faiss_index, id_map):
         return 0, []
     try:
         embeddings_array = np.vstack(embeddings).astype(np.float32)
-        faiss_index.add(embeddings_array)
-        for article_id in article_ids:
-            id_map.append(article_id)
+        if is_id_mapped(faiss_index):
+            faiss_index.add_with_ids(embeddings_array, np.array(article_ids, dtype=np.int64))
+        else:
+            faiss_index.add(embeddings_array)
+            for article_id in article_ids:
+                id_map.append(article_id)
         print(f"Added {len(embeddings)} embeddings to FAISS index")
         return len(embeddings), embedding_ids
     except Exception as e:
@@ -207,7 +243,12 @@ def process_embeddings_for_indexing(
         }
     embedding_dimension = len(np.frombuffer(sample["embedding"], dtype=np.float32))
     print(f"Detected embedding dimension: {embedding_dimension}")
-    faiss_index = initialize_faiss_index(dimension=embedding_dimension, index_path=index_path, index_type=index_type, n_list=n_list)
+    train_vectors = None
+    if index_type in ("ivfflat", "ivfpq") and not os.path.exists(index_path):
+        train_vectors = sample_training_vectors(tracking_db_path, embedding_dimension)
+    faiss_index = initialize_faiss_index(
+        dimension=embedding_dimension, index_path=index_path, index_type=index_type, n_list=n_list, train_vectors=train_vectors
+    )
     embeddings_data = get_embeddings_not_in_index(tracking_db_path, limit=batch_size)
     if not embeddings_data:
         print("No new embeddings to add to the index")
@@ -215,7 +256,9 @@ def process_embeddings_for_indexing(
     added_count, embedding_ids = add_embeddings_to_index(embeddings_data, faiss_index, id_map)
     if added_count > 0:
         save_faiss_index(faiss_index, index_path)
-        save_id_mapping(id_map, mapping_path)
+        # an ID-mapped index carries its article ids; a mapping file would mark it as legacy
+        if not is_id_mapped(faiss_index):
+            save_id_mapping(id_map, mapping_path)
         marked_count = mark_embeddings_as_indexed(tracking_db_path, embedding_ids)
         print(f"Marked {marked_count} embeddings as indexed in the database")
     stats = {
@@ -229,6 +272,348 @@ def process_embeddings_for_indexing(
     return stats
 
 
+def create_delta_index(dimension):
+    return faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+
+
+def load_delta_index(delta_path, dimension):
+    if os.path.exists(delta_path):
+        try:
+            delta_index = faiss.read_index(delta_path)
+            if delta_index.d == dimension and is_id_mapped(delta_index):
+                return delta_index
+            print(f"Ignoring incompatible delta index at {delta_path}")
+        except Exception as e:
+            print(f"Error loading delta index: {str(e)}")
+    return create_delta_index(dimension)
+
+
+def get_delta_vectors(delta_index):
+    if delta_index.ntotal == 0:
+        return np.zeros((0, delta_index.d), dtype=np.float32), np.zeros(0, dtype=np.int64)
+    vectors = delta_index.index.reconstruct_n(0, delta_index.ntotal)
+    ids = faiss.vector_to_array(delta_index.id_map).astype(np.int64)
+    return vectors, ids
+
+
+def prepare_embeddings_with_ids(embeddings_data, dimension):
+    embeddings = []
+    article_ids = []
+    embedding_ids = []
+    for data in embeddings_data:
+        try:
+            embedding = np.frombuffer(data["embedding"], dtype=np.float32)
+            if embedding.shape[0] != dimension:
+                print(f"Embedding dimension mismatch: expected {dimension}, got {embedding.shape[0]}")
+                continue
+            embeddings.append(embedding)
+            article_ids.append(data["article_id"])
+            embedding_ids.append(data["id"])
+        except Exception as e:
+            print(f"Error processing embedding {data['id']}: {str(e)}")
+    if not embeddings:
+        return None, None, []
+    return np.vstack(embeddings).astype(np.float32), np.array(article_ids, dtype=np.int64), embedding_ids
+
+
+def iter_indexed_embeddings(tracking_db_path, chunk_size=5000):
+    last_id = 0
+    while True:
+        rows = execute_query(
+            tracking_db_path,
+            """
+            SELECT id, article_id, embedding
+            FROM article_embeddings
+            WHERE id > ? AND in_faiss_index = 1
+            ORDER BY id
+            LIMIT ?
+            """,
+            (last_id, chunk_size),
+            fetch=True,
+        )
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        yield rows
+
+
+def get_indexed_embedding_ids(tracking_db_path):
+    rows = execute_query(tracking_db_path, "SELECT id FROM article_embeddings WHERE in_faiss_index = 1", fetch=True)
+    return {row["id"] for row in rows}
+
+
+def get_embeddings_by_ids(tracking_db_path, embedding_ids, chunk_size=500):
+    embedding_ids = sorted(embedding_ids)
+    for start in range(0, len(embedding_ids), chunk_size):
+        chunk = embedding_ids[start : start + chunk_size]
+        placeholders = ",".join(["?"] * len(chunk))
+        yield execute_query(
+            tracking_db_path,
+            f"SELECT id, article_id, embedding FROM article_embeddings WHERE id IN ({placeholders})",
+            tuple(chunk),
+            fetch=True,
+        )
+
+
+def get_training_info_path(index_path):
+    base, _ = os.path.splitext(index_path)
+    return f"{base}.train.json"
+
+
+def load_training_info(index_path):
+    info_path = get_training_info_path(index_path)
+    if not os.path.exists(info_path):
+        return None
+    try:
+        with open(info_path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading training info: {str(e)}")
+        return None
+
+
+def save_training_info(index_path, info):
+    info_path = get_training_info_path(index_path)
+    temp_path = f"{info_path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(info, f, indent=2)
+    os.replace(temp_path, info_path)
+
+
+def get_ivf(faiss_index):
+    try:
+        return faiss.extract_index_ivf(faiss_index)
+    except RuntimeError:
+        return None
+
+
+def mean_quantization_error(ivf_index, vectors):
+    if ivf_index is None or len(vectors) == 0:
+        return None
+    distances, _ = ivf_index.quantizer.search(vectors, 1)
+    return float(np.mean(distances))
+
+
+def rebuild_id_mapped_index(tracking_db_path, index_path, dimension, index_type="hnsw", n_list=None, mapping_path=None):
+    print("Rebuilding ID-mapped FAISS index from stored embeddings...")
+    train_vectors = None
+    if index_type in ("ivfflat", "ivfpq"):
+        train_vectors = sample_training_vectors(tracking_db_path, dimension)
+    base_index = faiss.IndexIDMap2(
+        initialize_faiss_index(dimension=dimension, index_type=index_type, n_list=n_list, train_vectors=train_vectors)
+    )
+    scanned_ids = set()
+    for rows in iter_indexed_embeddings(tracking_db_path):
+        scanned_ids.update(row["id"] for row in rows)
+        vectors, ids, _ = prepare_embeddings_with_ids(rows, dimension)
+        if vectors is not None:
+            base_index.add_with_ids(vectors, ids)
+    with index_write_lock(index_path):
+        # rows marked while we scanned live in the delta or were compacted into the old base; marking
+        # happens under this lock, so catching up on them here loses nothing when both are replaced
+        late_ids = get_indexed_embedding_ids(tracking_db_path) - scanned_ids
+        for rows in get_embeddings_by_ids(tracking_db_path, late_ids):
+            vectors, ids, _ = prepare_embeddings_with_ids(rows, dimension)
+            if vectors is not None:
+                base_index.add_with_ids(vectors, ids)
+        if late_ids:
+            print(f"Added {len(late_ids)} embeddings indexed during the rebuild")
+        if not save_faiss_index(base_index, index_path):
+            raise RuntimeError(f"Could not save rebuilt FAISS index to {index_path}")
+        for stale_path in (get_delta_index_path(index_path), mapping_path):
+            if stale_path and os.path.exists(stale_path):
+                os.remove(stale_path)
+    ivf_index = get_ivf(base_index)
+    if ivf_index is not None:
+        save_training_info(
+            index_path,
+            {
+                "index_type": index_type,
+                "n_list": ivf_index.nlist,
+                "trained_on": len(train_vectors) if train_vectors is not None else 0,
+                "corpus_size": base_index.ntotal,
+                "quantization_error": mean_quantization_error(ivf_index, train_vectors),
+                "trained_at": time.time(),
+            },
+        )
+    print(f"Rebuilt base index with {base_index.ntotal} vectors")
+    return base_index
+
+
+def check_index_health(tracking_db_path, index_path, base_index, recent_limit=1000):
+    ivf_index = get_ivf(base_index)
+    if ivf_index is None:
+        return None
+    info = load_training_info(index_path)
+    if info is None:
+        return "trained without stored embeddings"
+    imbalance = ivf_index.invlists.imbalance_factor()
+    print(f"IVF list imbalance factor: {imbalance:.2f}")
+    if imbalance > IMBALANCE_THRESHOLD:
+        return f"inverted list imbalance {imbalance:.2f}"
+    if info.get("corpus_size") and ivf_index.ntotal > GROWTH_THRESHOLD * info["corpus_size"]:
+        return f"corpus grew from {info['corpus_size']} to {ivf_index.ntotal} vectors"
+    rows = execute_query(
+        tracking_db_path,
+        "SELECT embedding FROM article_embeddings ORDER BY id DESC LIMIT ?",
+        (recent_limit,),
+        fetch=True,
+    )
+    recent_vectors, _, _ = prepare_embeddings_with_ids([{"id": 0, "article_id": 0, **row} for row in rows], ivf_index.d)
+    recent_error = mean_quantization_error(ivf_index, recent_vectors) if recent_vectors is not None else None
+    baseline_error = info.get("quantization_error")
+    if recent_error and baseline_error and recent_error > DRIFT_THRESHOLD * baseline_error:
+        return f"embedding drift (quantization error {recent_error:.4f} vs {baseline_error:.4f} at training)"
+    return None
+
+
+def start_background_rebuild(tracking_db_path, index_path, dimension, index_type, mapping_path=None):
+    def run_rebuild():
+        try:
+            rebuild_id_mapped_index(tracking_db_path, index_path, dimension, index_type=index_type, n_list=None, mapping_path=mapping_path)
+        except Exception as e:
+            print(f"Background FAISS rebuild failed: {str(e)}")
+
+    thread = threading.Thread(target=run_rebuild, name="faiss-rebuild")
+    thread.start()
+    return thread
+
+
+def evaluate_recall(tracking_db_path, index_path, mapping_path=None, k=10, n_queries=100, probe_values=None):
+    resident = ResidentFaissIndex(index_path, mapping_path)
+    if not resident.is_available():
+        return None
+    faiss_index, _, _ = resident.get()
+    flat_index = faiss.IndexIDMap2(faiss.IndexFlatL2(faiss_index.d))
+    for rows in iter_indexed_embeddings(tracking_db_path):
+        vectors, ids, _ = prepare_embeddings_with_ids(rows, faiss_index.d)
+        if vectors is not None:
+            flat_index.add_with_ids(vectors, ids)
+    if flat_index.ntotal == 0:
+        return None
+    all_vectors = flat_index.index.reconstruct_n(0, flat_index.ntotal)
+    sample = np.random.default_rng().choice(flat_index.ntotal, size=min(n_queries, flat_index.ntotal), replace=False)
+    queries = all_vectors[sample]
+    _, truth = flat_index.search(queries, k)
+    inner_index = faiss.downcast_index(faiss_index.index) if is_id_mapped(faiss_index) else faiss_index
+    if get_ivf(inner_index) is not None:
+        param_name, probe_values = "nprobe", probe_values or [1, 4, 16, 64]
+    elif hasattr(inner_index, "hnsw"):
+        param_name, probe_values = "ef", probe_values or [max(k, 16), 32, 64, 128]
+    else:
+        param_name, probe_values = None, [None]
+    recall = {}
+    for value in probe_values:
+        search_params = {param_name: value} if param_name else None
+        hits = 0
+        for query, expected in zip(queries, truth):
+            found = {article_id for article_id, _ in resident.search(query[None, :], k, search_params)}
+            hits += len(found & {int(label) for label in expected if label >= 0})
+        label = f"{param_name}={value}" if param_name else "exact"
+        recall[label] = hits / (len(queries) * k)
+    return {"k": k, "queries": len(queries), "recall": recall}
+
+
+def load_base_index(tracking_db_path, index_path, dimension, index_type="hnsw", n_list=None, mapping_path=None):
+    try:
+        base_index = faiss.read_index(index_path)
+        if is_id_mapped(base_index) and base_index.d == dimension:
+            return base_index, False
+        print("Existing FAISS index is not ID-mapped, migrating it")
+    except Exception as e:
+        print(f"Error loading FAISS index: {str(e)}")
+    return rebuild_id_mapped_index(tracking_db_path, index_path, dimension, index_type, n_list, mapping_path), True
+
+
+def compact_delta_index(base_index, delta_index, index_path, delta_path):
+    vectors, ids = get_delta_vectors(delta_index)
+    if len(ids) > 0:
+        base_index.add_with_ids(vectors, ids)
+    if not save_faiss_index(base_index, index_path):
+        return False
+    if os.path.exists(delta_path):
+        os.remove(delta_path)
+    print(f"Compacted {len(ids)} delta vectors into base index ({base_index.ntotal} vectors)")
+    return True
+
+
+def should_compact(delta_index, delta_path, compact_threshold, compact_interval_hours):
+    if delta_index.ntotal == 0:
+        return False
+    if delta_index.ntotal >= compact_threshold:
+        return True
+    if os.path.exists(delta_path):
+        age_hours = (time.time() - os.path.getmtime(delta_path)) / 3600
+        return age_hours >= compact_interval_hours
+    return False
+
+
+def process_incrementally(
+    tracking_db_path=None,
+    index_path=None,
+    mapping_path=None,
+    batch_size=100,
+    total_batches=5,
+    index_type="hnsw",
+    n_list=None,
+    compact_threshold=5000,
+    compact_interval_hours=24,
+):
+    if tracking_db_path is None:
+        tracking_db_path = get_tracking_db_path()
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    delta_path = get_delta_index_path(index_path)
+    stats = {"processed": 0, "added": 0, "errors": 0, "index_type": index_type, "mode": "incremental", "compacted": False}
+    table_query = "SELECT name FROM sqlite_master WHERE type='table' AND name='article_embeddings'"
+    if not execute_query(tracking_db_path, table_query, fetch=True, fetch_one=True):
+        print("article_embeddings table does not exist. Please run embedding_processor first.")
+        stats["status"] = "table_missing"
+        return stats
+    base_index = None
+    delta_index = None
+    for i in range(total_batches):
+        print(f"\nProcessing batch {i + 1}/{total_batches}")
+        # fetch, append and mark under the lock so concurrent runs and rebuilds never lose or repeat vectors
+        with index_write_lock(index_path):
+            embeddings_data = get_embeddings_not_in_index(tracking_db_path, limit=batch_size)
+            if not embeddings_data:
+                print("No more embeddings to process")
+                break
+            dimension = delta_index.d if delta_index is not None else len(np.frombuffer(embeddings_data[0]["embedding"], dtype=np.float32))
+            is_legacy = mapping_path is not None and os.path.exists(mapping_path)
+            if not os.path.exists(index_path) or is_legacy:
+                base_index = rebuild_id_mapped_index(tracking_db_path, index_path, dimension, index_type, n_list, mapping_path)
+            delta_index = load_delta_index(delta_path, dimension)
+            vectors, ids, embedding_ids = prepare_embeddings_with_ids(embeddings_data, delta_index.d)
+            stats["processed"] += len(embeddings_data)
+            stats["errors"] += len(embeddings_data) - len(embedding_ids)
+            if vectors is None:
+                continue
+            delta_index.add_with_ids(vectors, ids)
+            if save_faiss_index(delta_index, delta_path):
+                marked_count = mark_embeddings_as_indexed(tracking_db_path, embedding_ids)
+                stats["added"] += len(embedding_ids)
+                print(f"Appended {len(embedding_ids)} embeddings to delta index, marked {marked_count} as indexed")
+    if delta_index is not None:
+        with index_write_lock(index_path):
+            delta_index = load_delta_index(delta_path, delta_index.d)
+            if should_compact(delta_index, delta_path, compact_threshold, compact_interval_hours):
+                base_index, rebuilt = load_base_index(tracking_db_path, index_path, delta_index.d, index_type, n_list, mapping_path)
+                stats["compacted"] = rebuilt or compact_delta_index(base_index, delta_index, index_path, delta_path)
+        if stats["compacted"]:
+            delta_index = create_delta_index(delta_index.d)
+            rebuild_reason = check_index_health(tracking_db_path, index_path, base_index)
+            if rebuild_reason:
+                print(f"Starting background FAISS rebuild: {rebuild_reason}")
+                start_background_rebuild(tracking_db_path, index_path, base_index.d, index_type, mapping_path)
+                stats["rebuild_reason"] = rebuild_reason
+    stats["delta_vectors"] = delta_index.ntotal if delta_index is not None else 0
+    if base_index is not None:
+        stats["total_vectors"] = base_index.ntotal + stats["delta_vectors"]
+    stats["status"] = "success" if stats["processed"] else "no_new_embeddings"
+    return stats
+
+
 def process_in_batches(
     tracking_db_path=None,
     index_path=None,
@@ -244,14 +629,15 @@ def process_in_batches(
     total_stats = {"processed": 0, "added": 0, "errors": 0, "index_type": index_type}
     for i in range(total_batches):
         print(f"\nProcessing batch {i + 1}/{total_batches}")
-        batch_stats = process_embeddings_for_indexing(
-            tracking_db_path=tracking_db_path,
-            index_path=index_path,
-            mapping_path=mapping_path,
-            batch_size=batch_size,
-            index_type=index_type,
-            n_list=n_list,
-        )
+        with index_write_lock(index_path):
+            batch_stats = process_embeddings_for_indexing(
+                tracking_db_path=tracking_db_path,
+                index_path=index_path,
+                mapping_path=mapping_path,
+                batch_size=batch_size,
+                index_type=index_type,
+                n_list=n_list,
+            )
         total_stats["processed"] += batch_stats["processed"]
         total_stats["added"] += batch_stats["added"]
         total_stats["errors"] += batch_stats["errors"]
@@ -273,6 +659,16 @@ def print_stats(stats):
     print(f"Errors: {stats['errors']}")
     if "total_vectors" in stats:
         print(f"Total vectors in index: {stats['total_vectors']}")
+    if stats.get("rebuild_reason"):
+        print(f"Background rebuild triggered: {stats['rebuild_reason']}")
+    if stats.get("evaluation"):
+        evaluation = stats["evaluation"]
+        print(f"Recall@{evaluation['k']} against flat baseline ({evaluation['queries']} queries):")
+        for setting, recall in evaluation["recall"].items():
+            print(f"  {setting}: {recall:.3f}")
+    if stats.get("mode") == "incremental":
+        print(f"Vectors pending in delta index: {stats.get('delta_vectors', 0)}")
+        print(f"Delta compacted into base index: {'yes' if stats.get('compacted') else 'no'}")
     if "index_type" in stats:
         print(f"Index type: {stats['index_type']}")
         if stats["index_type"] == "flat":
@@ -312,8 +708,8 @@ def parse_arguments():
     parser.add_argument(
         "--n_list",
         type=int,
-        default=100,
-        help="Number of clusters for IVF-based indexes",
+        default=None,
+        help="Number of clusters for IVF-based indexes (chosen from corpus size when omitted)",
     )
     parser.add_argument(
         "--total_batches",
@@ -321,6 +717,35 @@ def parse_arguments():
         default=5,
         help="Total number of batches to process",
     )
+    parser.add_argument(
+        "--mode",
+        choices=["incremental", "full"],
+        default="incremental",
+        help="incremental appends to a delta index keyed by article id; full rewrites the whole index every batch",
+    )
+    parser.add_argument(
+        "--compact_threshold",
+        type=int,
+        default=5000,
+        help="Merge the delta index into the base index once it holds this many vectors",
+    )
+    parser.add_argument(
+        "--compact_interval_hours",
+        type=float,
+        default=24,
+        help="Merge a non-empty delta index into the base index at least this often",
+    )
+    parser.add_argument(
+        "--eval_recall",
+        action="store_true",
+        help="Report recall@k of the index against an exact flat baseline",
+    )
+    parser.add_argument(
+        "--recall_k",
+        type=int,
+        default=10,
+        help="k used for the recall evaluation",
+    )
     return parser.parse_args()
 
 
@@ -329,11 +754,26 @@ if __name__ == "__main__":
     index_path, mapping_path = get_faiss_db_path()
     index_path = args.index_path or index_path
     mapping_path = args.mapping_path or mapping_path
-    stats = process_in_batches(
-        batch_size=args.batch_size,
-        index_path=index_path,
-        mapping_path=mapping_path,
-        total_batches=args.total_batches,
-        index_type=args.index_type,
-        n_list=args.n_list,
-    )
+    if args.mode == "incremental":
+        stats = process_incrementally(
+            batch_size=args.batch_size,
+            index_path=index_path,
+            mapping_path=mapping_path,
+            total_batches=args.total_batches,
+            index_type=args.index_type,
+            n_list=args.n_list,
+            compact_threshold=args.compact_threshold,
+            compact_interval_hours=args.compact_interval_hours,
+        )
+    else:
+        stats = process_in_batches(
+            batch_size=args.batch_size,
+            index_path=index_path,
+            mapping_path=mapping_path,
+            total_batches=args.total_batches,
+            index_type=args.index_type,
+            n_list=args.n_list,
+        )
+    if args.eval_recall:
+        stats["evaluation"] = evaluate_recall(get_tracking_db_path(), index_path, mapping_path, k=args.recall_k)
+    print_stats(stats)
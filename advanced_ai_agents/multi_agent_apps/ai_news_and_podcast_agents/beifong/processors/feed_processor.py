@@ -1,13 +1,19 @@
 import time
 import random
+import argparse
 from utils.rss_feed_parser import get_feed_data
+from utils.feed_fetcher import fetch_feeds_concurrently
+from utils.stage_queue import publish_stage_items
 from db.config import get_sources_db_path, get_tracking_db_path
+from db.connection import WriteBatch
 from db.feeds import (
     get_active_feeds,
     count_active_feeds,
     get_feed_tracking_info,
+    get_feed_tracking_infos,
     update_feed_tracking,
     store_feed_entries,
+    store_feed_entries_batched,
     update_tracking_info,
 )
 
@@ -31,6 +37,7 @@ def fetch_and_process_feeds(sources_db_path=None, tracking_db_path=None, delay_b
         if not feeds:
             break
         update_tracking_info(tracking_db_path, feeds)
+        updated_feeds = []
         for feed in feeds:
             feed_id = feed["id"]
             source_id = feed["source_id"]
@@ -59,6 +66,8 @@ def fetch_and_process_feeds(sources_db_path=None, tracking_db_path=None, delay_b
                     new_entries = store_feed_entries(tracking_db_path, feed_id, source_id, parsed_entries)
                     stats["new_entries"] += new_entries
                     print(f"Stored {new_entries} new entries from {feed_url}")
+                    if new_entries:
+                        updated_feeds.append(feed_id)
                 update_feed_tracking(
                     tracking_db_path,
                     feed_id,
@@ -71,6 +80,85 @@ def fetch_and_process_feeds(sources_db_path=None, tracking_db_path=None, delay_b
                 print(f"Error processing feed {feed_url}: {str(e)}")
                 stats["failed_feeds"] += 1
             time.sleep(random.uniform(1, delay_between_feeds))
+        publish_stage_items("crawl", updated_feeds)
+        offset += batch_size
+    return stats
+
+
+def fetch_and_process_feeds_concurrently(
+    sources_db_path=None,
+    tracking_db_path=None,
+    batch_size=1000,
+    max_connections=100,
+    per_host_limit=2,
+    timeout=20,
+):
+    if sources_db_path is None:
+        sources_db_path = get_sources_db_path()
+    if tracking_db_path is None:
+        tracking_db_path = get_tracking_db_path()
+    total_feeds = count_active_feeds(sources_db_path)
+    stats = {
+        "total_feeds": total_feeds,
+        "processed_feeds": 0,
+        "new_entries": 0,
+        "unchanged_feeds": 0,
+        "failed_feeds": 0,
+    }
+
+    updated_feeds = set()
+
+    def count_new_entries(feed_id):
+        def on_insert(rowcount):
+            stats["new_entries"] += rowcount
+            if rowcount:
+                updated_feeds.add(feed_id)
+
+        return on_insert
+
+    offset = 0
+    while offset < total_feeds:
+        feeds = get_active_feeds(sources_db_path, limit=batch_size, offset=offset)
+        if not feeds:
+            break
+        update_tracking_info(tracking_db_path, feeds)
+        tracking_by_feed = get_feed_tracking_infos(tracking_db_path, [feed["id"] for feed in feeds])
+        write_batch = WriteBatch(tracking_db_path, max_pending=5000)
+        results = fetch_feeds_concurrently(
+            feeds,
+            tracking_by_feed,
+            max_connections=max_connections,
+            per_host_limit=per_host_limit,
+            timeout=timeout,
+        )
+        for feed, feed_data, error in results:
+            feed_id = feed["id"]
+            feed_url = feed["feed_url"]
+            if error:
+                print(f"Error processing feed {feed_url}: {error}")
+                stats["failed_feeds"] += 1
+                continue
+            if not feed_data["is_rss_feed"]:
+                print(f"Feed {feed_url} is not a valid RSS feed")
+                stats["failed_feeds"] += 1
+                continue
+            if feed_data["status"] == 304:
+                stats["unchanged_feeds"] += 1
+                continue
+            tracking_info = tracking_by_feed.get(feed_id)
+            last_hash = tracking_info.get("entry_hash") if tracking_info else None
+            current_hash = feed_data["current_hash"]
+            if last_hash and current_hash == last_hash:
+                stats["unchanged_feeds"] += 1
+                continue
+            parsed_entries = feed_data["parsed_entries"]
+            if parsed_entries:
+                store_feed_entries_batched(write_batch, feed_id, feed["source_id"], parsed_entries, count_new_entries(feed_id))
+            update_feed_tracking(tracking_db_path, feed_id, feed_data["etag"], feed_data["modified"], current_hash, batch=write_batch)
+            stats["processed_feeds"] += 1
+        write_batch.flush()
+        publish_stage_items("crawl", sorted(updated_feeds))
+        updated_feeds.clear()
         offset += batch_size
     return stats
 
@@ -84,6 +172,33 @@ def print_stats(stats):
     print(f"New entries: {stats['new_entries']}")
 
 
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Fetch active RSS feeds and store new entries")
+    parser.add_argument(
+        "--mode",
+        choices=["concurrent", "sequential"],
+        default="concurrent",
+        help="concurrent fetches feeds with asyncio and per-host limits; sequential fetches one feed at a time",
+    )
+    parser.add_argument(
+        "--max_connections",
+        type=int,
+        default=100,
+        help="Maximum simultaneous connections in concurrent mode",
+    )
+    parser.add_argument(
+        "--per_host_limit",
+        type=int,
+        default=2,
+        help="Maximum simultaneous connections to a single host in concurrent mode",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    stats = fetch_and_process_feeds()
+    args = parse_arguments()
+    if args.mode == "concurrent":
+        stats = fetch_and_process_feeds_concurrently(max_connections=args.max_connections, per_host_limit=args.per_host_limit)
+    else:
+        stats = fetch_and_process_feeds()
     print_stats(stats)
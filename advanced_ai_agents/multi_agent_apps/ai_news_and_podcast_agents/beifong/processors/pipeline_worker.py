@@ -0,0 +1,133 @@
+import argparse
+import multiprocessing
+import threading
+import time
+from db.config import get_faiss_db_path, get_tracking_db_path
+from db.extracted_text import create_extracted_text_table
+from db.raw_content import create_raw_content_table
+from processors import ai_analysis_processor, embedding_processor, faiss_indexing_processor, feed_processor, url_processor
+from utils.load_api_keys import load_api_key
+from utils.stage_queue import PIPELINE_STAGES, PIPELINE_WORKER_ENABLED, enable_stage_publishing, get_stage_queue, wait_for_stage_items
+
+STAGE_SETTLE_SECONDS = {"crawl": 0, "analysis": 2, "embedding": 5, "faiss": 30}
+
+
+def build_stage_runners(tracking_db_path, api_key, args):
+    index_path, mapping_path = get_faiss_db_path()
+    return {
+        "crawl": (
+            lambda: url_processor.crawl_pending_entries_concurrently(
+                tracking_db_path=tracking_db_path,
+                batch_size=args.batch_size,
+                total_batches=args.total_batches,
+            ),
+            url_processor.print_stats,
+        ),
+        "analysis": (
+            lambda: ai_analysis_processor.analyze_articles_concurrently(
+                tracking_db_path=tracking_db_path,
+                openai_api_key=api_key,
+                batch_size=args.batch_size,
+                total_batches=args.total_batches,
+            ),
+            ai_analysis_processor.print_stats,
+        ),
+        "embedding": (
+            lambda: embedding_processor.process_articles_for_embedding_batched(
+                tracking_db_path=tracking_db_path,
+                openai_api_key=api_key,
+            ),
+            embedding_processor.print_stats,
+        ),
+        "faiss": (
+            lambda: faiss_indexing_processor.process_incrementally(
+                tracking_db_path=tracking_db_path,
+                index_path=index_path,
+                mapping_path=mapping_path,
+                batch_size=1000,
+                total_batches=args.total_batches,
+            ),
+            faiss_indexing_processor.print_stats,
+        ),
+    }
+
+
+def run_stage_loop(stage, run, print_stats, stop_event, sweep_interval):
+    reason = "startup sweep"
+    while not stop_event.is_set():
+        print(f"\n[{stage}] Running stage for {reason}")
+        started = time.monotonic()
+        try:
+            print_stats(run())
+        except Exception as e:
+            print(f"[{stage}] Stage failed: {str(e)}")
+        print(f"[{stage}] Finished in {time.monotonic() - started:.1f}s")
+        items = wait_for_stage_items(stage, timeout=sweep_interval, settle_seconds=STAGE_SETTLE_SECONDS[stage])
+        reason = f"{len(items)} upstream items" if items else "periodic sweep"
+
+
+def run_feed_loop(tracking_db_path, stop_event, feed_interval):
+    while not stop_event.is_set():
+        try:
+            feed_processor.print_stats(feed_processor.fetch_and_process_feeds_concurrently(tracking_db_path=tracking_db_path))
+        except Exception as e:
+            print(f"[feed] Stage failed: {str(e)}")
+        stop_event.wait(feed_interval)
+
+
+def run_pipeline(tracking_db_path=None, api_key=None, args=None):
+    if tracking_db_path is None:
+        tracking_db_path = get_tracking_db_path()
+    create_raw_content_table(tracking_db_path)
+    create_extracted_text_table(tracking_db_path)
+    if not PIPELINE_WORKER_ENABLED:
+        print("WARNING: PIPELINE_WORKER_ENABLED is not set, so the scheduler also runs these stages and both will claim the same articles")
+    enable_stage_publishing()
+    stop_event = threading.Event()
+    runners = build_stage_runners(tracking_db_path, api_key, args)
+    threads = []
+    for stage in PIPELINE_STAGES:
+        run, print_stats = runners[stage]
+        threads.append(threading.Thread(target=run_stage_loop, args=(stage, run, print_stats, stop_event, args.sweep_interval), name=f"pipeline-{stage}"))
+    if args.feed_interval > 0:
+        threads.append(threading.Thread(target=run_feed_loop, args=(tracking_db_path, stop_event, args.feed_interval), name="pipeline-feed"))
+    print(f"Pipeline worker started using {get_stage_queue(PIPELINE_STAGES[0]).backend} stage queues")
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Stopping pipeline worker...")
+        stop_event.set()
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Run the crawl, analysis, embedding and FAISS stages as soon as upstream work is queued")
+    parser.add_argument("--api_key", help="OpenAI API Key (overrides environment variables)")
+    parser.add_argument(
+        "--feed_interval",
+        type=int,
+        default=900,
+        help="Seconds between feed fetches in this worker, 0 leaves feed fetching to the scheduler",
+    )
+    parser.add_argument(
+        "--sweep_interval",
+        type=int,
+        default=600,
+        help="Seconds a stage waits for queued work before sweeping the database anyway",
+    )
+    parser.add_argument("--batch_size", type=int, default=50, help="Items taken from the database at a time by each stage")
+    parser.add_argument("--total_batches", type=int, default=20, help="Maximum number of batches per stage run")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    api_key = args.api_key or load_api_key()
+    if not api_key:
+        print("Error: No OpenAI API key provided. Please provide via --api_key or set OPENAI_API_KEY in .env file")
+        exit(1)
+    multiprocessing.set_start_method("forkserver")
+    run_pipeline(api_key=api_key, args=args)
@@ -12,6 +12,14 @@ from db.agent_config_v2 import AVAILABLE_LANGS
 from utils.tts_engine_selector import generate_podcast_audio
 from utils.load_api_keys import load_api_key
 from tools.session_state_manager import _save_podcast_to_database_sync
+from db.podcast_checkpoints import (
+    build_run_key,
+    clear_stage_checkpoints,
+    create_stage_checkpoint_table,
+    get_stage_checkpoints,
+    store_stage_checkpoint,
+)
+from utils.stage_dag import StageFailed, run_stage_dag, stage
 
 PODCAST_ASSETS_DIR = "podcasts"
 
@@ -33,42 +41,30 @@ def convert_script_to_audio_format(podcast_data: Dict[str, Any]) -> Dict[str, Li
     return {"entries": dict_entries}
 
 
-def generate_podcast_from_prompt_v2(
-    prompt: str,
-    openai_api_key: str,
-    tracking_db_path: Optional[str] = None,
-    podcasts_db_path: Optional[str] = None,
-    output_dir: str = PODCAST_ASSETS_DIR,
-    tts_engine: str = "kokoro",
-    language_code: str = "en",
-    podcast_script_prompt: Optional[str] = None,
-    image_prompt: Optional[str] = None,
-    debug: bool = False,
-) -> Dict[str, Any]:
-    if tracking_db_path is None:
-        tracking_db_path = get_tracking_db_path()
-    if podcasts_db_path is None:
-        podcasts_db_path = get_podcasts_db_path()
-    os.makedirs(output_dir, exist_ok=True)
-    images_dir = os.path.join(output_dir, "images")
-    os.makedirs(images_dir, exist_ok=True)
-    print(f"Starting enhanced podcast generation for prompt: {prompt}")
-    try:
+class DictPodcastScript:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+
+def build_podcast_stages(prompt, output_dir, tts_engine, language_code, image_prompt, debug):
+    def run_search(outputs):
         search_results = search_agent_run(prompt)
         if not search_results:
             print(f"WARNING: No search results found for prompt: {prompt}")
-            return {"error": "No search results found"}
+            raise StageFailed("No search results found")
         print(f"Found {len(search_results)} search results")
         if debug:
             print("Search results:", json.dumps(search_results[:2], indent=2))
-    except Exception as e:
-        print(f"ERROR: Search agent failed: {e}")
-        return {"error": f"Search agent failed: {str(e)}"}
-    try:
-        scraped_results = scrape_agent_run(prompt, search_results)
+        return search_results
+
+    def run_scrape(outputs):
+        scraped_results = scrape_agent_run(prompt, outputs["search"])
         if not scraped_results:
             print("WARNING: No content could be scraped")
-            return {"error": "No content could be scraped"}
+            raise StageFailed("No content could be scraped")
         confirmed_results = []
         for result in scraped_results:
             if result.get("full_text") and len(result["full_text"].strip()) > 100:
@@ -76,73 +72,111 @@ def generate_podcast_from_prompt_v2(
                 confirmed_results.append(result)
         if not confirmed_results:
             print("WARNING: No high-quality content available after scraping")
-            return {"error": "No high-quality content available"}
+            raise StageFailed("No high-quality content available")
         print(f"Successfully scraped {len(confirmed_results)} high-quality articles")
         if debug:
             print("Sample scraped content:", confirmed_results[0].get("full_text", "")[:200])
-    except Exception as e:
-        print(f"ERROR: Scrape agent failed: {e}")
-        return {"error": f"Scrape agent failed: {str(e)}"}
-    try:
+        return {"scraped_count": len(scraped_results), "confirmed_results": confirmed_results}
+
+    def run_script(outputs):
         language_name = get_language_name(language_code)
-        podcast_data = script_agent_run(query=prompt, search_results=confirmed_results, language_name=language_name)
+        podcast_data = script_agent_run(query=prompt, search_results=outputs["scrape"]["confirmed_results"], language_name=language_name)
         if not podcast_data or not isinstance(podcast_data, dict):
             print("ERROR: Failed to generate podcast script")
-            return {"error": "Failed to generate podcast script"}
+            raise StageFailed("Failed to generate podcast script")
         if not podcast_data.get("sections"):
             print("ERROR: Generated podcast script is missing required sections")
-            return {"error": "Invalid podcast script structure"}
+            raise StageFailed("Invalid podcast script structure")
         print(f"Generated script with {len(podcast_data['sections'])} sections")
         if debug:
             print("Script title:", podcast_data.get("title", "No title"))
-    except Exception as e:
-        print(f"ERROR: Script agent failed: {e}")
-        return {"error": f"Script agent failed: {str(e)}"}
-    banner_filenames = []
-    banner_url = None
-    try:
+        return podcast_data
+
+    def run_image(outputs):
         image_query = image_prompt if image_prompt else prompt
-        image_result = image_generation_agent_run(image_query, podcast_data)
+        image_result = image_generation_agent_run(image_query, outputs["script"])
         if image_result and image_result.get("banner_images"):
-            banner_filenames = image_result["banner_images"]
-            banner_url = image_result.get("banner_url")
-            print(f"Generated {len(banner_filenames)} banner images")
-        else:
-            print("WARNING: No images were generated")
-    except Exception as e:
-        print(f"ERROR: Image generation failed: {e}")
-    audio_filename = None
-    full_audio_path = None
-    try:
-        audio_format = convert_script_to_audio_format(podcast_data)
-        audio_filename = f"podcast_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
-        audio_path = os.path.join(output_dir, "audio", audio_filename)
-
-        class DictPodcastScript:
-            def __init__(self, entries):
-                self.entries = entries
-
-            def __iter__(self):
-                return iter(self.entries)
+            print(f"Generated {len(image_result['banner_images'])} banner images")
+            return {"banner_images": image_result["banner_images"], "banner_url": image_result.get("banner_url")}
+        print("WARNING: No images were generated")
+        return {"banner_images": [], "banner_url": None}
 
-        script_obj = DictPodcastScript(audio_format["entries"])
+    def run_audio(outputs):
+        audio_format = convert_script_to_audio_format(outputs["script"])
+        audio_filename = f"podcast_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
         full_audio_path = generate_podcast_audio(
-            script=script_obj,
-            output_path=audio_path,
+            script=DictPodcastScript(audio_format["entries"]),
+            output_path=os.path.join(output_dir, "audio", audio_filename),
             tts_engine=tts_engine,
             language_code=language_code,
         )
-        if full_audio_path:
-            print(f"Generated podcast audio: {full_audio_path}")
-        else:
+        if not full_audio_path:
             print("ERROR: Failed to generate audio")
-            audio_filename = None
-    except Exception as e:
-        print(f"ERROR: Error generating audio: {e}")
-        import traceback
+            raise StageFailed("Failed to generate audio")
+        print(f"Generated podcast audio: {full_audio_path}")
+        return full_audio_path
+
+    return [
+        stage("search", run_search, label="Search agent"),
+        stage("scrape", run_scrape, deps=["search"], label="Scrape agent"),
+        stage("script", run_script, deps=["scrape"], label="Script agent"),
+        stage("image", run_image, deps=["script"], label="Image generation", required=False),
+        stage("audio", run_audio, deps=["script"], label="Audio generation", required=False, is_valid=os.path.exists),
+    ]
 
-        traceback.print_exc()
-        audio_filename = None
+
+def generate_podcast_from_prompt_v2(
+    prompt: str,
+    openai_api_key: str,
+    tracking_db_path: Optional[str] = None,
+    podcasts_db_path: Optional[str] = None,
+    output_dir: str = PODCAST_ASSETS_DIR,
+    tts_engine: str = "kokoro",
+    language_code: str = "en",
+    podcast_script_prompt: Optional[str] = None,
+    image_prompt: Optional[str] = None,
+    debug: bool = False,
+    resume: bool = True,
+) -> Dict[str, Any]:
+    if tracking_db_path is None:
+        tracking_db_path = get_tracking_db_path()
+    if podcasts_db_path is None:
+        podcasts_db_path = get_podcasts_db_path()
+    os.makedirs(output_dir, exist_ok=True)
+    images_dir = os.path.join(output_dir, "images")
+    os.makedirs(images_dir, exist_ok=True)
+    print(f"Starting enhanced podcast generation for prompt: {prompt}")
+    create_stage_checkpoint_table(podcasts_db_path)
+    clear_stage_checkpoints(podcasts_db_path)
+    run_key = build_run_key(
+        prompt=prompt,
+        output_dir=output_dir,
+        tts_engine=tts_engine,
+        language_code=language_code,
+        podcast_script_prompt=podcast_script_prompt,
+        image_prompt=image_prompt,
+    )
+    checkpoints = get_stage_checkpoints(podcasts_db_path, run_key) if resume else {}
+    stages = build_podcast_stages(prompt, output_dir, tts_engine, language_code, image_prompt, debug)
+    outputs, failures, resumed = run_stage_dag(
+        stages,
+        checkpoints=checkpoints,
+        on_complete=lambda name, output: store_stage_checkpoint(podcasts_db_path, run_key, name, output),
+    )
+    if resumed:
+        print(f"Resumed from checkpoints: {', '.join(resumed)}")
+    required_failures = [failures[item["name"]] for item in stages if item["required"] and item["name"] in failures]
+    if required_failures:
+        return {"error": required_failures[0]}
+    search_results = outputs["search"]
+    scraped_count = outputs["scrape"]["scraped_count"]
+    confirmed_results = outputs["scrape"]["confirmed_results"]
+    podcast_data = outputs["script"]
+    image_result = outputs["image"] or {}
+    banner_filenames = image_result.get("banner_images", [])
+    banner_url = image_result.get("banner_url")
+    full_audio_path = outputs["audio"]
+    audio_filename = os.path.basename(full_audio_path) if full_audio_path else None
     try:
         session_state = {
             "generated_script": podcast_data,
@@ -156,6 +190,7 @@ def generate_podcast_from_prompt_v2(
         success, message, podcast_id = _save_podcast_to_database_sync(session_state)
         if success:
             print(f"Stored podcast data with ID: {podcast_id}")
+            clear_stage_checkpoints(podcasts_db_path, run_key)
         else:
             print(f"ERROR: Failed to save to database: {message}")
             podcast_id = 0
@@ -182,10 +217,11 @@ def generate_podcast_from_prompt_v2(
         "sources_count": len(confirmed_results),
         "processing_stats": {
             "search_results": len(search_results),
-            "scraped_results": len(scraped_results),
+            "scraped_results": scraped_count,
             "confirmed_results": len(confirmed_results),
             "images_generated": len(banner_filenames),
             "audio_generated": bool(audio_filename),
+            "resumed_stages": resumed,
         },
     }
 
@@ -0,0 +1,52 @@
+import argparse
+from db.config import get_tracking_db_path
+from db.raw_content import migrate_raw_content, purge_analyzed_raw_content, vacuum_database
+
+
+def maintain_raw_content(tracking_db_path=None, purge_after_days=7, batch_size=500, vacuum=False):
+    if tracking_db_path is None:
+        tracking_db_path = get_tracking_db_path()
+    migration = migrate_raw_content(tracking_db_path, batch_size=batch_size)
+    if migration["migrated"]:
+        print(f"Moved {migration['migrated']} raw HTML rows into compressed storage")
+    stats = {
+        "migrated": migration["migrated"],
+        "saved_bytes": migration["saved_bytes"],
+        "purged": 0,
+    }
+    if purge_after_days is not None and purge_after_days >= 0:
+        stats["purged"] = purge_analyzed_raw_content(tracking_db_path, older_than_days=purge_after_days)
+    if vacuum and (stats["migrated"] or stats["purged"]):
+        print("Vacuuming tracking database...")
+        vacuum_database(tracking_db_path)
+    return stats
+
+
+def print_stats(stats):
+    print("\nRaw Content Maintenance Statistics:")
+    print(f"Rows migrated to compressed storage: {stats['migrated']}")
+    print(f"Bytes saved by compression: {stats['saved_bytes']}")
+    print(f"Raw HTML and extracted text rows purged after analysis: {stats['purged']}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Compress and purge raw article HTML")
+    parser.add_argument(
+        "--purge_after_days",
+        type=int,
+        default=7,
+        help="Drop raw HTML and extracted text of successfully analyzed articles crawled more than this many days ago (-1 disables purging)",
+    )
+    parser.add_argument("--batch_size", type=int, default=500, help="Rows migrated per transaction")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the tracking database afterwards to reclaim disk space")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    stats = maintain_raw_content(
+        purge_after_days=args.purge_after_days,
+        batch_size=args.batch_size,
+        vacuum=args.vacuum,
+    )
+    print_stats(stats)
@@ -1,7 +1,13 @@
+import argparse
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from db.config import get_tracking_db_path
-from db.feeds import get_uncrawled_entries
-from db.articles import store_crawled_article, update_entry_status
-from utils.crawl_url import get_web_data
+from db.feeds import get_uncrawled_entries, reset_stuck_entries
+from db.articles import store_crawl_result, update_entry_status
+from db.connection import WriteBatch
+from db.raw_content import create_raw_content_table
+from utils.stage_queue import publish_stage_items
+from utils.crawl_url import DomainThrottle, fetch_html, get_http_session, get_web_data, parse_web_data
 
 
 def crawl_pending_entries(tracking_db_path=None, batch_size=20, delay_range=(1, 3), max_attempts=3):
@@ -14,34 +20,103 @@ def crawl_pending_entries(tracking_db_path=None, batch_size=20, delay_range=(1,
         "failed_count": 0,
         "skipped_count": 0,
     }
-    for entry in entries:
-        entry_id = entry["id"]
-        url = entry["link"]
-        if not url or url.strip() == "":
-            update_entry_status(tracking_db_path, entry_id, "skipped")
-            stats["skipped_count"] += 1
-            continue
-        print(f"Crawling URL: {url}")
-        try:
-            web_data = get_web_data(url)
-            if not web_data or not web_data["raw_html"]:
-                print(f"No content retrieved for {url}")
-                update_entry_status(tracking_db_path, entry_id, "failed")
-                stats["failed_count"] += 1
+    stored_ids = []
+    with WriteBatch(tracking_db_path) as batch:
+        for entry in entries:
+            entry_id = entry["id"]
+            url = entry["link"]
+            if not url or url.strip() == "":
+                update_entry_status(tracking_db_path, entry_id, "skipped", batch=batch)
+                stats["skipped_count"] += 1
                 continue
-            success = store_crawled_article(tracking_db_path, entry, web_data["raw_html"], web_data["metadata"])
-            if success:
-                update_entry_status(tracking_db_path, entry_id, "success")
-                stats["success_count"] += 1
-                print(f"Successfully crawled: {url}")
-            else:
-                update_entry_status(tracking_db_path, entry_id, "failed")
+            print(f"Crawling URL: {url}")
+            try:
+                web_data = get_web_data(url)
+                if not web_data or not web_data["raw_html"]:
+                    print(f"No content retrieved for {url}")
+                    update_entry_status(tracking_db_path, entry_id, "failed", batch=batch)
+                    stats["failed_count"] += 1
+                    continue
+                store_crawl_result(batch, entry, web_data["raw_html"], web_data["metadata"], stats, stored_ids)
+            except Exception as e:
+                print(f"Error crawling {url}: {str(e)}")
+                update_entry_status(tracking_db_path, entry_id, "failed", batch=batch)
                 stats["failed_count"] += 1
-                print(f"Failed to store: {url} (likely duplicate)")
-        except Exception as e:
-            print(f"Error crawling {url}: {str(e)}")
-            update_entry_status(tracking_db_path, entry_id, "failed")
-            stats["failed_count"] += 1
+    publish_stage_items("analysis", stored_ids)
+    return stats
+
+
+def crawl_pending_entries_concurrently(
+    tracking_db_path=None,
+    batch_size=50,
+    total_batches=50,
+    max_attempts=3,
+    fetch_workers=32,
+    parse_workers=None,
+    per_domain_limit=2,
+    min_domain_interval=1.0,
+):
+    if tracking_db_path is None:
+        tracking_db_path = get_tracking_db_path()
+    stats = {
+        "total_entries": 0,
+        "success_count": 0,
+        "failed_count": 0,
+        "skipped_count": 0,
+    }
+    reset_stuck_entries(tracking_db_path)
+    session = get_http_session(pool_maxsize=fetch_workers)
+    throttle = DomainThrottle(max_concurrent=per_domain_limit, min_interval=min_domain_interval)
+    in_flight = {}
+    batches_taken = 0
+    exhausted = False
+    batch = WriteBatch(tracking_db_path, max_pending=batch_size)
+    stored_ids = []
+
+    def flush_and_publish():
+        batch.flush()
+        publish_stage_items("analysis", stored_ids)
+        stored_ids.clear()
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, ProcessPoolExecutor(max_workers=parse_workers or os.cpu_count()) as parse_pool:
+        while True:
+            if not exhausted and batches_taken < total_batches and len(in_flight) < batch_size:
+                flush_and_publish()
+                entries = get_uncrawled_entries(tracking_db_path, limit=batch_size, max_attempts=max_attempts, reset_stuck=False)
+                batches_taken += 1
+                exhausted = not entries
+                stats["total_entries"] += len(entries)
+                for entry in entries:
+                    url = entry["link"]
+                    if not url or url.strip() == "":
+                        update_entry_status(tracking_db_path, entry["id"], "skipped", batch=batch)
+                        stats["skipped_count"] += 1
+                        continue
+                    future = fetch_pool.submit(throttle.run, url, fetch_html, url, session)
+                    in_flight[future] = ("fetch", entry)
+            if not in_flight:
+                break
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, entry = in_flight.pop(future)
+                url = entry["link"]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error crawling {url}: {str(e)}")
+                    update_entry_status(tracking_db_path, entry["id"], "failed", batch=batch)
+                    stats["failed_count"] += 1
+                    continue
+                if stage == "fetch":
+                    in_flight[parse_pool.submit(parse_web_data, result)] = ("parse", entry)
+                    continue
+                if not result or not result["raw_html"]:
+                    print(f"No content retrieved for {url}")
+                    update_entry_status(tracking_db_path, entry["id"], "failed", batch=batch)
+                    stats["failed_count"] += 1
+                else:
+                    store_crawl_result(batch, entry, result["raw_html"], result["metadata"], stats, stored_ids)
+        flush_and_publish()
     return stats
 
 
@@ -77,6 +152,33 @@ def crawl_in_batches(tracking_db_path=None, batch_size=20, total_batches=5, dela
     return total_stats
 
 
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Crawl pending feed entry URLs")
+    parser.add_argument(
+        "--mode",
+        choices=["concurrent", "sequential"],
+        default="concurrent",
+        help="concurrent streams entries through pooled fetch and parse workers; sequential crawls one URL at a time",
+    )
+    parser.add_argument("--batch_size", type=int, default=50, help="Entries taken from the queue at a time")
+    parser.add_argument("--total_batches", type=int, default=50, help="Maximum number of batches to take per run")
+    parser.add_argument("--fetch_workers", type=int, default=32, help="Concurrent HTTP fetches in concurrent mode")
+    parser.add_argument("--per_domain_limit", type=int, default=2, help="Concurrent requests allowed per domain")
+    parser.add_argument("--min_domain_interval", type=float, default=1.0, help="Minimum seconds between request starts per domain")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    stats = crawl_in_batches(batch_size=20, total_batches=50)
+    args = parse_arguments()
+    create_raw_content_table(get_tracking_db_path())
+    if args.mode == "concurrent":
+        stats = crawl_pending_entries_concurrently(
+            batch_size=args.batch_size,
+            total_batches=args.total_batches,
+            fetch_workers=args.fetch_workers,
+            per_domain_limit=args.per_domain_limit,
+            min_domain_interval=args.min_domain_interval,
+        )
+    else:
+        stats = crawl_in_batches(batch_size=20, total_batches=50)
     print_stats(stats)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, WebSocket
 from typing import Optional
 from pydantic import BaseModel
 from services.async_podcast_agent_service import podcast_agent_service
@@ -49,6 +49,18 @@ async def check_status(request: StatusRequest):
     return await podcast_agent_service.check_result_status(request)
 
 
+@router.get("/events/{session_id}")
+async def stream_events(session_id: str, task_id: Optional[str] = None):
+    """Stream stage transitions and the final result for a session as server-sent events"""
+    return await podcast_agent_service.stream_events(session_id, task_id)
+
+
+@router.websocket("/ws/{session_id}")
+async def session_events_socket(websocket: WebSocket, session_id: str, task_id: Optional[str] = None):
+    """Push stage transitions and the final result for a session over a WebSocket"""
+    await podcast_agent_service.forward_events(websocket, session_id, task_id)
+
+
 @router.get("/sessions")
 async def list_sessions(page: int = 1, per_page: int = 10):
     """List all saved podcast sessions with pagination"""
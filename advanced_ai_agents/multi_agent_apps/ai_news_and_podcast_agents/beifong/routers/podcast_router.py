@@ -5,6 +5,7 @@ import os
 from datetime import datetime
 from models.podcast_schemas import Podcast, PodcastDetail, PodcastCreate, PodcastUpdate, PaginatedPodcasts
 from services.podcast_service import podcast_service
+from utils.audio_encoding import audio_media_type
 
 router = APIRouter()
 
@@ -197,4 +198,4 @@ async def get_audio_file(filename: str = Path(..., description="The filename of
     audio_path = os.path.join("podcasts", "audio", filename)
     if not os.path.exists(audio_path):
         raise HTTPException(status_code=404, detail="Audio file not found")
-    return FileResponse(audio_path)
+    return FileResponse(audio_path, media_type=audio_media_type(audio_path))
@@ -1,7 +1,7 @@
 import os
 import time
 import signal
-import subprocess
+import argparse
 from datetime import datetime
 import traceback
 from concurrent.futures import ThreadPoolExecutor
@@ -15,10 +15,14 @@ from db.tasks import (
     update_task_last_run,
     update_task_execution,
 )
+from utils.stage_queue import PIPELINE_STAGE_MODULES, PIPELINE_WORKER_ENABLED
+from utils.task_runner import TaskWorkerPool, parse_module_command, run_command_subprocess
 
 running = True
 MAX_WORKERS = 5
 DEFAULT_TASK_TIMEOUT = 3600
+task_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+worker_pool = None
 
 
 def cleanup_stuck_tasks():
@@ -56,7 +60,7 @@ def cleanup_stuck_tasks():
         print(f"ERROR: {traceback.format_exc()}")
 
 
-def execute_task(task_id, command):
+def claim_execution(task_id):
     tasks_db_path = get_tasks_db_path()
     with db_connection(tasks_db_path) as conn:
         conn.execute("BEGIN EXCLUSIVE TRANSACTION")
@@ -74,7 +78,7 @@ def execute_task(task_id, command):
             if is_running:
                 print(f"WARNING: Task {task_id} is already running, skipping this execution")
                 conn.commit()
-                return
+                return None
             cursor.execute(
                 """
                 INSERT INTO task_executions 
@@ -87,63 +91,101 @@ def execute_task(task_id, command):
             conn.commit()
             if not execution_id:
                 print(f"ERROR: Failed to create execution record for task {task_id}")
-                return
+                return None
+            return execution_id
         except Exception as e:
             conn.rollback()
             print(f"ERROR: Transaction error for task {task_id}: {str(e)}")
-            return
+            return None
+
+
+def record_result(task_id, execution_id, result):
+    tasks_db_path = get_tasks_db_path()
+    if result["status"] == "success":
+        print(f"INFO: Task {task_id} completed successfully (cpu {result['cpu_time']:.1f}s, peak rss {result['peak_rss_kb']} KB)")
+    else:
+        print(f"ERROR: Task {task_id} failed: {result['error_message']}")
+    update_task_execution(
+        tasks_db_path,
+        execution_id,
+        result["status"],
+        result["error_message"],
+        result.get("output"),
+        cpu_time=result.get("cpu_time"),
+        peak_rss_kb=result.get("peak_rss_kb"),
+    )
+    timestamp = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    update_task_last_run(tasks_db_path, task_id, timestamp)
+
+
+def execute_task(task_id, command):
+    execution_id = claim_execution(task_id)
+    if not execution_id:
+        return
     print(f"INFO: Starting task {task_id}: {command}")
     try:
-        process = subprocess.Popen(
-            command,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
+        result = run_command_subprocess(command, DEFAULT_TASK_TIMEOUT)
+    except Exception as _:
+        print(f"ERROR: Error executing task {task_id}")
+        result = {"status": "failed", "error_message": traceback.format_exc()}
+    record_result(task_id, execution_id, result)
+
+
+def execute_task_in_pool(task_id, command):
+    execution_id = claim_execution(task_id)
+    if not execution_id:
+        return
+
+    def on_done(future):
         try:
-            stdout, stderr = process.communicate(timeout=DEFAULT_TASK_TIMEOUT)
-            if process.returncode == 0:
-                status = "success"
-                error_message = None
-                print(f"INFO: Task {task_id} completed successfully")
-            else:
-                status = "failed"
-                error_message = stderr if stderr else f"Process exited with code {process.returncode}"
-                print(f"ERROR: Task {task_id} failed: {error_message}")
-        except subprocess.TimeoutExpired:
-            process.kill()
-            stdout, stderr = process.communicate()
-            status = "failed"
-            error_message = f"Task timed out after {DEFAULT_TASK_TIMEOUT} seconds"
-            print(f"ERROR: Task {task_id} timed out")
-        output = f"STDOUT:\n{stdout}\n\nSTDERR:\n{stderr}" if stderr else stdout
-        update_task_execution(tasks_db_path, execution_id, status, error_message, output)
-        timestamp = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
-        update_task_last_run(tasks_db_path, task_id, timestamp)
-    except Exception as e:
-        print(f"ERROR: Error executing task {task_id}: {str(e)}")
-        error_message = traceback.format_exc()
-        update_task_execution(tasks_db_path, execution_id, "failed", error_message)
-        timestamp = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
-        update_task_last_run(tasks_db_path, task_id, timestamp)
+            result = future.result()
+        except Exception as e:
+            result = {"status": "failed", "error_message": f"Worker process failed or timed out: {str(e) or e.__class__.__name__}"}
+        try:
+            record_result(task_id, execution_id, result)
+        except Exception as e:
+            print(f"ERROR: Could not record result of task {task_id}: {str(e)}")
+
+    print(f"INFO: Starting task {task_id} in warm worker: {command}")
+    try:
+        worker_pool.submit(command).add_done_callback(on_done)
+    except Exception as _:
+        record_result(task_id, execution_id, {"status": "failed", "error_message": traceback.format_exc()})
+
+
+def is_pipeline_worker_stage(command):
+    if not PIPELINE_WORKER_ENABLED:
+        return False
+    parsed = parse_module_command(command)
+    return parsed is not None and parsed[0] in PIPELINE_STAGE_MODULES.values()
+
+
+def submit_task(task_id, command):
+    if worker_pool is not None and worker_pool.supports(command):
+        execute_task_in_pool(task_id, command)
+    else:
+        task_executor.submit(execute_task, task_id, command)
 
 
 def check_for_tasks():
     tasks_db_path = get_tasks_db_path()
     try:
+        if worker_pool is not None:
+            worker_pool.expire(DEFAULT_TASK_TIMEOUT)
         print("DEBUG: Checking for pending tasks...")
         pending_tasks = get_pending_tasks(tasks_db_path)
         if not pending_tasks:
             print("DEBUG: No pending tasks found")
             return
         print(f"INFO: Found {len(pending_tasks)} pending tasks")
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            for task in pending_tasks:
-                task_id = task["id"]
-                command = task["command"]
-                print(f"INFO: Scheduling task {task_id}: {task['name']} (Last run: {task['last_run']})")
-                executor.submit(execute_task, task_id, command)
+        for task in pending_tasks:
+            task_id = task["id"]
+            command = task["command"]
+            if is_pipeline_worker_stage(command):
+                print(f"DEBUG: Skipping task {task_id}: {task['name']}, its stage runs in the pipeline worker")
+                continue
+            print(f"INFO: Scheduling task {task_id}: {task['name']} (Last run: {task['last_run']})")
+            submit_task(task_id, command)
     except Exception as e:
         print(f"ERROR: Error in check_for_tasks: {str(e)}")
         print(f"ERROR: {traceback.format_exc()}")
@@ -168,8 +210,23 @@ def signal_handler(sig, frame):
     running = False
 
 
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Run the background task scheduler")
+    parser.add_argument(
+        "--runner",
+        choices=["pool", "subprocess"],
+        default="pool",
+        help="pool runs registered pipeline modules in warm worker processes; subprocess spawns a fresh interpreter per run",
+    )
+    parser.add_argument("--max_workers", type=int, default=MAX_WORKERS, help="Number of warm worker processes")
+    return parser.parse_args()
+
+
 def main():
-    global running
+    global running, worker_pool
+    args = parse_arguments()
+    if args.runner == "pool":
+        worker_pool = TaskWorkerPool(max_workers=args.max_workers)
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     print("INFO: Starting task scheduler")
@@ -186,6 +243,8 @@ def main():
         id="check_tasks",
         name="Check for pending tasks",
         replace_existing=True,
+        max_instances=1,
+        coalesce=True,
     )
     scheduler.start()
     print("INFO: Scheduler started, checking for tasks every minute")
@@ -198,6 +257,9 @@ def main():
         print("INFO: Scheduler interrupted")
     finally:
         scheduler.shutdown()
+        task_executor.shutdown(wait=False, cancel_futures=True)
+        if worker_pool is not None:
+            worker_pool.shutdown(wait=False)
         print("INFO: Scheduler shutdown complete")
 
 
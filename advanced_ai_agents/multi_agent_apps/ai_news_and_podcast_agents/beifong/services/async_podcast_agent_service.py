@@ -1,16 +1,19 @@
 import os
 import json
 import uuid
-from fastapi import status
-from fastapi.responses import JSONResponse
+from fastapi import WebSocket, WebSocketDisconnect, status
+from fastapi.responses import JSONResponse, StreamingResponse
 import aiosqlite
 import glob
 from redis.asyncio import ConnectionPool, Redis
 from db.config import get_agent_session_db_path
 from db.agent_config_v2 import PODCAST_DIR, PODCAST_AUIDO_DIR, PODCAST_IMG_DIR, PODCAST_RECORDINGS_DIR, AVAILABLE_LANGS
 from services.celery_tasks import agent_chat
+from services.celery_app import TASK_TIME_LIMIT_SEC
 from dotenv import load_dotenv
 from services.internal_session_service import SessionService
+from services.task_events import get_last_session_event, stream_session_events
+from utils.audio_encoding import remove_audio_renditions
 
 load_dotenv()
 
@@ -27,6 +30,8 @@ class PodcastAgentService:
         self.redis_db = int(os.environ.get("REDIS_DB", 0))
         self.redis_pool = ConnectionPool.from_url(f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db + 1}", max_connections=10)
         self.redis = Redis(connection_pool=self.redis_pool)
+        # every open event stream holds a subscribed connection, so they get their own unbounded pool
+        self.events_redis = Redis.from_url(f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db + 1}")
 
     async def get_active_task(self, session_id):
         try:
@@ -123,6 +128,9 @@ class PodcastAgentService:
 
             task_id = getattr(request, "task_id", None)
             if task_id:
+                last_event = await get_last_session_event(self.redis, request.session_id)
+                if last_event and last_event.get("task_id") == task_id and last_event.get("result"):
+                    return {**last_event["result"], "browser_recording_path": browser_recording_path}
                 task = agent_chat.AsyncResult(task_id)
                 if task.state == "PENDING" or task.state == "STARTED":
                     return {
@@ -173,6 +181,46 @@ class PodcastAgentService:
                 },
             )
 
+    async def _session_events(self, session_id, task_id=None):
+        recording_sent = False
+        async for event in stream_session_events(self.events_redis, session_id, task_id, max_wait=TASK_TIME_LIMIT_SEC + 60):
+            if not recording_sent:
+                browser_recording_path = self._browser_recording(session_id)
+                if browser_recording_path:
+                    recording_sent = True
+                    yield {"type": "recording", "session_id": session_id, "browser_recording_path": browser_recording_path}
+            yield event
+
+    async def stream_events(self, session_id, task_id=None):
+        async def event_source():
+            try:
+                async for event in self._session_events(session_id, task_id):
+                    if event is None:
+                        yield ": heartbeat\n\n"
+                    else:
+                        yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            except Exception as e:
+                print(f"Error streaming events for session {session_id}: {e}")
+                yield f"event: error\ndata: {json.dumps({'type': 'error', 'session_id': session_id, 'error': str(e)})}\n\n"
+
+        return StreamingResponse(
+            event_source(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def forward_events(self, websocket: WebSocket, session_id, task_id=None):
+        await websocket.accept()
+        try:
+            async for event in self._session_events(session_id, task_id):
+                await websocket.send_json(event if event is not None else {"type": "heartbeat", "session_id": session_id})
+            await websocket.close()
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            print(f"Error forwarding events for session {session_id}: {e}")
+            await websocket.close(code=1011)
+
     async def get_session_state(self, session_id):
         try:
             db_path = get_agent_session_db_path()
@@ -296,6 +344,7 @@ class PodcastAgentService:
                             if os.path.exists(audio_path):
                                 try:
                                     os.remove(audio_path)
+                                    remove_audio_renditions(audio_path)
                                     print(f"Deleted audio file: {audio_path}")
                                 except Exception as e:
                                     print(f"Error deleting audio file: {e}")
@@ -4,6 +4,7 @@ import os
 import time
 import json
 from dotenv import load_dotenv
+from services.task_events import publish_session_event
 
 
 load_dotenv()
@@ -14,6 +15,7 @@ REDIS_DB = int(os.environ.get("REDIS_DB", 0))
 REDIS_LOCK_EXP_TIME_SEC = 60 * 10
 REDIS_LOCK_INFO_EXP_TIME_SEC = 60 * 15
 STALE_LOCK_THRESHOLD_SEC = 60 * 15
+TASK_TIME_LIMIT_SEC = 60 * 10
 
 redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB + 1)
 
@@ -24,8 +26,8 @@ app.conf.update(
     task_track_started=True,
     worker_concurrency=2,
     task_acks_late=True,
-    task_time_limit=600,
-    task_soft_time_limit=540,
+    task_time_limit=TASK_TIME_LIMIT_SEC,
+    task_soft_time_limit=TASK_TIME_LIMIT_SEC - 60,
 )
 
 
@@ -53,7 +55,7 @@ class SessionLockedTask(Task):
             redis_client.set(f"lock_info:{session_id}", json.dumps(lock_data), ex=REDIS_LOCK_INFO_EXP_TIME_SEC)
 
         if not acquired:
-            return {
+            result = {
                 "error": "Session busy",
                 "response": "This session is already processing a message. Please wait.",
                 "session_id": session_id,
@@ -62,6 +64,9 @@ class SessionLockedTask(Task):
                 "is_processing": True,
                 "process_type": "chat",
             }
+            # agent_chat never runs here, so this is the only terminal event subscribers get
+            publish_session_event(session_id, "failed", task_id=self.request.id, result=result)
+            return result
 
         try:
             return super().__call__(*args, **kwargs)
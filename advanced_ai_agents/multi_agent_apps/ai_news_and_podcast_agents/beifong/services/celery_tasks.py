@@ -1,12 +1,16 @@
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
 from agno.storage.sqlite import SqliteStorage
+from celery.signals import worker_init
 import os
 from dotenv import load_dotenv
 from services.celery_app import app, SessionLockedTask
+from services.session_compaction import compact_agent_session
+from services.task_events import publish_session_event
 from db.config import get_agent_session_db_path
 from db.agent_config_v2 import (
     AGENT_DESCRIPTION,
+    AGENT_HISTORY_RUNS,
     AGENT_INSTRUCTIONS,
     AGENT_MODEL,
     INITIAL_SESSION_STATE,
@@ -19,6 +23,7 @@ from tools.user_source_selection import user_source_selection_run
 from tools.session_state_manager import update_language, update_chat_title, mark_session_finished
 from agents.image_generate_agent import image_generation_agent_run
 from agents.audio_generate_agent import audio_generate_agent_run
+from utils.faiss_index import warm_resident_index
 import json
 
 load_dotenv()
@@ -26,26 +31,36 @@ load_dotenv()
 db_file = get_agent_session_db_path()
 
 
+@worker_init.connect
+def preload_resident_index(**kwargs):
+    warm_resident_index()
+
+
 @app.task(bind=True, max_retries=0, base=SessionLockedTask)
 def agent_chat(self, session_id, message):
+    task_id = self.request.id
     try:
         print(f"Processing message for session {session_id}: {message[:50]}...")
+        publish_session_event(session_id, "started", task_id=task_id, process_type="chat")
         db_file = get_agent_session_db_path()
         os.makedirs(os.path.dirname(db_file), exist_ok=True)
         from services.internal_session_service import SessionService
 
         session_state = SessionService.get_session(session_id).get("state", INITIAL_SESSION_STATE)
+        storage = SqliteStorage(table_name="podcast_sessions", db_file=db_file)
+        compact_state, history_summary = compact_agent_session(storage, session_id, session_state)
 
         _agent = Agent(
             model=OpenAIChat(id=AGENT_MODEL, api_key=os.getenv("OPENAI_API_KEY")),
-            storage=SqliteStorage(table_name="podcast_sessions", db_file=db_file),
+            storage=storage,
             add_history_to_messages=True,
             read_chat_history=True,
             add_state_in_messages=True,
-            num_history_runs=30,
+            num_history_runs=AGENT_HISTORY_RUNS,
             instructions=AGENT_INSTRUCTIONS,
             description=AGENT_DESCRIPTION,
-            session_state=session_state,
+            additional_context=f"<earlier_conversation_summary>\n{history_summary}\n</earlier_conversation_summary>" if history_summary else None,
+            session_state=compact_state,
             session_id=session_id,
             tools=[
                 search_agent_run,
@@ -65,7 +80,7 @@ def agent_chat(self, session_id, message):
         print(f"Response generated for session {session_id}")
         _agent.write_to_storage(session_id=session_id)
         session_state = SessionService.get_session(session_id).get("state", INITIAL_SESSION_STATE)
-        return {
+        result = {
             "session_id": session_id,
             "response": response.content,
             "stage": _agent.session_state.get("stage", "unknown"),
@@ -73,9 +88,11 @@ def agent_chat(self, session_id, message):
             "is_processing": False,
             "process_type": None,
         }
+        publish_session_event(session_id, "completed", task_id=task_id, result=result)
+        return result
     except Exception as e:
         print(f"Error in agent_chat for session {session_id}: {str(e)}")
-        return {
+        result = {
             "session_id": session_id,
             "response": f"I'm sorry, I encountered an error: {str(e)}. Please try again.",
             "stage": "error",
@@ -83,3 +100,5 @@ def agent_chat(self, session_id, message):
             "is_processing": False,
             "process_type": None,
         }
+        publish_session_event(session_id, "failed", task_id=task_id, result=result)
+        return result
@@ -1,26 +1,36 @@
 import os
-import sqlite3
 import asyncio
 import time
 from contextlib import contextmanager
 from concurrent.futures import ThreadPoolExecutor
 from services.db_service import get_db_path
+from db.connection import open_connection
+from db.analysis_batches import create_analysis_batch_table
+from db.article_search import create_article_fts
+from db.embedding_cache import create_embedding_cache_table
+from db.extracted_text import create_extracted_text_table
+from db.podcast_checkpoints import create_stage_checkpoint_table
+from db.raw_content import create_raw_content_table
+from db.social_posts import create_post_search_tables
 
 
 @contextmanager
 def db_connection(db_path):
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA synchronous=NORMAL")
-    conn.execute("PRAGMA cache_size=10000")
-    conn.execute("PRAGMA temp_store=MEMORY")
+    conn = open_connection(db_path)
     try:
         yield conn
     finally:
         conn.close()
 
 
+def add_missing_columns(cursor, table, columns):
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, column_type in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+
 def init_sources_db():
     start_time = time.time()
     db_path = get_db_path("sources_db")
@@ -167,7 +177,12 @@ def init_tracking_db():
         ]
         for index_sql in indexes:
             cursor.execute(index_sql)
+        create_article_fts(conn)
         conn.commit()
+    create_embedding_cache_table(db_path)
+    create_analysis_batch_table(db_path)
+    create_raw_content_table(db_path)
+    create_extracted_text_table(db_path)
     elapsed = time.time() - start_time
     print(f"Tracking database initialized in {elapsed:.3f}s")
 
@@ -203,6 +218,7 @@ def init_podcasts_db():
         for index_sql in indexes:
             cursor.execute(index_sql)
         conn.commit()
+    create_stage_checkpoint_table(db_path)
     elapsed = time.time() - start_time
     print(f"Podcasts database initialized in {elapsed:.3f}s")
 
@@ -236,9 +252,12 @@ def init_tasks_db():
             status TEXT NOT NULL,
             error_message TEXT,
             output TEXT,
+            cpu_time REAL,
+            peak_rss_kb INTEGER,
             FOREIGN KEY (task_id) REFERENCES tasks(id)
         )
         """)
+        add_missing_columns(cursor, "task_executions", {"cpu_time": "REAL", "peak_rss_kb": "INTEGER"})
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS podcast_configs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -332,13 +351,17 @@ def init_social_media_db():
         )
         """)
         indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_posts_platform ON posts(platform)",
             "CREATE INDEX IF NOT EXISTS idx_posts_user_handle ON posts(user_handle)",
-            "CREATE INDEX IF NOT EXISTS idx_posts_post_timestamp ON posts(post_timestamp)",
-            "CREATE INDEX IF NOT EXISTS idx_posts_sentiment ON posts(sentiment)",
+            "DROP INDEX IF EXISTS idx_posts_platform",
+            "DROP INDEX IF EXISTS idx_posts_post_timestamp",
+            "DROP INDEX IF EXISTS idx_posts_sentiment",
+            "CREATE INDEX IF NOT EXISTS idx_posts_feed ON posts(post_timestamp, post_id)",
+            "CREATE INDEX IF NOT EXISTS idx_posts_platform_feed ON posts(platform, post_timestamp, post_id)",
+            "CREATE INDEX IF NOT EXISTS idx_posts_sentiment_feed ON posts(sentiment, post_timestamp, post_id)",
         ]
         for index_sql in indexes:
             cursor.execute(index_sql)
+        create_post_search_tables(conn)
         conn.commit()
     elapsed = time.time() - start_time
     print(f"Social media database initialized in {elapsed:.3f}s")
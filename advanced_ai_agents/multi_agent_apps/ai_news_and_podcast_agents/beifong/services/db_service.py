@@ -1,9 +1,15 @@
+import asyncio
 import os
+import sqlite3
 from typing import Dict, List, Any, Tuple, Union
 from fastapi import HTTPException
-from contextlib import contextmanager
-import sqlite3
+from contextlib import asynccontextmanager, contextmanager
+import aiosqlite
 from db.config import get_db_path
+from db.connection import SQLITE_BUSY_TIMEOUT, SQLITE_PRAGMAS, SQLITE_STATEMENT_CACHE_SIZE, get_file_id
+from db.connection import db_connection as pooled_db_connection
+
+ASYNC_POOL_SIZE = int(os.environ.get("ASYNC_DB_POOL_SIZE", 4))
 
 
 @contextmanager
@@ -11,12 +17,58 @@ def db_connection(db_path: str):
     """Context manager for database connections."""
     if not os.path.exists(db_path):
         raise HTTPException(status_code=404, detail=f"Database {db_path} not found. Initialize the database first.")
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    try:
+    with pooled_db_connection(db_path) as conn:
         yield conn
-    finally:
-        conn.close()
+
+
+class AsyncConnectionPool:
+    """Bounded pool of aiosqlite connections so queries do not block the event loop."""
+
+    def __init__(self, db_path: str, size: int = ASYNC_POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = []
+        self._semaphore = None
+
+    async def _open(self):
+        conn = await aiosqlite.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT, cached_statements=SQLITE_STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        for pragma in SQLITE_PRAGMAS:
+            try:
+                await conn.execute(pragma)
+            except sqlite3.OperationalError as e:
+                print(f"Could not apply {pragma}: {str(e)}")
+        return conn, get_file_id(self.db_path)
+
+    async def _acquire(self):
+        file_id = get_file_id(self.db_path)
+        while self._idle:
+            conn, conn_file_id = self._idle.pop()
+            if conn_file_id == file_id:
+                return conn, conn_file_id
+            await conn.close()
+        return await self._open()
+
+    @asynccontextmanager
+    async def connection(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.size)
+        async with self._semaphore:
+            conn, file_id = await self._acquire()
+            try:
+                yield conn
+            finally:
+                try:
+                    if conn.in_transaction:
+                        await conn.rollback()
+                    self._idle.append((conn, file_id))
+                except Exception:
+                    await conn.close()
+
+    async def close(self):
+        while self._idle:
+            conn, _ = self._idle.pop()
+            await conn.close()
 
 
 class DatabaseService:
@@ -30,24 +82,24 @@ class DatabaseService:
             db_name: Name of the database (sources_db, tracking_db, etc.)
         """
         self.db_path = get_db_path(db_name)
+        self.pool = AsyncConnectionPool(self.db_path)
 
     async def execute_query(
         self, query: str, params: Tuple = (), fetch: bool = False, fetch_one: bool = False
     ) -> Union[List[Dict[str, Any]], Dict[str, Any], int]:
         """Execute a query with error handling for FastAPI."""
+        self._check_exists()
         try:
-            with db_connection(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(query, params)
-
-                if fetch_one:
-                    result = cursor.fetchone()
-                    return dict(result) if result else None
-                elif fetch:
-                    return [dict(row) for row in cursor.fetchall()]
-                else:
-                    conn.commit()
-                    return cursor.lastrowid
+            async with self.pool.connection() as conn:
+                async with conn.execute(query, params) as cursor:
+                    if fetch_one:
+                        result = await cursor.fetchone()
+                        return dict(result) if result else None
+                    elif fetch:
+                        return [dict(row) for row in await cursor.fetchall()]
+                    else:
+                        await conn.commit()
+                        return cursor.lastrowid
         except Exception as e:
             if isinstance(e, HTTPException):
                 raise e
@@ -55,17 +107,23 @@ class DatabaseService:
 
     async def execute_write_many(self, query: str, params_list: List[Tuple]) -> int:
         """Execute multiple write operations in a single transaction."""
+        self._check_exists()
         try:
-            with db_connection(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.executemany(query, params_list)
-                conn.commit()
-                return cursor.rowcount
+            async with self.pool.connection() as conn:
+                async with conn.executemany(query, params_list) as cursor:
+                    await conn.commit()
+                    return cursor.rowcount
         except Exception as e:
             if isinstance(e, HTTPException):
                 raise e
             raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+    def _check_exists(self):
+        if not os.path.exists(self.db_path):
+            raise HTTPException(status_code=404, detail=f"Database {self.db_path} not found. Initialize the database first.")
+
+    async def close(self):
+        await self.pool.close()
 
 
 sources_db = DatabaseService(db_name="sources_db")
@@ -73,3 +131,8 @@ tracking_db = DatabaseService(db_name="tracking_db")
 podcasts_db = DatabaseService(db_name="podcasts_db")
 tasks_db = DatabaseService(db_name="tasks_db")
 social_media_db = DatabaseService(db_name="social_media_db")
+
+
+async def close_database_pools():
+    for service in (sources_db, tracking_db, podcasts_db, tasks_db, social_media_db):
+        await service.close()
@@ -4,20 +4,16 @@ import json
 from datetime import datetime
 from db.config import get_db_path
 from db.agent_config_v2 import INITIAL_SESSION_STATE
-import sqlite3
+from db.connection import db_connection
+from services.task_events import publish_session_event
 from contextlib import contextmanager
 
 
 @contextmanager
 def get_db_connection(db_name: str):
-    """Get a fresh database connection each time."""
-    db_path = get_db_path(db_name)
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    try:
+    """Get a pooled WAL connection for the current thread."""
+    with db_connection(get_db_path(db_name)) as conn:
         yield conn
-    finally:
-        conn.close()
 
 
 class SessionService:
@@ -66,6 +62,13 @@ class SessionService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error initializing session: {str(e)}")
 
+    @staticmethod
+    def _stage_of(state_json: Optional[str]) -> Optional[str]:
+        try:
+            return json.loads(state_json).get("stage")
+        except (TypeError, ValueError, AttributeError):
+            return None
+
     @staticmethod
     def save_session(session_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
         try:
@@ -73,7 +76,7 @@ class SessionService:
             with get_db_connection("internal_sessions_db") as conn:
                 cursor = conn.cursor()
                 conn.execute("BEGIN IMMEDIATE")
-                existing_query = "SELECT session_id FROM session_state WHERE session_id = ?"
+                existing_query = "SELECT state FROM session_state WHERE session_id = ?"
                 cursor.execute(existing_query, (session_id,))
                 existing_session = cursor.fetchone()
                 if existing_session:
@@ -84,6 +87,13 @@ class SessionService:
                     current_time = datetime.now().isoformat()
                     cursor.execute(insert_query, (session_id, state_json, current_time))
                 conn.commit()
+            previous_stage = SessionService._stage_of(existing_session[0]) if existing_session else None
+            publish_session_event(
+                session_id,
+                "state",
+                stage=state.get("stage"),
+                stage_changed=state.get("stage") != previous_stage,
+            )
             return SessionService.get_session(session_id)
         except Exception as e:
             if isinstance(e, HTTPException):
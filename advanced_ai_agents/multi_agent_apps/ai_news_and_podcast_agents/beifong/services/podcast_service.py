@@ -4,6 +4,7 @@ from typing import List, Dict, Optional, Any
 from datetime import datetime
 from fastapi import HTTPException, UploadFile
 from services.db_service import podcasts_db
+from utils.audio_encoding import remove_audio_renditions
 import math
 
 AUDIO_DIR = "podcasts/audio"
@@ -293,6 +294,7 @@ class PodcastService:
                     audio_path = os.path.join(AUDIO_DIR, existing["audio_path"])
                     if os.path.exists(audio_path):
                         os.remove(audio_path)
+                    remove_audio_renditions(audio_path)
                 if existing.get("banner_img_path"):
                     img_path = os.path.join(IMAGE_DIR, existing["banner_img_path"])
                     if os.path.exists(img_path):
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+from openai import OpenAI
+from db.agent_config_v2 import AGENT_HISTORY_RUNS, HISTORY_SUMMARY_MODEL
+
+HISTORY_SUMMARY_BATCH = int(os.environ.get("HISTORY_SUMMARY_BATCH", 4))
+HISTORY_SUMMARY_MAX_CHARS = 4000
+STATE_VALUE_MAX_CHARS = 1000
+COMPACTION_KEY = "history_compaction"
+
+HISTORY_SUMMARY_PROMPT = (
+    "You maintain the running summary of a conversation between a user and Beifong, an assistant that builds podcasts "
+    "(search -> source selection -> script -> banner -> audio). Merge the previous summary with the new turns into one "
+    "concise summary. Keep the topic, the user's requests and preferences, decisions, chosen language and what has been "
+    "completed or rejected. Drop pleasantries and anything the current session state already records. "
+    f"Stay under {HISTORY_SUMMARY_MAX_CHARS} characters."
+)
+
+
+def digest_value(key, value):
+    encoded = json.dumps(value, sort_keys=True, default=str)
+    return {"ref": f"session_state.{key}", "sha256": hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16], "chars": len(encoded)}
+
+
+def compact_session_state(state):
+    """
+    Build the view of the session state the chat agent works with. Tools read the full
+    state from SessionService, so large values are replaced by short digests here.
+    """
+    compact = {}
+    for key, value in state.items():
+        if key == "search_results" and isinstance(value, list):
+            compact[key] = [
+                {
+                    "index": index + 1,
+                    "title": item.get("title"),
+                    "source_name": item.get("source_name"),
+                    "confirmed": item.get("confirmed", False),
+                }
+                for index, item in enumerate(value)
+                if isinstance(item, dict)
+            ]
+        elif key == "generated_script" and isinstance(value, dict) and value:
+            compact[key] = {"title": value.get("title"), "sections": len(value.get("sections", [])), **digest_value(key, value)}
+        elif len(json.dumps(value, default=str)) > STATE_VALUE_MAX_CHARS:
+            compact[key] = digest_value(key, value)
+        else:
+            compact[key] = value
+    return compact
+
+
+def _is_transcript_message(message):
+    return message.get("role") in ("user", "assistant") and bool(message.get("content")) and not message.get("from_history")
+
+
+def _run_transcript(run):
+    messages = run.get("messages") or []
+    return [(message["role"], str(message["content"])) for message in messages if _is_transcript_message(message)]
+
+
+def _transcript_only(messages):
+    return [{key: value for key, value in message.items() if key != "tool_calls"} for message in messages or [] if _is_transcript_message(message)]
+
+
+def prune_run(run):
+    """Drop tool calls and tool results from a run that has been folded into the summary."""
+    run["messages"] = _transcript_only(run.get("messages"))
+    response = run.get("response")
+    if isinstance(response, dict) and response.get("messages"):
+        response["messages"] = _transcript_only(response["messages"])
+
+
+def fallback_summary(previous_summary, runs):
+    lines = [previous_summary] if previous_summary else []
+    for run in runs:
+        lines.extend(f"{role}: {content[:300]}" for role, content in _run_transcript(run))
+    return "\n".join(lines)[-HISTORY_SUMMARY_MAX_CHARS:]
+
+
+def summarize_runs(previous_summary, runs, api_key=None):
+    transcript = "\n\n".join(f"{role.upper()}: {content}" for run in runs for role, content in _run_transcript(run))
+    if not transcript:
+        return previous_summary
+    try:
+        client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        response = client.chat.completions.create(
+            model=HISTORY_SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": HISTORY_SUMMARY_PROMPT},
+                {"role": "user", "content": f"Previous summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"},
+            ],
+            temperature=0,
+        )
+        return response.choices[0].message.content.strip()[:HISTORY_SUMMARY_MAX_CHARS]
+    except Exception as e:
+        print(f"History summary failed, keeping an extract instead: {e}")
+        return fallback_summary(previous_summary, runs)
+
+
+def compact_agent_session(storage, session_id, session_state, api_key=None):
+    """
+    Rewrite the stored agent session before a run: the session state becomes its compact
+    view and runs older than the last AGENT_HISTORY_RUNS are folded into a running summary
+    kept in extra_data, once HISTORY_SUMMARY_BATCH of them have aged out. Returns the
+    compact state and the summary to hand to the agent.
+    """
+    compact_state = compact_session_state(session_state)
+    session = storage.read(session_id)
+    if session is None:
+        return compact_state, None
+    extra_data = session.extra_data or {}
+    compaction = extra_data.get(COMPACTION_KEY) or {"summary": "", "summarized_runs": 0}
+    runs = (session.memory or {}).get("runs") or []
+    aged_out = len(runs) - AGENT_HISTORY_RUNS
+    if aged_out - compaction["summarized_runs"] >= HISTORY_SUMMARY_BATCH:
+        new_runs = runs[compaction["summarized_runs"] : aged_out]
+        compaction = {"summary": summarize_runs(compaction["summary"], new_runs, api_key), "summarized_runs": aged_out}
+        for run in new_runs:
+            prune_run(run)
+        print(f"Compacted {len(new_runs)} older runs of session {session_id} into the history summary")
+    session.extra_data = {**extra_data, COMPACTION_KEY: compaction}
+    session.session_data = {**(session.session_data or {}), "session_state": compact_state}
+    storage.upsert(session)
+    return compact_state, compaction["summary"] or None
@@ -1,14 +1,61 @@
+import base64
 import json
+import time
 from typing import List, Optional, Dict, Any
 from fastapi import HTTPException
 from services.db_service import social_media_db
 from models.social_media_schemas import PaginatedPosts, Post
 from datetime import datetime, timedelta
+from db.social_posts import POST_FTS_TABLE, build_post_match_query, timestamp_range_clauses
+
+POST_COUNT_CACHE_SEC = 60
+POST_COUNT_CACHE_SIZE = 256
+
+
+def encode_post_cursor(post_timestamp: Optional[str], post_id: str) -> str:
+    payload = json.dumps([post_timestamp, post_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_post_cursor(cursor: str):
+    try:
+        post_timestamp, post_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(post_id, str) or not (post_timestamp is None or isinstance(post_timestamp, str)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return post_timestamp, post_id
 
 
 class SocialMediaService:
     """Service for managing social media posts."""
 
+    def __init__(self):
+        self._has_post_fts = False
+        self._count_cache = {}
+
+    async def has_post_fts(self) -> bool:
+        if not self._has_post_fts:
+            row = await social_media_db.execute_query(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (POST_FTS_TABLE,), fetch=True, fetch_one=True
+            )
+            self._has_post_fts = bool(row)
+        return self._has_post_fts
+
+    async def count_posts(self, from_clause: str, filters: List[str], params: List[Any]) -> int:
+        """Count posts matching the filters, reusing the count for POST_COUNT_CACHE_SEC."""
+        cache_key = (from_clause, tuple(filters), tuple(params))
+        cached = self._count_cache.get(cache_key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        query = f"SELECT COUNT(*) AS total {from_clause} WHERE {' AND '.join(filters or ['1=1'])}"
+        row = await social_media_db.execute_query(query, tuple(params), fetch=True, fetch_one=True)
+        total = row.get("total", 0) if row else 0
+        if len(self._count_cache) >= POST_COUNT_CACHE_SIZE:
+            self._count_cache.clear()
+        self._count_cache[cache_key] = (time.monotonic() + POST_COUNT_CACHE_SEC, total)
+        return total
+
     async def get_posts(
         self,
         page: int = 1,
@@ -20,45 +67,64 @@ class SocialMediaService:
         date_from: Optional[str] = None,
         date_to: Optional[str] = None,
         search: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> PaginatedPosts:
-        """Get social media posts with pagination and filtering."""
+        """
+        Get social media posts newest first with filtering. Passing the next_cursor of the
+        previous page continues after it without an OFFSET scan; page alone still works.
+        """
         try:
-            offset = (page - 1) * per_page
-            query_parts = [
-                "SELECT * FROM posts",
-                "WHERE 1=1",
-            ]
-            query_params = []
+            if category:
+                from_clause = "FROM post_categories pc JOIN posts p ON p.post_id = pc.post_id"
+                filters, params = ["pc.category = ?"], [category]
+                order_table = "pc"
+            else:
+                from_clause = "FROM posts p"
+                filters, params = [], []
+                order_table = "p"
             if platform:
-                query_parts.append("AND platform = ?")
-                query_params.append(platform)
+                filters.append("p.platform = ?")
+                params.append(platform)
             if user_handle:
-                query_parts.append("AND user_handle = ?")
-                query_params.append(user_handle)
+                filters.append("p.user_handle = ?")
+                params.append(user_handle)
             if sentiment:
-                query_parts.append("AND sentiment = ?")
-                query_params.append(sentiment)
-            if category:
-                query_parts.append("AND categories LIKE ?")
-                query_params.append(f'%"{category}"%')
-            if date_from:
-                query_parts.append("AND datetime(post_timestamp) >= datetime(?)")
-                query_params.append(date_from)
-            if date_to:
-                query_parts.append("AND datetime(post_timestamp) <= datetime(?)")
-                query_params.append(date_to)
+                filters.append("p.sentiment = ?")
+                params.append(sentiment)
+            date_filters, date_params = timestamp_range_clauses(f"{order_table}.post_timestamp", date_from, date_to)
+            filters.extend(date_filters)
+            params.extend(date_params)
             if search:
-                query_parts.append("AND (post_text LIKE ? OR user_display_name LIKE ? OR user_handle LIKE ?)")
-                search_param = f"%{search}%"
-                query_params.extend([search_param, search_param, search_param])
-            count_query = " ".join(query_parts).replace("SELECT *", "SELECT COUNT(*)")
-            total_posts = await social_media_db.execute_query(count_query, tuple(query_params), fetch=True, fetch_one=True)
-            total_count = total_posts.get("COUNT(*)", 0) if total_posts else 0
-            query_parts.append("ORDER BY datetime(post_timestamp) DESC, post_id DESC")
-            query_parts.append("LIMIT ? OFFSET ?")
-            query_params.extend([per_page, offset])
-            posts_query = " ".join(query_parts)
-            posts_data = await social_media_db.execute_query(posts_query, tuple(query_params), fetch=True)
+                match_query = build_post_match_query(search)
+                if match_query and await self.has_post_fts():
+                    filters.append(f"p.rowid IN (SELECT rowid FROM {POST_FTS_TABLE} WHERE {POST_FTS_TABLE} MATCH ?)")
+                    params.append(match_query)
+                elif match_query:
+                    filters.append("(p.post_text LIKE ? OR p.user_display_name LIKE ? OR p.user_handle LIKE ?)")
+                    search_param = f"%{search}%"
+                    params.extend([search_param, search_param, search_param])
+            total_count = await self.count_posts(from_clause, filters, params)
+            page_filters, page_params = list(filters), list(params)
+            if cursor:
+                cursor_timestamp, cursor_post_id = decode_post_cursor(cursor)
+                timestamp_column, post_id_column = f"{order_table}.post_timestamp", f"{order_table}.post_id"
+                if cursor_timestamp is None:
+                    page_filters.append(f"({timestamp_column} IS NULL AND {post_id_column} < ?)")
+                    page_params.append(cursor_post_id)
+                else:
+                    page_filters.append(f"(({timestamp_column}, {post_id_column}) < (?, ?) OR {timestamp_column} IS NULL)")
+                    page_params.extend([cursor_timestamp, cursor_post_id])
+            posts_query = (
+                f"SELECT p.* {from_clause} WHERE {' AND '.join(page_filters or ['1=1'])} "
+                f"ORDER BY {order_table}.post_timestamp DESC, {order_table}.post_id DESC LIMIT ?"
+            )
+            page_params.append(per_page + 1)
+            if not cursor:
+                posts_query += " OFFSET ?"
+                page_params.append((page - 1) * per_page)
+            posts_data = await social_media_db.execute_query(posts_query, tuple(page_params), fetch=True)
+            has_next = len(posts_data) > per_page
+            posts_data = posts_data[:per_page]
             posts = []
             for post in posts_data:
                 post_dict = dict(post)
@@ -86,16 +152,18 @@ class SocialMediaService:
                 }
                 posts.append(post_dict)
             total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 0
-            has_next = page < total_pages
-            has_prev = page > 1
+            next_cursor = None
+            if has_next and posts:
+                next_cursor = encode_post_cursor(posts[-1]["post_timestamp"], posts[-1]["post_id"])
             return PaginatedPosts(
                 items=posts,
                 total=total_count,
                 page=page,
                 per_page=per_page,
-                total_pages=total_pages,
+                total_pages=max(total_pages, page + 1 if has_next else page),
                 has_next=has_next,
-                has_prev=has_prev,
+                has_prev=page > 1 or bool(cursor),
+                next_cursor=next_cursor,
             )
         except Exception as e:
             if isinstance(e, HTTPException):
@@ -156,12 +224,9 @@ class SocialMediaService:
                 """
             ]
             params = []
-            if date_from:
-                query_parts.append("AND datetime(post_timestamp) >= datetime(?)")
-                params.append(date_from)
-            if date_to:
-                query_parts.append("AND datetime(post_timestamp) <= datetime(?)")
-                params.append(date_to)
+            date_filters, date_params = timestamp_range_clauses("post_timestamp", date_from, date_to)
+            query_parts.extend(f"AND {clause}" for clause in date_filters)
+            params.extend(date_params)
             query_parts.append("GROUP BY sentiment ORDER BY post_count DESC")
             query = " ".join(query_parts)
             return await social_media_db.execute_query(query, tuple(params), fetch=True)
@@ -183,12 +248,9 @@ class SocialMediaService:
         if platform:
             query_parts.append("AND platform = ?")
             params.append(platform)
-        if date_from:
-            query_parts.append("AND datetime(post_timestamp) >= datetime(?)")
-            params.append(date_from)
-        if date_to:
-            query_parts.append("AND datetime(post_timestamp) <= datetime(?)")
-            params.append(date_to)
+        date_filters, date_params = timestamp_range_clauses("post_timestamp", date_from, date_to)
+        query_parts.extend(f"AND {clause}" for clause in date_filters)
+        params.extend(date_params)
         query_parts.extend(["GROUP BY user_handle", "ORDER BY post_count DESC", "LIMIT ?"])
         params.append(limit)
         query = " ".join(query_parts)
@@ -197,29 +259,14 @@ class SocialMediaService:
     async def get_categories(self, date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get all categories with post counts."""
         try:
-            query_parts = ["SELECT categories FROM posts WHERE categories IS NOT NULL"]
+            query_parts = ["SELECT category, COUNT(*) as post_count FROM post_categories WHERE 1=1"]
             params = []
-            if date_from:
-                query_parts.append("AND datetime(post_timestamp) >= datetime(?)")
-                params.append(date_from)
-            if date_to:
-                query_parts.append("AND datetime(post_timestamp) <= datetime(?)")
-                params.append(date_to) 
+            date_filters, date_params = timestamp_range_clauses("post_timestamp", date_from, date_to)
+            query_parts.extend(f"AND {clause}" for clause in date_filters)
+            params.extend(date_params)
+            query_parts.append("GROUP BY category ORDER BY post_count DESC")
             query = " ".join(query_parts)
-            result = await social_media_db.execute_query(query, tuple(params), fetch=True)
-            category_counts = {}
-            for row in result:
-                if row.get("categories"):
-                    try:
-                        categories = json.loads(row["categories"])
-                        for category in categories:
-                            if category in category_counts:
-                                category_counts[category] += 1
-                            else:
-                                category_counts[category] = 1
-                    except json.JSONDecodeError:
-                        pass
-            return [{"category": category, "post_count": count} for category, count in sorted(category_counts.items(), key=lambda x: x[1], reverse=True)]
+            return await social_media_db.execute_query(query, tuple(params), fetch=True)
         except Exception as e:
             if isinstance(e, HTTPException):
                 raise e
@@ -252,12 +299,9 @@ class SocialMediaService:
             if platform:
                 query_parts.append("AND platform = ?")
                 params.append(platform)
-            if date_from:
-                query_parts.append("AND datetime(post_timestamp) >= datetime(?)")
-                params.append(date_from)
-            if date_to:
-                query_parts.append("AND datetime(post_timestamp) <= datetime(?)")
-                params.append(date_to)
+            date_filters, date_params = timestamp_range_clauses("post_timestamp", date_from, date_to)
+            query_parts.extend(f"AND {clause}" for clause in date_filters)
+            params.extend(date_params)
             query_parts.extend(["GROUP BY user_handle, user_display_name", "ORDER BY total_posts DESC", "LIMIT ?"])
             params.append(limit)
             query = " ".join(query_parts)
@@ -277,30 +321,20 @@ class SocialMediaService:
     async def get_category_sentiment(self, date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get sentiment distribution by category."""
         try:
-            date_filter = ""
-            params = []
-            if date_from or date_to:
-                date_filter = "WHERE "
-                if date_from:
-                    date_filter += "datetime(p.post_timestamp) >= datetime(?)"
-                    params.append(date_from)
-                    if date_to:
-                        date_filter += " AND "
-                if date_to:
-                    date_filter += "datetime(p.post_timestamp) <= datetime(?)"
-                    params.append(date_to)
+            date_filters, params = timestamp_range_clauses("pc.post_timestamp", date_from, date_to)
+            date_filter = f"WHERE {' AND '.join(date_filters)}" if date_filters else ""
             query = f"""
             WITH category_data AS (
                 SELECT 
-                    json_each.value as category,
-                    sentiment,
+                    pc.category as category,
+                    p.sentiment as sentiment,
                     COUNT(*) as count
                 FROM 
-                    posts p,
-                    json_each(p.categories)
+                    post_categories pc
+                    JOIN posts p ON p.post_id = pc.post_id
                 {date_filter}
                 GROUP BY 
-                    json_each.value, sentiment
+                    pc.category, p.sentiment
             )
             SELECT 
                 category,
@@ -341,26 +375,23 @@ class SocialMediaService:
                 """
                 WITH topic_data AS (
                     SELECT 
-                        json_each.value as topic,
-                        sentiment,
+                        pt.tag as topic,
+                        p.sentiment as sentiment,
                         COUNT(*) as count
                     FROM 
-                        posts,
-                        json_each(posts.tags)
-                    WHERE tags IS NOT NULL
+                        post_tags pt
+                        JOIN posts p ON p.post_id = pt.post_id
+                    WHERE 1=1
                 """
             ]
             params = []
-            if date_from:
-                query_parts.append("AND datetime(post_timestamp) >= datetime(?)")
-                params.append(date_from)
-            if date_to:
-                query_parts.append("AND datetime(post_timestamp) <= datetime(?)")
-                params.append(date_to)  
+            date_filters, date_params = timestamp_range_clauses("pt.post_timestamp", date_from, date_to)
+            query_parts.extend(f"AND {clause}" for clause in date_filters)
+            params.extend(date_params)
             query_parts.append(
                 """
                 GROUP BY 
-                    json_each.value, sentiment
+                    pt.tag, p.sentiment
                 )
                 SELECT 
                     topic,
@@ -440,7 +471,8 @@ class SocialMediaService:
                 FROM 
                     dates
                 LEFT JOIN 
-                    posts ON date(posts.post_timestamp) = dates.post_date
+                    posts ON posts.post_timestamp >= dates.post_date
+                    AND posts.post_timestamp < date(dates.post_date, '+1 day')
                 """
             ]
             params = []
@@ -486,12 +518,9 @@ class SocialMediaService:
             if sentiment:
                 query_parts.append("AND sentiment = ?")
                 params.append(sentiment)  
-            if date_from:
-                query_parts.append("AND datetime(post_timestamp) >= datetime(?)")
-                params.append(date_from)
-            if date_to:
-                query_parts.append("AND datetime(post_timestamp) <= datetime(?)")
-                params.append(date_to)
+            date_filters, date_params = timestamp_range_clauses("post_timestamp", date_from, date_to)
+            query_parts.extend(f"AND {clause}" for clause in date_filters)
+            params.extend(date_params)
             query_parts.extend(["ORDER BY total_engagement DESC", "LIMIT ?"])
             params.append(limit)
             query = " ".join(query_parts)
@@ -555,12 +584,9 @@ class SocialMediaService:
                 """
             ]
             params = []
-            if date_from:
-                query_parts.append("AND datetime(post_timestamp) >= datetime(?)")
-                params.append(date_from)
-            if date_to:
-                query_parts.append("AND datetime(post_timestamp) <= datetime(?)")
-                params.append(date_to)
+            date_filters, date_params = timestamp_range_clauses("post_timestamp", date_from, date_to)
+            query_parts.extend(f"AND {clause}" for clause in date_filters)
+            params.extend(date_params)
             query = " ".join(query_parts)
             result = await social_media_db.execute_query(query, tuple(params), fetch=True, fetch_one=True)
             if not result:
@@ -578,10 +604,7 @@ class SocialMediaService:
                 WHERE 1=1
                 """
             ]
-            if date_from:
-                platform_query_parts.append("AND datetime(post_timestamp) >= datetime(?)")
-            if date_to:
-                platform_query_parts.append("AND datetime(post_timestamp) <= datetime(?)")
+            platform_query_parts.extend(f"AND {clause}" for clause in date_filters)
             platform_query_parts.extend([
                 "GROUP BY platform",
                 "ORDER BY post_count DESC",
@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+import time
+import redis
+
+EVENT_KEY_PREFIX = "beifong:session"
+LAST_EVENT_EXP_TIME_SEC = 60 * 15
+TERMINAL_EVENTS = ("completed", "failed")
+
+_redis_client = None
+_redis_client_lock = threading.Lock()
+
+
+def session_channel(session_id):
+    return f"{EVENT_KEY_PREFIX}:{session_id}:events"
+
+
+def last_event_key(session_id):
+    return f"{EVENT_KEY_PREFIX}:{session_id}:last_event"
+
+
+def _get_redis_client():
+    global _redis_client
+    with _redis_client_lock:
+        if _redis_client is None:
+            host = os.environ.get("REDIS_HOST", "localhost")
+            port = int(os.environ.get("REDIS_PORT", 6379))
+            db = int(os.environ.get("REDIS_DB", 0))
+            _redis_client = redis.Redis(host=host, port=port, db=db + 1, socket_connect_timeout=2)
+        return _redis_client
+
+
+def publish_session_event(session_id, event_type, task_id=None, **payload):
+    """
+    Publish a progress event for a session and keep it as the session's last event,
+    so a subscriber that connects after the event was sent still receives it.
+    """
+    event = {"type": event_type, "session_id": session_id, "task_id": task_id, "timestamp": time.time(), **payload}
+    try:
+        message = json.dumps(event)
+        pipe = _get_redis_client().pipeline(transaction=False)
+        pipe.set(last_event_key(session_id), message, ex=LAST_EVENT_EXP_TIME_SEC)
+        pipe.publish(session_channel(session_id), message)
+        pipe.execute()
+    except Exception as e:
+        print(f"Could not publish {event_type} event for session {session_id}: {e}")
+    return event
+
+
+async def get_last_session_event(redis_client, session_id):
+    try:
+        message = await redis_client.get(last_event_key(session_id))
+        return json.loads(message) if message else None
+    except Exception as e:
+        print(f"Error reading last event for session {session_id}: {e}")
+        return None
+
+
+def is_final_event(event, task_id=None):
+    return event["type"] in TERMINAL_EVENTS and (task_id is None or event.get("task_id") == task_id)
+
+
+def _timed_out_event(session_id, task_id):
+    return {
+        "type": "failed",
+        "session_id": session_id,
+        "task_id": task_id,
+        "timestamp": time.time(),
+        "result": {
+            "error": "Task timed out",
+            "response": "The request did not finish in time. Please try again.",
+            "session_id": session_id,
+            "stage": "error",
+            "is_processing": False,
+            "process_type": "chat",
+        },
+    }
+
+
+async def stream_session_events(redis_client, session_id, task_id=None, idle_timeout=3.0, max_wait=None):
+    """
+    Yield events published for a session until the task finishes, starting with the
+    last stored event. None is yielded whenever idle_timeout passes without an event
+    so callers can send heartbeats. Terminal events of other tasks are skipped.
+    With max_wait set, a failed event is yielded once the task has not started within
+    max_wait seconds, or has not finished within max_wait seconds of its started event,
+    so a task whose worker died without publishing anything does not keep the stream open.
+    """
+    deadline = time.monotonic() + max_wait if max_wait is not None else None
+
+    def track_started(event):
+        nonlocal deadline
+        if deadline is not None and event["type"] == "started" and (task_id is None or event.get("task_id") == task_id):
+            deadline = time.monotonic() + max_wait - max(0.0, time.time() - event.get("timestamp", time.time()))
+
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe(session_channel(session_id))
+    try:
+        last_event = await get_last_session_event(redis_client, session_id)
+        if last_event and (last_event["type"] not in TERMINAL_EVENTS or is_final_event(last_event, task_id)):
+            track_started(last_event)
+            yield last_event
+            if is_final_event(last_event, task_id):
+                return
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                yield _timed_out_event(session_id, task_id)
+                return
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=idle_timeout)
+            if message is None:
+                yield None
+                continue
+            event = json.loads(message["data"])
+            if event["type"] in TERMINAL_EVENTS and not is_final_event(event, task_id):
+                continue
+            track_started(event)
+            yield event
+            if is_final_event(event, task_id):
+                return
+    finally:
+        await pubsub.unsubscribe(session_channel(session_id))
+        await pubsub.aclose()
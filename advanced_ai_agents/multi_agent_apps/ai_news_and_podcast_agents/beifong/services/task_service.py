@@ -204,7 +204,7 @@ class TaskService:
                 """
                 count_params = (task_id,)
                 query = """
-                SELECT id, task_id, start_time, end_time, status, error_message, output
+                SELECT id, task_id, start_time, end_time, status, error_message, output, cpu_time, peak_rss_kb
                 FROM task_executions
                 WHERE task_id = ?
                 ORDER BY start_time DESC
@@ -218,7 +218,7 @@ class TaskService:
                 """
                 count_params = ()
                 query = """
-                SELECT id, task_id, start_time, end_time, status, error_message, output
+                SELECT id, task_id, start_time, end_time, status, error_message, output, cpu_time, peak_rss_kb
                 FROM task_executions
                 ORDER BY start_time DESC
                 LIMIT ? OFFSET ?
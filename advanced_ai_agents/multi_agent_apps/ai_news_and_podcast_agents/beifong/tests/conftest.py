@@ -0,0 +1,2 @@
+# the *_test.py files are manual scripts that need API keys, models or a browser
+collect_ignore_glob = ["*_test.py"]
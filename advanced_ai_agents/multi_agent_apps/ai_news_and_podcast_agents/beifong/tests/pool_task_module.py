@@ -0,0 +1,14 @@
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# run through TaskWorkerPool by test_task_runner; starts a process pool of its own like the feed,
+# crawl and analysis processors do
+
+if __name__ == "__main__":
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        print(sum(executor.map(abs, [-1, -2, -3])))
+        if "--sleep" in sys.argv:
+            executor.submit(time.sleep, 30).result()
+    if "--fail" in sys.argv:
+        sys.exit(3)
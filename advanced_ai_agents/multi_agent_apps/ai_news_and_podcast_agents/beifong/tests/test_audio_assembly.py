@@ -0,0 +1,48 @@
+from math import gcd
+import numpy as np
+import pytest
+from scipy import signal
+from utils.audio_assembly import StreamingResampler
+
+TOLERANCE = 2e-6
+
+
+def resample_in_chunks(samples, orig_sr, target_sr, chunk_sizes):
+    resampler = StreamingResampler(orig_sr, target_sr)
+    parts, position = [], 0
+    for size in chunk_sizes:
+        if position >= len(samples):
+            break
+        parts.append(resampler.process(samples[position : position + size]))
+        position += size
+    parts.append(resampler.process(samples[position:]))
+    parts.append(resampler.flush())
+    return np.concatenate(parts)
+
+
+def reference(samples, orig_sr, target_sr):
+    divisor = gcd(orig_sr, target_sr)
+    return signal.resample_poly(samples, target_sr // divisor, orig_sr // divisor)
+
+
+@pytest.mark.parametrize("orig_sr,target_sr", [(44100, 24000), (22050, 24000), (16000, 24000), (24000, 48000), (48000, 24000)])
+def test_matches_resample_poly_on_random_chunks(orig_sr, target_sr):
+    rng = np.random.default_rng(orig_sr + target_sr)
+    samples = (rng.standard_normal(orig_sr + 123) * 0.3).astype(np.float32)
+    output = resample_in_chunks(samples, orig_sr, target_sr, rng.integers(1, 5000, 1000))
+    expected = reference(samples, orig_sr, target_sr)
+    assert len(output) == len(expected)
+    assert np.max(np.abs(output - expected)) < TOLERANCE
+
+
+def test_single_frame_chunks_match_whole_signal():
+    rng = np.random.default_rng(1)
+    samples = (rng.standard_normal(2000) * 0.3).astype(np.float32)
+    output = resample_in_chunks(samples, 22050, 24000, [1] * len(samples))
+    expected = reference(samples, 22050, 24000)
+    assert len(output) == len(expected)
+    assert np.max(np.abs(output - expected)) < TOLERANCE
+
+
+def test_flush_without_input_is_empty():
+    assert len(StreamingResampler(44100, 24000).flush()) == 0
@@ -0,0 +1,49 @@
+import sqlite3
+import numpy as np
+import pytest
+from processors import embedding_processor
+
+
+@pytest.fixture
+def tracking_db_path(tmp_path):
+    path = str(tmp_path / "tracking.db")
+    embedding_processor.create_embedding_table(path)
+    return path
+
+
+def embedding_rows(tracking_db_path):
+    with sqlite3.connect(tracking_db_path) as conn:
+        return conn.execute("SELECT article_id, in_faiss_index FROM article_embeddings ORDER BY article_id").fetchall()
+
+
+def test_store_skips_articles_that_already_have_an_embedding(tracking_db_path):
+    assert embedding_processor.store_embeddings_batch(tracking_db_path, [(1, [0.1, 0.2]), (2, [0.3, 0.4])], "test") == [1, 2]
+    assert embedding_processor.store_embeddings_batch(tracking_db_path, [(2, [0.5, 0.6]), (3, [0.7, 0.8])], "test") == [3]
+    assert [article_id for article_id, _ in embedding_rows(tracking_db_path)] == [1, 2, 3]
+
+
+def test_bad_row_does_not_discard_the_batch(tracking_db_path):
+    rows = [(1, [0.1, 0.2]), (None, [0.3, 0.4]), (3, [0.5, 0.6])]
+    assert embedding_processor.store_embeddings_batch(tracking_db_path, rows, "test") == [1, 3]
+
+
+def test_existing_duplicates_are_removed_keeping_the_indexed_row(tmp_path):
+    path = str(tmp_path / "tracking.db")
+    blob = np.zeros(2, dtype=np.float32).tobytes()
+    with sqlite3.connect(path) as conn:
+        conn.execute("""
+        CREATE TABLE article_embeddings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            article_id INTEGER NOT NULL,
+            embedding BLOB NOT NULL,
+            embedding_model TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            in_faiss_index INTEGER DEFAULT 0
+        )
+        """)
+        conn.executemany(
+            "INSERT INTO article_embeddings (article_id, embedding, embedding_model, created_at, in_faiss_index) VALUES (?, ?, 'test', 'now', ?)",
+            [(1, blob, 0), (1, blob, 1), (2, blob, 0), (2, blob, 0)],
+        )
+    embedding_processor.create_embedding_table(path)
+    assert embedding_rows(path) == [(1, 1), (2, 0)]
@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import numpy as np
+import faiss
+import pytest
+from processors import faiss_indexing_processor as indexing
+from utils.faiss_index import get_delta_index_path, is_id_mapped
+
+DIMENSION = 8
+
+
+@pytest.fixture
+def paths(tmp_path):
+    tracking_db_path = str(tmp_path / "tracking.db")
+    with sqlite3.connect(tracking_db_path) as conn:
+        conn.execute("""
+        CREATE TABLE article_embeddings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            article_id INTEGER NOT NULL,
+            embedding BLOB NOT NULL,
+            embedding_model TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            in_faiss_index INTEGER DEFAULT 0
+        )
+        """)
+    return tracking_db_path, str(tmp_path / "faiss" / "article_index.faiss"), str(tmp_path / "faiss" / "article_id_map.npy")
+
+
+def add_embeddings(tracking_db_path, article_ids):
+    rng = np.random.default_rng(article_ids[0])
+    with sqlite3.connect(tracking_db_path) as conn:
+        conn.executemany(
+            "INSERT INTO article_embeddings (article_id, embedding, embedding_model, created_at) VALUES (?, ?, 'test', 'now')",
+            [(article_id, rng.random(DIMENSION, dtype=np.float32).tobytes()) for article_id in article_ids],
+        )
+
+
+def pending_count(tracking_db_path):
+    with sqlite3.connect(tracking_db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM article_embeddings WHERE in_faiss_index = 0").fetchone()[0]
+
+
+def index_ids(index_path):
+    index = faiss.read_index(index_path)
+    return set(faiss.vector_to_array(index.id_map).tolist()) if index.ntotal else set()
+
+
+def run_incremental(tracking_db_path, index_path, mapping_path, **kwargs):
+    options = {"batch_size": 10, "total_batches": 10, "index_type": "flat", "compact_threshold": 1000}
+    options.update(kwargs)
+    return indexing.process_incrementally(tracking_db_path=tracking_db_path, index_path=index_path, mapping_path=mapping_path, **options)
+
+
+def test_incremental_appends_to_delta(paths):
+    tracking_db_path, index_path, mapping_path = paths
+    add_embeddings(tracking_db_path, list(range(1, 26)))
+    stats = run_incremental(tracking_db_path, index_path, mapping_path)
+    assert stats["added"] == 25 and not stats["compacted"]
+    assert index_ids(get_delta_index_path(index_path)) == set(range(1, 26))
+    assert faiss.read_index(index_path).ntotal == 0
+    assert pending_count(tracking_db_path) == 0
+
+
+def test_compaction_moves_delta_into_base(paths):
+    tracking_db_path, index_path, mapping_path = paths
+    add_embeddings(tracking_db_path, list(range(1, 11)))
+    run_incremental(tracking_db_path, index_path, mapping_path)
+    add_embeddings(tracking_db_path, list(range(11, 16)))
+    stats = run_incremental(tracking_db_path, index_path, mapping_path, compact_threshold=1)
+    assert stats["compacted"]
+    assert index_ids(index_path) == set(range(1, 16))
+    assert not os.path.exists(get_delta_index_path(index_path))
+
+
+def test_full_mode_on_id_mapped_index(paths):
+    tracking_db_path, index_path, mapping_path = paths
+    add_embeddings(tracking_db_path, list(range(1, 6)))
+    run_incremental(tracking_db_path, index_path, mapping_path, compact_threshold=1)
+    add_embeddings(tracking_db_path, list(range(6, 16)))
+    stats = indexing.process_in_batches(
+        tracking_db_path=tracking_db_path,
+        index_path=index_path,
+        mapping_path=mapping_path,
+        batch_size=4,
+        total_batches=10,
+        delay_between_batches=0,
+        index_type="flat",
+    )
+    assert stats["added"] == 10
+    assert is_id_mapped(faiss.read_index(index_path))
+    assert index_ids(index_path) == set(range(1, 16))
+    assert not os.path.exists(mapping_path)
+    add_embeddings(tracking_db_path, [16])
+    stats = run_incremental(tracking_db_path, index_path, mapping_path)
+    assert stats["added"] == 1 and "total_vectors" not in stats
+    assert index_ids(index_path) == set(range(1, 16))
+
+
+def test_rebuild_keeps_vectors_appended_during_scan(paths, monkeypatch):
+    tracking_db_path, index_path, mapping_path = paths
+    add_embeddings(tracking_db_path, list(range(1, 11)))
+    run_incremental(tracking_db_path, index_path, mapping_path, compact_threshold=1)
+    add_embeddings(tracking_db_path, list(range(11, 16)))
+    scan = indexing.iter_indexed_embeddings
+
+    def scan_then_append(*args, **kwargs):
+        yield from scan(*args, **kwargs)
+        assert run_incremental(tracking_db_path, index_path, mapping_path)["added"] == 5
+
+    monkeypatch.setattr(indexing, "iter_indexed_embeddings", scan_then_append)
+    indexing.rebuild_id_mapped_index(tracking_db_path, index_path, DIMENSION, index_type="flat", mapping_path=mapping_path)
+    assert index_ids(index_path) == set(range(1, 16))
+    assert not os.path.exists(get_delta_index_path(index_path))
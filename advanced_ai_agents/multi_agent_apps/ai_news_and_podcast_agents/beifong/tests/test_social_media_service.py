@@ -0,0 +1,92 @@
+import asyncio
+import sqlite3
+import pytest
+from fastapi import HTTPException
+import services.social_media_service as social_media_service
+from tools.social.db import check_and_store_post, create_connection, setup_database, update_posts_with_analysis
+
+WORDS = ["rocket", "election", "market", "football", "climate", "python"]
+PER_PAGE = 7
+
+
+class SqliteDatabase:
+    def __init__(self, path):
+        self.path = path
+
+    async def execute_query(self, query, params=(), fetch=False, fetch_one=False):
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+        finally:
+            conn.close()
+        if fetch_one:
+            return rows[0] if rows else None
+        return rows
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "social_media.db")
+    conn = create_connection(db_path)
+    setup_database(conn)
+    post_ids = [f"p{i:03d}" for i in range(60)]
+    for i, post_id in enumerate(post_ids):
+        check_and_store_post(
+            conn,
+            {
+                "post_id": post_id,
+                "platform": "x.com" if i % 2 else "facebook.com",
+                "user_handle": f"user{i % 5}",
+                "user_display_name": f"User {i % 5}",
+                # a few posts share a timestamp and one has none, so the id tie-break and NULL handling matter
+                "post_timestamp": None if i == 13 else f"2025-05-{1 + i // 6:02d}T{i % 3:02d}:00:00.000Z",
+                "post_text": " ".join(WORDS[(i + k) % len(WORDS)] for k in range(3)),
+            },
+        )
+    update_posts_with_analysis(
+        conn,
+        post_ids,
+        [{"post_id": post_id, "sentiment": "positive", "categories": ["news"] if i % 3 else ["sports"], "tags": []} for i, post_id in enumerate(post_ids)],
+    )
+    conn.close()
+    monkeypatch.setattr(social_media_service, "social_media_db", SqliteDatabase(db_path))
+    return social_media_service.SocialMediaService()
+
+
+async def keyset_walk(service, **filters):
+    post_ids, cursor, page = [], None, 1
+    while True:
+        result = await service.get_posts(page=page, per_page=PER_PAGE, cursor=cursor, **filters)
+        post_ids += [post.post_id for post in result.items]
+        if not result.has_next:
+            return post_ids, result.total
+        cursor, page = result.next_cursor, page + 1
+
+
+async def offset_walk(service, **filters):
+    post_ids, page = [], 1
+    while True:
+        result = await service.get_posts(page=page, per_page=PER_PAGE, **filters)
+        post_ids += [post.post_id for post in result.items]
+        if not result.has_next:
+            return post_ids
+        page += 1
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [{}, {"category": "news"}, {"search": "rock"}, {"platform": "x.com", "date_from": "2025-05-03", "date_to": "2025-05-05"}],
+)
+def test_keyset_pages_match_offset_pages(service, filters):
+    keyset_ids, total = asyncio.run(keyset_walk(service, **filters))
+    offset_ids = asyncio.run(offset_walk(service, **filters))
+    assert keyset_ids == offset_ids
+    assert len(set(keyset_ids)) == len(keyset_ids) == total
+    assert total > PER_PAGE
+
+
+def test_invalid_cursor_is_rejected(service):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(service.get_posts(cursor="not-a-cursor"))
+    assert error.value.status_code == 400
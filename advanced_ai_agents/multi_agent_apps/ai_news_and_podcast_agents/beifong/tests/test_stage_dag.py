@@ -0,0 +1,73 @@
+from utils.stage_dag import StageFailed, run_stage_dag, stage
+
+
+def recording_stages(calls, fail=None, optional=()):
+    def runner(name, value):
+        def run(outputs):
+            calls.append(name)
+            if name == fail:
+                raise StageFailed(f"{name} broke")
+            return value(outputs)
+
+        return run
+
+    return [
+        stage("script", runner("script", lambda outputs: "script"), required="script" not in optional),
+        stage("banner", runner("banner", lambda outputs: "banner.png"), deps=("script",), required="banner" not in optional),
+        stage("audio", runner("audio", lambda outputs: outputs["script"] + ".wav"), deps=("script",), required="audio" not in optional),
+        stage("save", runner("save", lambda outputs: (outputs["audio"], outputs["banner"])), deps=("audio", "banner")),
+    ]
+
+
+def test_runs_all_stages_in_dependency_order():
+    calls, checkpoints = [], {}
+    outputs, failures, resumed = run_stage_dag(recording_stages(calls), on_complete=checkpoints.__setitem__)
+    assert failures == {} and resumed == []
+    assert outputs["save"] == ("script.wav", "banner.png")
+    assert calls[0] == "script" and calls[-1] == "save"
+    assert set(checkpoints) == {"script", "banner", "audio", "save"}
+
+
+def test_required_failure_stops_dependents():
+    calls = []
+    outputs, failures, _ = run_stage_dag(recording_stages(calls, fail="audio"))
+    assert failures == {"audio": "audio broke"}
+    assert "save" not in calls and "save" not in outputs
+
+
+def test_optional_failure_leaves_none_for_dependents():
+    calls = []
+    outputs, failures, _ = run_stage_dag(recording_stages(calls, fail="banner", optional=("banner",)))
+    assert failures == {"banner": "banner broke"}
+    assert outputs["banner"] is None
+    assert outputs["save"] == ("script.wav", None)
+
+
+def test_resume_skips_checkpointed_stages():
+    calls = []
+    checkpoints = {"script": "cached", "audio": "cached.wav"}
+    outputs, failures, resumed = run_stage_dag(recording_stages(calls), checkpoints=checkpoints)
+    assert failures == {}
+    assert sorted(resumed) == ["audio", "script"]
+    assert sorted(calls) == ["banner", "save"]
+    assert outputs["save"] == ("cached.wav", "banner.png")
+
+
+def test_invalid_checkpoint_is_run_again():
+    calls = []
+    stages = recording_stages(calls)
+    stages[2]["is_valid"] = lambda output: output.endswith(".wav")
+    outputs, _, resumed = run_stage_dag(stages, checkpoints={"script": "script", "audio": "broken"})
+    assert resumed == ["script"]
+    assert "audio" in calls
+    assert outputs["audio"] == "script.wav"
+
+
+def test_checkpoint_failure_does_not_stop_the_run():
+    def on_complete(name, output):
+        if name == "audio":
+            raise TypeError("Object of type bytes is not JSON serializable")
+
+    outputs, failures, _ = run_stage_dag(recording_stages([]), on_complete=on_complete)
+    assert failures == {}
+    assert outputs["save"] == ("script.wav", "banner.png")
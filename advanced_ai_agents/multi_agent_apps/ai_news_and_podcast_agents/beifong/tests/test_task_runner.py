@@ -0,0 +1,33 @@
+import time
+import pytest
+from utils.task_runner import TaskWorkerPool
+
+MODULE = "tests.pool_task_module"
+
+
+@pytest.fixture
+def pool():
+    pool = TaskWorkerPool(max_workers=2, modules=[MODULE])
+    yield pool
+    pool.shutdown(wait=False)
+
+
+def test_task_can_start_its_own_process_pool(pool):
+    result = pool.submit(f"python -m {MODULE}").result(timeout=60)
+    assert result["status"] == "success", result["error_message"]
+    assert "6" in result["output"].splitlines()
+
+
+def test_failed_exit_code_is_reported(pool):
+    result = pool.submit(f"python -m {MODULE} --fail").result(timeout=60)
+    assert result["status"] == "failed"
+
+
+def test_expire_kills_only_the_overdue_task(pool):
+    slow = pool.submit(f"python -m {MODULE} --sleep")
+    time.sleep(2)
+    fast = pool.submit(f"python -m {MODULE}")
+    assert pool.expire(1) == 1
+    with pytest.raises(TimeoutError):
+        slow.result(timeout=30)
+    assert fast.result(timeout=60)["status"] == "success"
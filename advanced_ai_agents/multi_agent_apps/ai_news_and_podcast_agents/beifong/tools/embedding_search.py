@@ -1,45 +1,49 @@
 from agno.agent import Agent
-import os
+import threading
+from functools import lru_cache
 import numpy as np
-import faiss
 from openai import OpenAI
 from db.config import get_tracking_db_path, get_faiss_db_path, get_sources_db_path
 from db.connection import execute_query
+from db.embedding_cache import normalize_text
 from utils.load_api_keys import load_api_key
+from utils.faiss_index import get_resident_index
 import traceback
 import json
 
 EMBEDDING_MODEL = "text-embedding-3-small"
 
+_openai_clients = {}
+_openai_clients_lock = threading.Lock()
 
-def generate_query_embedding(query_text, model=EMBEDDING_MODEL):
-    try:
-        api_key = load_api_key("OPENAI_API_KEY")
-        if not api_key:
-            return None, "OpenAI API key not found"
-        client = OpenAI(api_key=api_key)
-        response = client.embeddings.create(input=query_text, model=model)
-        return response.data[0].embedding, None
-    except Exception as e:
-        return None, str(e)
 
+def get_openai_client(api_key):
+    client = _openai_clients.get(api_key)
+    if client is None:
+        with _openai_clients_lock:
+            client = _openai_clients.get(api_key)
+            if client is None:
+                client = OpenAI(api_key=api_key)
+                _openai_clients[api_key] = client
+    return client
 
-def load_faiss_index(index_path):
-    if not os.path.exists(index_path):
-        return None, f"FAISS index not found at {index_path}"
-    try:
-        return faiss.read_index(index_path), None
-    except Exception as e:
-        return None, f"Error loading FAISS index: {str(e)}"
+
+# query embeddings stay in process; the embedding_cache table is kept for article texts
+@lru_cache(maxsize=1024)
+def _embed_query(normalized_text, model):
+    api_key = load_api_key("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OpenAI API key not found")
+    client = get_openai_client(api_key)
+    response = client.embeddings.create(input=normalized_text, model=model)
+    return tuple(response.data[0].embedding)
 
 
-def load_id_mapping(mapping_path):
-    if not os.path.exists(mapping_path):
-        return None, f"ID mapping not found at {mapping_path}"
+def generate_query_embedding(query_text, model=EMBEDDING_MODEL):
     try:
-        return np.load(mapping_path).tolist(), None
+        return list(_embed_query(normalize_text(query_text), model)), None
     except Exception as e:
-        return None, f"Error loading ID mapping: {str(e)}"
+        return None, str(e)
 
 
 def get_article_details(tracking_db_path, article_ids):
@@ -80,6 +84,21 @@ def get_source_names(source_ids):
         return {}
 
 
+def semantic_search(query_text, top_k=20):
+    index_path, mapping_path = get_faiss_db_path()
+    resident_index = get_resident_index(index_path, mapping_path)
+    if not resident_index.is_available():
+        return None, "Embedding search not available: index files not found"
+    query_embedding, error = generate_query_embedding(query_text)
+    if not query_embedding:
+        return None, f"Semantic search unavailable: {error}"
+    query_vector = np.array([query_embedding]).astype(np.float32)
+    try:
+        return resident_index.search(query_vector, top_k), None
+    except Exception as e:
+        return None, f"Semantic search unavailable: Error loading FAISS index: {str(e)}"
+
+
 def embedding_search(agent: Agent, prompt: str) -> str:
     """
     Perform a semantic search using embeddings to find articles related to the query on internal articles databse which are crawled from preselected user rss feeds.
@@ -95,31 +114,17 @@ def embedding_search(agent: Agent, prompt: str) -> str:
     """
     print("Embedding Search Input:", prompt)
     tracking_db_path = get_tracking_db_path()
-    index_path, mapping_path = get_faiss_db_path()
     top_k = 20
     similarity_threshold = 0.85
-    if not os.path.exists(index_path) or not os.path.exists(mapping_path):
-        return "Embedding search not available: index files not found. Continuing with other search methods."
-    query_embedding, error = generate_query_embedding(prompt)
-    if not query_embedding:
-        return f"Semantic search unavailable: {error}. Continuing with other search methods."
-    query_vector = np.array([query_embedding]).astype(np.float32)
+    matches, error = semantic_search(prompt, top_k)
+    if matches is None:
+        return f"{error}. Continuing with other search methods."
     try:
-        faiss_index, error = load_faiss_index(index_path)
-        if error:
-            return f"Semantic search unavailable: {error}. Continuing with other search methods."
-        id_map, error = load_id_mapping(mapping_path)
-        if error:
-            return f"Semantic search unavailable: {error}. Continuing with other search methods."
-        distances, indices = faiss_index.search(query_vector, top_k)
         results_with_metrics = []
-        for i, idx in enumerate(indices[0]):
-            if idx >= 0 and idx < len(id_map):
-                distance = float(distances[0][i])
-                similarity = float(np.exp(-distance)) if distance > 0 else 0
-                if similarity >= similarity_threshold:
-                    article_id = id_map[idx]
-                    results_with_metrics.append((idx, distance, similarity, article_id))
+        for idx, (article_id, distance) in enumerate(matches):
+            similarity = float(np.exp(-distance)) if distance > 0 else 0
+            if similarity >= similarity_threshold:
+                results_with_metrics.append((idx, distance, similarity, article_id))
         results_with_metrics.sort(key=lambda x: x[2], reverse=True)
         result_article_ids = [item[3] for item in results_with_metrics]
         if not result_article_ids:
@@ -0,0 +1,102 @@
+import json
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from agno.agent import Agent
+from db.config import get_tracking_db_path
+from db.article_search import has_article_fts, search_articles_ranked
+from tools.embedding_search import get_article_details, get_source_names, semantic_search
+
+RRF_K = 60
+CANDIDATES_PER_RETRIEVER = 50
+DESCRIPTION_CHARS = 300
+
+_executor = ThreadPoolExecutor(max_workers=8)
+
+
+def reciprocal_rank_fusion(ranked_lists, k=RRF_K):
+    scores = {}
+    matched_by = {}
+    for name, ranked_ids in ranked_lists.items():
+        for rank, article_id in enumerate(ranked_ids):
+            scores[article_id] = scores.get(article_id, 0.0) + 1.0 / (k + rank + 1)
+            matched_by.setdefault(article_id, []).append(name)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(article_id, score, matched_by[article_id]) for article_id, score in fused]
+
+
+def semantic_ids(query, limit):
+    matches, error = semantic_search(query, limit)
+    if matches is None:
+        print(f"Hybrid search semantic leg skipped: {error}")
+        return []
+    return [article_id for article_id, _ in matches]
+
+
+def lexical_ids(terms, limit):
+    db_path = get_tracking_db_path()
+    with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as conn:
+        conn.row_factory = sqlite3.Row
+        if not has_article_fts(conn):
+            print("Hybrid search lexical leg skipped: full-text index not built")
+            return []
+        return [row["id"] for row in search_articles_ranked(conn, terms, limit)]
+
+
+def query_terms(query):
+    return [word for word in re.findall(r"\w+", query) if len(word) > 1] or [query]
+
+
+def hybrid_search(agent: Agent, query: str, terms: Optional[List[str]] = None, top_k: int = 10) -> str:
+    """
+    Search the internal articles database (crawled from the user's rss feeds) in one call.
+    Runs semantic (embedding) and keyword (full-text) retrieval together and merges them by rank,
+    so results already account for both meaning and exact keyword matches.
+
+    Args:
+        agent: The agent instance
+        query: The search query or topic in natural language
+        terms: Optional list of keywords or phrases for the keyword search, derived from the query if omitted
+        top_k: Number of results to return (default 10)
+
+    Returns:
+        Compact JSON list of the best matching articles
+    """
+    print(f"Hybrid Search Input: {query} terms: {terms}")
+    terms = terms or query_terms(query)
+    semantic_future = _executor.submit(semantic_ids, query, CANDIDATES_PER_RETRIEVER)
+    lexical_future = _executor.submit(lexical_ids, terms, CANDIDATES_PER_RETRIEVER)
+    ranked_lists = {}
+    for name, future in (("semantic", semantic_future), ("keyword", lexical_future)):
+        try:
+            ranked_lists[name] = future.result()
+        except Exception as e:
+            print(f"Hybrid search {name} leg failed: {str(e)}")
+            ranked_lists[name] = []
+    fused = reciprocal_rank_fusion(ranked_lists)[:top_k]
+    if not fused:
+        return "No relevant articles found in the internal database. Continuing with other search methods."
+    details = {row["id"]: row for row in get_article_details(get_tracking_db_path(), [article_id for article_id, _, _ in fused])}
+    source_names = get_source_names([row.get("source_id") for row in details.values()])
+    results = []
+    for article_id, score, matched_by in fused:
+        row = details.get(article_id)
+        if not row:
+            continue
+        description = row.get("summary") or row.get("content") or ""
+        source_id = str(row.get("source_id", "unknown"))
+        results.append(
+            {
+                "id": article_id,
+                "title": row.get("title") or "Untitled",
+                "url": row.get("url"),
+                "published_date": row.get("published_date"),
+                "description": description[:DESCRIPTION_CHARS],
+                "source_name": source_names.get(source_id, source_id),
+                "matched_by": matched_by,
+                "score": round(score, 4),
+                "is_scrapping_required": False,
+            }
+        )
+    return f"Found {len(results)} internal articles: {json.dumps(results, separators=(',', ':'))}"
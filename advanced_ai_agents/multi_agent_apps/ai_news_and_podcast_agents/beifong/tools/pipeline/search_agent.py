@@ -9,7 +9,7 @@ from textwrap import dedent
 from tools.wikipedia_search import wikipedia_search
 from tools.google_news_discovery import google_news_discovery_run
 from tools.jikan_search import jikan_search
-from tools.embedding_search import embedding_search
+from tools.hybrid_search import hybrid_search
 from tools.social_media_search import social_media_search, social_media_trending_search
 
 
@@ -52,8 +52,9 @@ SEARCH_AGENT_INSTRUCTIONS = dedent("""
     IMPORTANT: User queries might be fuzzy or misspelled. Understand the user's intent and act accordingly.
     IMPORTANT: The output source_name field can be one of ["wikipedia", "general", or any source tag used"].
     IMPORTANT: You have access to different search tools use them when appropriate which one is best for the given search query. Don't use particular tool if not required.
-    IMPORTANT: Make sure you are able to detect what tool to use and use it available tool tags = ["google_news_discovery", "duckduckgo", "wikipedia_search", "jikan_search", "social_media_search", "social_media_trending_search", "unknown"].
+    IMPORTANT: Make sure you are able to detect what tool to use and use it available tool tags = ["google_news_discovery", "duckduckgo", "wikipedia_search", "jikan_search", "social_media_search", "social_media_trending_search", "hybrid_search", "unknown"].
     IMPORTANT: If query is news related please prefere google news over other news tools.
+    IMPORTANT: Use hybrid_search once to check the internal articles database, it already combines semantic and keyword matching.
     IMPORTANT: If returned sources are not of high quality or not relevant to the asked topic, don't include them in the returned sources.
     IMPORTANT: Never include dates to the search query unless user explicitly asks for it.
     IMPORTANT: You are allowed to use appropriate tools to get the best results even the single tool return enough results diverse check is better.
@@ -74,7 +75,7 @@ def search_agent_run(query: str) -> str:
                 DuckDuckGoTools(),
                 wikipedia_search,
                 jikan_search,
-                embedding_search,
+                hybrid_search,
                 social_media_search,
                 social_media_trending_search,
             ],
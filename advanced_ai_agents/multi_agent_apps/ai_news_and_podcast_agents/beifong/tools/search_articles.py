@@ -2,6 +2,7 @@ import sqlite3
 from typing import List, Union
 from agno.agent import Agent
 from db.config import get_tracking_db_path
+from db.article_search import has_article_fts, search_articles_ranked
 import json
 
 
@@ -37,6 +38,8 @@ def search_articles(agent: Agent, terms: Union[str, List[str]]) -> str:
 
 
 def execute_simple_search(conn, terms, limit):
+    if has_article_fts(conn):
+        return search_articles_ranked(conn, terms, limit)
     base_query = """
         SELECT DISTINCT ca.id, ca.title, ca.url, ca.published_date, 
                COALESCE(ca.summary, ca.content) as content,
@@ -1,5 +1,6 @@
 import sqlite3
 import json
+from db.social_posts import create_post_search_tables
 
 
 def create_connection(db_file="x_posts.db"):
@@ -39,10 +40,14 @@ def setup_database(conn):
     """
 
     conn.execute(create_posts_table)
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_platform ON posts(platform)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_user_handle ON posts(user_handle)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_post_timestamp ON posts(post_timestamp)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_sentiment ON posts(sentiment)")
+    conn.execute("DROP INDEX IF EXISTS idx_posts_platform")
+    conn.execute("DROP INDEX IF EXISTS idx_posts_post_timestamp")
+    conn.execute("DROP INDEX IF EXISTS idx_posts_sentiment")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_feed ON posts(post_timestamp, post_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_platform_feed ON posts(platform, post_timestamp, post_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_sentiment_feed ON posts(sentiment, post_timestamp, post_id)")
+    create_post_search_tables(conn)
     conn.commit()
 
 
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from contextlib import contextmanager
 from agno.agent import Agent
 from db.config import get_db_path
+from db.social_posts import POST_FTS_TABLE, build_post_match_query, has_post_fts
 
 
 @contextmanager
@@ -36,25 +37,32 @@ def social_media_search(agent: Agent, topic: str, limit: int = 10) -> str:
         date_from = (datetime.now() - timedelta(days=days_back)).isoformat()
         with get_social_media_db() as conn:
             cursor = conn.cursor()
-            sql_query = """
+            match_query = build_post_match_query(topic)
+            if match_query and has_post_fts(conn):
+                text_filter = f"p.rowid IN (SELECT rowid FROM {POST_FTS_TABLE} WHERE {POST_FTS_TABLE} MATCH ?)"
+                text_params = (match_query,)
+            else:
+                text_filter = "(p.post_text LIKE ? OR p.user_display_name LIKE ?)"
+                text_params = (f"%{topic}%", f"%{topic}%")
+            sql_query = f"""
             SELECT 
-                post_id,
-                user_display_name,
-                post_timestamp,
-                post_url,
-                post_text,
-                platform
-            FROM posts 
+                p.post_id,
+                p.user_display_name,
+                p.post_timestamp,
+                p.post_url,
+                p.post_text,
+                p.platform
+            FROM post_categories pc
+            JOIN posts p ON p.post_id = pc.post_id
             WHERE 
-                categories LIKE '%"news"%' 
-                AND sentiment = 'positive'
-                AND datetime(post_timestamp) >= datetime(?)
-                AND (post_text LIKE ? OR user_display_name LIKE ?)
-            ORDER BY datetime(post_timestamp) DESC
+                pc.category = 'news'
+                AND pc.post_timestamp >= ?
+                AND p.sentiment = 'positive'
+                AND {text_filter}
+            ORDER BY pc.post_timestamp DESC, pc.post_id DESC
             LIMIT ?
             """
-            search_term = f"%{topic}%"
-            cursor.execute(sql_query, (date_from, search_term, search_term, limit))
+            cursor.execute(sql_query, (date_from, *text_params, limit))
             rows = cursor.fetchall()
             if not rows:
                 return f"No positive news posts found for '{topic}' in the last {days_back} days."
@@ -97,22 +105,23 @@ def social_media_trending_search(agent: Agent, limit: int = 10) -> str:
             cursor = conn.cursor()
             trending_sql = """
             SELECT 
-                post_id,
-                user_display_name,
-                post_timestamp,
-                post_url,
-                post_text,
-                platform
-            FROM posts
+                p.post_id,
+                p.user_display_name,
+                p.post_timestamp,
+                p.post_url,
+                p.post_text,
+                p.platform
+            FROM post_categories pc
+            JOIN posts p ON p.post_id = pc.post_id
             WHERE 
-                categories LIKE '%"news"%'
-                AND sentiment = 'positive'
-                AND datetime(post_timestamp) >= datetime(?)
+                pc.category = 'news'
+                AND pc.post_timestamp >= ?
+                AND p.sentiment = 'positive'
             ORDER BY 
-                (COALESCE(engagement_like_count, 0) + 
-                 COALESCE(engagement_retweet_count, 0) + 
-                 COALESCE(engagement_reply_count, 0)) DESC,
-                datetime(post_timestamp) DESC
+                (COALESCE(p.engagement_like_count, 0) + 
+                 COALESCE(p.engagement_retweet_count, 0) + 
+                 COALESCE(p.engagement_reply_count, 0)) DESC,
+                pc.post_timestamp DESC
             LIMIT ?
             """
             cursor.execute(trending_sql, (date_from, limit))
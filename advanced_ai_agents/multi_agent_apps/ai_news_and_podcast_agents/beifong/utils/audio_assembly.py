@@ -0,0 +1,170 @@
+import os
+import uuid
+from math import gcd
+from typing import Optional
+import numpy as np
+import soundfile as sf
+from scipy import signal
+
+ASSEMBLY_BLOCK_FRAMES = 64 * 1024
+RESAMPLER_HALF_LENGTH = 10
+RESAMPLER_KAISER_BETA = 5.0
+RESAMPLER_BATCH_FRAMES = 8192
+
+
+class StreamingResampler:
+    """
+    Polyphase FIR resampler that keeps its input history between chunks, so a signal can
+    be fed in pieces and come out the same as scipy.signal.resample_poly on the whole of it.
+    """
+
+    def __init__(self, orig_sr: int, target_sr: int):
+        divisor = gcd(orig_sr, target_sr)
+        self.up = target_sr // divisor
+        self.down = orig_sr // divisor
+        max_rate = max(self.up, self.down)
+        taps = signal.firwin(2 * RESAMPLER_HALF_LENGTH * max_rate + 1, 1.0 / max_rate, window=("kaiser", RESAMPLER_KAISER_BETA)) * self.up
+        self.delay = (len(taps) - 1) // 2
+        self.num_phases = -(-len(taps) // self.up)
+        padded = np.zeros(self.num_phases * self.up)
+        padded[: len(taps)] = taps
+        # row p holds taps p, p + up, p + 2 * up, ... which is all one output phase ever touches
+        self._phases = padded.reshape(self.num_phases, self.up).T.astype(np.float32)
+        self._offsets = np.arange(self.num_phases)
+        self._buffer = np.zeros(self.num_phases, dtype=np.float32)
+        self._base = -self.num_phases
+        self._next_output = 0
+        self._frames_in = 0
+
+    def _emit(self, output_end: int) -> np.ndarray:
+        available_end = self._base + len(self._buffer)
+        output_end = min(output_end, -(-(available_end * self.up - self.delay) // self.down))
+        chunks = []
+        for start in range(self._next_output, output_end, RESAMPLER_BATCH_FRAMES):
+            positions = np.arange(start, min(start + RESAMPLER_BATCH_FRAMES, output_end)) * self.down + self.delay
+            newest = positions // self.up - self._base
+            window = self._buffer[newest[:, None] - self._offsets[None, :]]
+            chunks.append(np.einsum("ij,ij->i", window, self._phases[positions % self.up]))
+        self._next_output = max(self._next_output, output_end)
+        oldest_needed = (self._next_output * self.down + self.delay) // self.up - (self.num_phases - 1)
+        if oldest_needed > self._base:
+            self._buffer = self._buffer[oldest_needed - self._base :]
+            self._base = oldest_needed
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        samples = np.asarray(samples, dtype=np.float32)
+        self._buffer = np.concatenate([self._buffer, samples])
+        self._frames_in += len(samples)
+        return self._emit(np.iinfo(np.int64).max)
+
+    def flush(self) -> np.ndarray:
+        total_out = -(-self._frames_in * self.up // self.down)
+        if total_out <= self._next_output:
+            return np.zeros(0, dtype=np.float32)
+        last_needed = ((total_out - 1) * self.down + self.delay) // self.up
+        padding = last_needed + 1 - (self._base + len(self._buffer))
+        if padding > 0:
+            self._buffer = np.concatenate([self._buffer, np.zeros(padding, dtype=np.float32)])
+        return self._emit(total_out)
+
+
+class StreamingAudioAssembler:
+    """
+    Build a mono episode on disk piece by piece. Audio is appended to a float scratch file
+    while the running peak is tracked; finish() then rewrites it into output_path in blocks,
+    peak-normalizing the spans added with normalize=True. Memory stays at one block however
+    long the episode is.
+    """
+
+    def __init__(self, output_path: str, sampling_rate: int, peak: float = 0.95, subtype: str = "PCM_16"):
+        self.output_path = output_path
+        self.sampling_rate = sampling_rate
+        self.peak = peak
+        self.subtype = subtype
+        self.frames = 0
+        self._max_amp = 0.0
+        self._spans = []
+        directory, filename = os.path.split(output_path)
+        self._scratch_path = os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.assembly")
+        self._scratch = sf.SoundFile(self._scratch_path, "w", sampling_rate, 1, format="RF64", subtype="FLOAT")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        return False
+
+    def _write(self, samples: np.ndarray, normalize: bool) -> int:
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim == 2:
+            samples = samples.mean(axis=1)
+        if len(samples) == 0:
+            return 0
+        if normalize:
+            self._max_amp = max(self._max_amp, float(np.max(np.abs(samples))))
+        self._scratch.write(samples)
+        start, self.frames = self.frames, self.frames + len(samples)
+        if self._spans and self._spans[-1][2] == normalize:
+            self._spans[-1][1] = self.frames
+        else:
+            self._spans.append([start, self.frames, normalize])
+        return len(samples)
+
+    def add(self, samples: np.ndarray, sampling_rate: Optional[int] = None, normalize: bool = True) -> int:
+        if sampling_rate and sampling_rate != self.sampling_rate:
+            resampler = StreamingResampler(sampling_rate, self.sampling_rate)
+            return self._write(resampler.process(samples), normalize) + self._write(resampler.flush(), normalize)
+        return self._write(samples, normalize)
+
+    def add_silence(self, duration: float) -> int:
+        remaining = int(self.sampling_rate * duration)
+        written = 0
+        while remaining > 0:
+            written += self._write(np.zeros(min(remaining, ASSEMBLY_BLOCK_FRAMES), dtype=np.float32), True)
+            remaining -= ASSEMBLY_BLOCK_FRAMES
+        return written
+
+    def add_file(self, path: str, normalize: bool = False) -> int:
+        written = 0
+        with sf.SoundFile(path) as source:
+            resampler = StreamingResampler(source.samplerate, self.sampling_rate) if source.samplerate != self.sampling_rate else None
+            for block in source.blocks(blocksize=ASSEMBLY_BLOCK_FRAMES, dtype="float32", always_2d=True):
+                mono = block.mean(axis=1)
+                written += self._write(resampler.process(mono) if resampler else mono, normalize)
+            if resampler:
+                written += self._write(resampler.flush(), normalize)
+        return written
+
+    def finish(self) -> Optional[str]:
+        """Normalize the scratch audio into output_path and return it, or None if nothing was added."""
+        self._scratch.close()
+        try:
+            if self.frames == 0:
+                return None
+            gain = self.peak / self._max_amp if self._max_amp > 0 else 1.0
+            directory, filename = os.path.split(self.output_path)
+            temp_path = os.path.join(directory, f".{uuid.uuid4().hex}.{filename}")
+            try:
+                with sf.SoundFile(self._scratch_path) as source, sf.SoundFile(temp_path, "w", self.sampling_rate, 1, subtype=self.subtype) as output:
+                    for start, end, normalize in self._spans:
+                        source.seek(start)
+                        remaining = end - start
+                        while remaining > 0:
+                            block = source.read(min(remaining, ASSEMBLY_BLOCK_FRAMES), dtype="float32")
+                            remaining -= len(block)
+                            output.write(np.clip(block * gain if normalize else block, -1.0, 1.0))
+                os.replace(temp_path, self.output_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+            return self.output_path
+        finally:
+            os.unlink(self._scratch_path)
+
+    def abort(self) -> None:
+        self._scratch.close()
+        if os.path.exists(self._scratch_path):
+            os.unlink(self._scratch_path)
@@ -0,0 +1,115 @@
+import mimetypes
+import os
+import threading
+import uuid
+from typing import Optional
+import numpy as np
+import soundfile as sf
+
+PODCAST_AUDIO_FORMAT = os.environ.get("PODCAST_AUDIO_FORMAT", "mp3")
+RENDITIONS_DIR = "renditions"
+ENCODE_BLOCK_FRAMES = 64 * 1024
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+# compression_level is libsndfile's 0-1 quality knob; these give ~40 kbps MP3 and ~32 kbps Opus for 24 kHz mono speech
+AUDIO_FORMATS = {
+    "mp3": {"extension": ".mp3", "media_type": "audio/mpeg", "format": "MP3", "subtype": "MPEG_LAYER_III", "compression_level": 0.5},
+    "opus": {"extension": ".opus", "media_type": "audio/ogg", "format": "OGG", "subtype": "OPUS", "compression_level": 0.9},
+    "wav": {"extension": ".wav", "media_type": "audio/wav", "format": "WAV", "subtype": "PCM_16", "compression_level": None},
+}
+
+_rendition_locks = {}
+_rendition_locks_lock = threading.Lock()
+
+
+def audio_format_for_path(path: str) -> Optional[str]:
+    extension = os.path.splitext(path)[1].lower()
+    for name, spec in AUDIO_FORMATS.items():
+        if spec["extension"] == extension:
+            return name
+    return None
+
+
+def audio_media_type(path: str) -> str:
+    audio_format = audio_format_for_path(path)
+    if audio_format:
+        return AUDIO_FORMATS[audio_format]["media_type"]
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def _resampled_blocks(source, target_rate):
+    import soxr
+
+    stream = soxr.ResampleStream(source.samplerate, target_rate, source.channels, dtype="float32")
+    for block in source.blocks(blocksize=ENCODE_BLOCK_FRAMES, dtype="float32", always_2d=True):
+        yield stream.resample_chunk(block)
+    yield stream.resample_chunk(np.zeros((0, source.channels), dtype=np.float32), last=True)
+
+
+def encode_audio_file(source_path: str, output_path: str, audio_format: str) -> str:
+    """Encode an audio file block by block so long episodes never have to fit in memory."""
+    spec = AUDIO_FORMATS[audio_format]
+    options = {"format": spec["format"], "subtype": spec["subtype"]}
+    if spec["compression_level"] is not None:
+        options["compression_level"] = spec["compression_level"]
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    temp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with sf.SoundFile(source_path) as source:
+            samplerate = source.samplerate
+            if audio_format == "opus" and samplerate not in OPUS_SAMPLE_RATES:
+                samplerate = 48000
+                blocks = _resampled_blocks(source, samplerate)
+            else:
+                blocks = source.blocks(blocksize=ENCODE_BLOCK_FRAMES, dtype="float32", always_2d=True)
+            with sf.SoundFile(temp_path, "w", samplerate, source.channels, **options) as output:
+                for block in blocks:
+                    output.write(block)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+    return output_path
+
+
+def finalize_podcast_audio(audio_path: str, audio_format: str = PODCAST_AUDIO_FORMAT) -> str:
+    """Replace a freshly rendered WAV with its compressed encoding, keeping the WAV if encoding fails."""
+    if audio_format not in AUDIO_FORMATS or audio_format_for_path(audio_path) != "wav" or audio_format == "wav":
+        return audio_path
+    output_path = os.path.splitext(audio_path)[0] + AUDIO_FORMATS[audio_format]["extension"]
+    try:
+        encode_audio_file(audio_path, output_path, audio_format)
+    except Exception as e:
+        print(f"Could not encode podcast audio to {audio_format}: {e}")
+        return audio_path
+    print(f"Encoded podcast audio to {audio_format}: {os.path.getsize(audio_path)} -> {os.path.getsize(output_path)} bytes")
+    os.remove(audio_path)
+    return output_path
+
+
+def rendition_path(audio_path: str, audio_format: str) -> str:
+    directory, filename = os.path.split(audio_path)
+    return os.path.join(directory, RENDITIONS_DIR, os.path.splitext(filename)[0] + AUDIO_FORMATS[audio_format]["extension"])
+
+
+def get_audio_rendition(audio_path: str, audio_format: str) -> str:
+    """
+    Return a file with the audio in the requested format, encoding it once and reusing
+    the cached rendition until the source file changes.
+    """
+    if audio_format_for_path(audio_path) == audio_format:
+        return audio_path
+    output_path = rendition_path(audio_path, audio_format)
+    with _rendition_locks_lock:
+        lock = _rendition_locks.setdefault(output_path, threading.Lock())
+    with lock:
+        if os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(audio_path):
+            return output_path
+        return encode_audio_file(audio_path, output_path, audio_format)
+
+
+def remove_audio_renditions(audio_path: str) -> None:
+    for audio_format in AUDIO_FORMATS:
+        path = rendition_path(audio_path, audio_format)
+        if os.path.exists(path):
+            os.remove(path)
@@ -1,7 +1,12 @@
 import requests
 from bs4 import BeautifulSoup
 import random
-from typing import Dict, List, TypedDict
+import threading
+import time
+from urllib.parse import urlparse
+from typing import Dict, List, Optional, TypedDict
+import lxml.html
+from requests.adapters import HTTPAdapter
 
 
 class MetadataDict(TypedDict):
@@ -68,3 +73,97 @@ def get_web_data(url: str) -> WebData:
     metadata = extract_meta_tags(soup)
     body = str(soup.find("body"))
     return {"raw_html": body, "metadata": metadata}
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session(pool_maxsize: int = 64) -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=1)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update(HEADERS)
+                _session = session
+    return _session
+
+
+class DomainThrottle:
+    """Caps concurrent requests per domain and spaces out request starts."""
+
+    def __init__(self, max_concurrent: int = 2, min_interval: float = 1.0):
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def _semaphore(self, domain: str) -> threading.Semaphore:
+        with self._lock:
+            if domain not in self._semaphores:
+                self._semaphores[domain] = threading.Semaphore(self.max_concurrent)
+            return self._semaphores[domain]
+
+    def _reserve_start(self, domain: str) -> float:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(domain, 0.0))
+            self._next_start[domain] = start + self.min_interval
+            return start - now
+
+    def run(self, url: str, func, *args, **kwargs):
+        domain = urlparse(url).netloc.lower()
+        with self._semaphore(domain):
+            delay = self._reserve_start(domain)
+            if delay > 0:
+                time.sleep(delay)
+            return func(*args, **kwargs)
+
+
+def fetch_html(url: str, session: Optional[requests.Session] = None, timeout: float = 10) -> str:
+    session = session or get_http_session()
+    response = session.get(url, headers={"User-Agent": random.choice(USER_AGENTS)}, timeout=timeout)
+    return response.text
+
+
+def extract_meta_tags_lxml(tree) -> MetadataDict:
+    metadata: MetadataDict = {
+        "title": "",
+        "description": "",
+        "og": {},
+        "twitter": {},
+        "other_meta": {},
+    }
+    title = tree.findtext(".//title")
+    if title:
+        metadata["title"] = title.strip()
+    for meta in tree.iter("meta"):
+        name = (meta.get("name") or "").lower()
+        prop = (meta.get("property") or "").lower()
+        content = meta.get("content") or ""
+        if prop.startswith("ogg:"):
+            metadata["og"][prop[3:]] = content
+        elif prop.startswith("twitter:") or name.startswith("twitter:"):
+            twitter_key = prop[8:] if prop.startswith("twitter:") else name[8:]
+            metadata["twitter"][twitter_key] = content
+        elif name in ["description", "keywords", "author", "robots", "viewport"]:
+            metadata["other_meta"][name] = content
+            if name == "description":
+                metadata["description"] = content
+    return metadata
+
+
+def parse_web_data(html: str) -> WebData:
+    try:
+        tree = lxml.html.document_fromstring(html)
+        body = tree.find("body")
+        raw_html = lxml.html.tostring(body, encoding="unicode") if body is not None else "None"
+        return {"raw_html": raw_html, "metadata": extract_meta_tags_lxml(tree)}
+    except Exception:
+        soup = BeautifulSoup(html, "html.parser")
+        return {"raw_html": str(soup.find("body")), "metadata": extract_meta_tags(soup)}
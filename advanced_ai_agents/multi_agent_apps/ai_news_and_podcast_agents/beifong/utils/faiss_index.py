@@ -0,0 +1,190 @@
+import fcntl
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+import faiss
+from db.config import get_faiss_db_path
+
+_RESIDENT_INDEXES = {}
+_RESIDENT_INDEXES_LOCK = threading.Lock()
+_held_write_locks = threading.local()
+
+
+def read_index_mmap(index_path):
+    try:
+        return faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except Exception as e:
+        print(f"mmap load not supported for {index_path} ({str(e)}), falling back to full read")
+        return faiss.read_index(index_path)
+
+
+def _file_signature(path):
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except FileNotFoundError:
+        return None
+
+
+def get_delta_index_path(index_path):
+    base, ext = os.path.splitext(index_path)
+    return f"{base}.delta{ext or '.faiss'}"
+
+
+@contextmanager
+def index_write_lock(index_path):
+    """
+    Exclusive lock over an index's files, shared by indexing runs, compactions and background
+    rebuilds in any process. Re-entrant within a thread.
+    """
+    held = getattr(_held_write_locks, "paths", None)
+    if held is None:
+        held = _held_write_locks.paths = {}
+    key = os.path.abspath(index_path)
+    if held.get(key):
+        held[key] += 1
+        try:
+            yield
+        finally:
+            held[key] -= 1
+        return
+    os.makedirs(os.path.dirname(key), exist_ok=True)
+    with open(f"{key}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        held[key] = 1
+        try:
+            yield
+        finally:
+            held[key] = 0
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def is_id_mapped(faiss_index):
+    return isinstance(faiss_index, (faiss.IndexIDMap, faiss.IndexIDMap2))
+
+
+def build_search_params(faiss_index, search_params):
+    if not search_params:
+        return None
+    if is_id_mapped(faiss_index):
+        faiss_index = faiss.downcast_index(faiss_index.index)
+    if "nprobe" in search_params:
+        try:
+            faiss.extract_index_ivf(faiss_index)
+            return faiss.SearchParametersIVF(nprobe=int(search_params["nprobe"]))
+        except RuntimeError:
+            pass
+    if "ef" in search_params and hasattr(faiss_index, "hnsw"):
+        return faiss.SearchParametersHNSW(efSearch=int(search_params["ef"]))
+    return None
+
+
+class ResidentFaissIndex:
+    """Process-resident FAISS index that hot-swaps when the files on disk change."""
+
+    def __init__(self, index_path, mapping_path):
+        self.index_path = index_path
+        self.mapping_path = mapping_path
+        self.delta_path = get_delta_index_path(index_path)
+        self._lock = threading.Lock()
+        self._loaded = None
+
+    def _current_signature(self):
+        return _file_signature(self.index_path), _file_signature(self.mapping_path), _file_signature(self.delta_path)
+
+    def _load(self, signature):
+        index_signature, mapping_signature, delta_signature = signature
+        if index_signature is None:
+            raise FileNotFoundError(f"FAISS index not found at {self.index_path}")
+        faiss_index = read_index_mmap(self.index_path)
+        id_map = None
+        if not is_id_mapped(faiss_index):
+            if mapping_signature is None:
+                raise FileNotFoundError(f"ID mapping not found at {self.mapping_path}")
+            id_map = np.asarray(np.load(self.mapping_path), dtype=np.int64)
+        delta_index = faiss.read_index(self.delta_path) if delta_signature is not None else None
+        delta_total = delta_index.ntotal if delta_index is not None else 0
+        print(f"Loaded resident FAISS index with {faiss_index.ntotal} vectors (+{delta_total} delta) from {self.index_path}")
+        return faiss_index, id_map, delta_index
+
+    def get(self):
+        signature = self._current_signature()
+        loaded = self._loaded
+        if loaded is not None and loaded[0] == signature:
+            return loaded[1]
+        with self._lock:
+            if self._loaded is None or self._loaded[0] != signature:
+                self._loaded = (signature, self._load(signature))
+            return self._loaded[1]
+
+    def is_available(self):
+        return _file_signature(self.index_path) is not None
+
+    def _search_one(self, faiss_index, query_vector, top_k, search_params):
+        params = build_search_params(faiss_index, search_params)
+        if params is not None:
+            return faiss_index.search(query_vector, top_k, params=params)
+        return faiss_index.search(query_vector, top_k)
+
+    def search(self, query_vector, top_k, search_params=None):
+        faiss_index, id_map, delta_index = self.get()
+        query_vector = np.ascontiguousarray(query_vector, dtype=np.float32)
+        distances, labels = self._search_one(faiss_index, query_vector, top_k, search_params)
+        results = []
+        for distance, label in zip(distances[0], labels[0]):
+            if label < 0:
+                continue
+            if id_map is not None:
+                if label >= len(id_map):
+                    continue
+                label = id_map[label]
+            results.append((int(label), float(distance)))
+        if delta_index is not None and delta_index.ntotal > 0:
+            delta_distances, delta_labels = delta_index.search(query_vector, top_k)
+            results.extend((int(label), float(distance)) for distance, label in zip(delta_distances[0], delta_labels[0]) if label >= 0)
+            best = {}
+            for article_id, distance in results:
+                if article_id not in best or distance < best[article_id]:
+                    best[article_id] = distance
+            results = sorted(best.items(), key=lambda item: item[1])[:top_k]
+        return results
+
+    def stats(self):
+        faiss_index, id_map, delta_index = self.get()
+        return {
+            "total_vectors": faiss_index.ntotal,
+            "delta_vectors": delta_index.ntotal if delta_index is not None else 0,
+            "dimension": faiss_index.d,
+            "id_mapped": id_map is None,
+        }
+
+
+def get_resident_index(index_path=None, mapping_path=None):
+    default_index_path, default_mapping_path = get_faiss_db_path()
+    index_path = index_path or default_index_path
+    mapping_path = mapping_path or default_mapping_path
+    key = (os.path.abspath(index_path), os.path.abspath(mapping_path))
+    resident = _RESIDENT_INDEXES.get(key)
+    if resident is None:
+        with _RESIDENT_INDEXES_LOCK:
+            resident = _RESIDENT_INDEXES.get(key)
+            if resident is None:
+                resident = ResidentFaissIndex(index_path, mapping_path)
+                _RESIDENT_INDEXES[key] = resident
+    return resident
+
+
+def warm_resident_index(index_path=None, mapping_path=None):
+    resident = get_resident_index(index_path, mapping_path)
+    if not resident.is_available():
+        print("FAISS index files not found, skipping resident index warm-up")
+        return False
+    try:
+        resident.get()
+        return True
+    except Exception as e:
+        print(f"Error warming resident FAISS index: {str(e)}")
+        return False
@@ -0,0 +1,60 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+import aiohttp
+from utils.rss_feed_parser import parse_feed_content
+
+FEED_USER_AGENT = "Mozilla/5.0 (compatible; BeifongFeedFetcher/1.0)"
+FEED_ACCEPT = "application/rss+xml, application/atom+xml, application/xml;q=0.9, text/xml;q=0.8, */*;q=0.5"
+
+
+def build_conditional_headers(tracking_info: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    headers = {"User-Agent": FEED_USER_AGENT, "Accept": FEED_ACCEPT}
+    if tracking_info:
+        if tracking_info.get("last_etag"):
+            headers["If-None-Match"] = tracking_info["last_etag"]
+        if tracking_info.get("last_modified"):
+            headers["If-Modified-Since"] = tracking_info["last_modified"]
+    return headers
+
+
+async def _fetch_one(session, feed, tracking_info, parse_pool):
+    feed_url = feed["feed_url"]
+    try:
+        async with session.get(feed_url, headers=build_conditional_headers(tracking_info)) as response:
+            if response.status == 304:
+                return feed, {"is_rss_feed": True, "status": 304}, None
+            if response.status >= 400:
+                return feed, None, f"HTTP {response.status}"
+            content = await response.read()
+            response_headers = {key.lower(): value for key, value in response.headers.items()}
+            response_headers.setdefault("content-location", str(response.url))
+    except Exception as e:
+        return feed, None, str(e) or e.__class__.__name__
+    try:
+        loop = asyncio.get_running_loop()
+        feed_data = await loop.run_in_executor(parse_pool, parse_feed_content, content, response_headers)
+        return feed, feed_data, None
+    except Exception as e:
+        return feed, None, f"Parse error: {str(e)}"
+
+
+async def fetch_feeds(
+    feeds: List[Dict[str, Any]],
+    tracking_by_feed: Dict[int, Dict[str, Any]],
+    max_connections: int = 100,
+    per_host_limit: int = 2,
+    timeout: float = 20,
+    parse_workers: Optional[int] = None,
+):
+    connector = aiohttp.TCPConnector(limit=max_connections, limit_per_host=per_host_limit, ttl_dns_cache=300)
+    client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+    with ProcessPoolExecutor(max_workers=parse_workers or os.cpu_count()) as parse_pool:
+        async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+            tasks = [_fetch_one(session, feed, tracking_by_feed.get(feed["id"]), parse_pool) for feed in feeds]
+            return await asyncio.gather(*tasks)
+
+
+def fetch_feeds_concurrently(feeds, tracking_by_feed, **kwargs):
+    return asyncio.run(fetch_feeds(feeds, tracking_by_feed, **kwargs))
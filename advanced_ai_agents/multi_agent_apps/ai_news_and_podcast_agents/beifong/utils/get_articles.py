@@ -3,6 +3,7 @@ import openai
 import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
+from db.article_search import has_article_fts, search_articles_by_category, search_articles_ranked
 
 TOPIC_EXTRACTION_MODEL = "gpt-4o-mini"
 
@@ -99,6 +100,12 @@ def _execute_search(
             from_date = adjusted_date
         except Exception as e:
             print(f"Warning: Could not adjust date with fallback: {e}")
+    if has_article_fts(cursor.connection):
+        results = search_articles_ranked(cursor.connection, terms, limit, operator, from_date, prefix=partial_match)
+        if use_categories and len(results) < limit:
+            seen = [article["id"] for article in results]
+            results.extend(search_articles_by_category(cursor.connection, terms, limit - len(results), from_date, seen))
+        return results
     base_query = """
         SELECT DISTINCT ca.id, ca.title, ca.url, ca.published_date, ca.summary as content, 
                ca.source_id, ca.feed_id
@@ -47,10 +47,9 @@ def is_rss_feed(feed_data: Any) -> bool:
     return feed_data.bozo and hasattr(feed_data, "bozo_exception")
 
 
-def get_feed_data(
-    feed_url: str, etag: Optional[str] = None, modified: Optional[Any] = None
+def build_feed_data(
+    feed_data: Any, status: Optional[int] = None, etag: Optional[str] = None, modified: Optional[str] = None
 ) -> Dict[str, Any]:
-    feed_data = feedparser.parse(feed_url, etag=etag, modified=modified)
     if is_rss_feed(feed_data):
         return {
             "is_rss_feed": False,
@@ -60,9 +59,9 @@ def get_feed_data(
             "current_hash": None,
             "etag": None,
         }
-    status = feed_data.get("status", 200)
-    etag = feed_data.get("etag", None)
-    modified = feed_data.get("modified")
+    status = feed_data.get("status", status or 200)
+    etag = feed_data.get("etag", etag)
+    modified = feed_data.get("modified", modified)
     entries = feed_data.get("entries", [])
     parsed_entries = parse_feed_entries(entries)
     current_hash = get_hash(parsed_entries)
@@ -74,3 +73,20 @@ def get_feed_data(
         "etag": etag,
         "is_rss_feed": True,
     }
+
+
+def get_feed_data(
+    feed_url: str, etag: Optional[str] = None, modified: Optional[Any] = None
+) -> Dict[str, Any]:
+    feed_data = feedparser.parse(feed_url, etag=etag, modified=modified)
+    return build_feed_data(feed_data)
+
+
+def parse_feed_content(content: bytes, response_headers: Dict[str, str]) -> Dict[str, Any]:
+    feed_data = feedparser.parse(content, response_headers=response_headers)
+    return build_feed_data(
+        feed_data,
+        status=200,
+        etag=response_headers.get("etag"),
+        modified=response_headers.get("last-modified"),
+    )
@@ -0,0 +1,75 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class StageFailed(Exception):
+    """Raised by a stage to fail with a message that is reported as is."""
+
+
+def stage(name, run, deps=(), label=None, required=True, checkpoint=True, is_valid=None):
+    return {
+        "name": name,
+        "run": run,
+        "deps": tuple(deps),
+        "label": label or name,
+        "required": required,
+        "checkpoint": checkpoint,
+        "is_valid": is_valid,
+    }
+
+
+def run_stage_dag(stages, checkpoints=None, on_complete=None, max_workers=4):
+    """
+    Run stages as soon as their dependencies have completed, independent ones concurrently.
+
+    Each stage's run callable receives the outputs of all completed stages. Stages found
+    in checkpoints are not run again. A failed required stage stops new stages from being
+    scheduled; a failed optional stage leaves its output as None for its dependents.
+    An on_complete failure is logged and only loses that stage's checkpoint.
+
+    Returns (outputs, failures, resumed).
+    """
+    checkpoints = checkpoints or {}
+    by_name = {item["name"]: item for item in stages}
+    outputs, failures, resumed = {}, {}, []
+    for item in stages:
+        if not item["checkpoint"] or item["name"] not in checkpoints:
+            continue
+        output = checkpoints[item["name"]]
+        if item["is_valid"] is None or item["is_valid"](output):
+            outputs[item["name"]] = output
+            resumed.append(item["name"])
+    pending = [item["name"] for item in stages if item["name"] not in outputs]
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            blocked = any(by_name[name]["required"] for name in failures)
+            for name in list(pending):
+                if blocked:
+                    break
+                if all(dep in outputs for dep in by_name[name]["deps"]):
+                    pending.remove(name)
+                    in_flight[executor.submit(by_name[name]["run"], dict(outputs))] = name
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = in_flight.pop(future)
+                item = by_name[name]
+                try:
+                    output = future.result()
+                except StageFailed as e:
+                    failures[name] = str(e)
+                except Exception as e:
+                    failures[name] = f"{item['label']} failed: {str(e)}"
+                else:
+                    outputs[name] = output
+                    if on_complete and item["checkpoint"]:
+                        try:
+                            on_complete(name, output)
+                        except Exception as e:
+                            print(f"WARNING: Could not checkpoint stage {name}, continuing without it: {str(e)}")
+                    continue
+                print(f"ERROR: {failures[name]}")
+                if not item["required"]:
+                    outputs[name] = None
+    return outputs, failures, resumed
@@ -0,0 +1,158 @@
+import json
+import os
+import queue
+import threading
+import time
+import redis
+
+PIPELINE_STAGES = ("crawl", "analysis", "embedding", "faiss")
+QUEUE_KEY_PREFIX = "beifong:pipeline"
+PIPELINE_QUEUE_BACKEND = os.environ.get("PIPELINE_QUEUE_BACKEND", "auto")
+# set where processors/pipeline_worker.py is deployed; without a consumer nothing is queued, and
+# with it the scheduler leaves the worker's stages to the worker so two runners never claim the same rows
+PIPELINE_WORKER_ENABLED = os.environ.get("PIPELINE_WORKER_ENABLED", "").lower() in ("1", "true", "yes")
+PIPELINE_STAGE_MODULES = {
+    "crawl": "processors.url_processor",
+    "analysis": "processors.ai_analysis_processor",
+    "embedding": "processors.embedding_processor",
+    "faiss": "processors.faiss_indexing_processor",
+}
+# items only wake the next stage up, so the oldest can be dropped when a queue backs up
+PIPELINE_QUEUE_MAX_ITEMS = int(os.environ.get("PIPELINE_QUEUE_MAX_ITEMS", 10000))
+
+_queues = {}
+_queues_lock = threading.Lock()
+_redis_client = None
+_redis_unavailable = False
+_publishing_enabled = PIPELINE_WORKER_ENABLED
+
+
+class LocalStageQueue:
+    """In-process stand-in for the Redis stage queue."""
+
+    backend = "local"
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._queue = queue.Queue(maxsize=PIPELINE_QUEUE_MAX_ITEMS)
+
+    def publish(self, items):
+        for item in items:
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    self.drain(1)
+
+    def consume(self, max_items=1000, timeout=None):
+        try:
+            items = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        return items + self.drain(max_items - 1)
+
+    def drain(self, max_items=1000):
+        items = []
+        while len(items) < max_items:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def size(self):
+        return self._queue.qsize()
+
+
+class RedisStageQueue:
+    """Redis list per stage; items are JSON encoded work ids."""
+
+    backend = "redis"
+
+    def __init__(self, stage, client):
+        self.stage = stage
+        self.client = client
+        self.key = f"{QUEUE_KEY_PREFIX}:{stage}"
+
+    def publish(self, items):
+        if items:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.rpush(self.key, *[json.dumps(item) for item in items])
+            pipe.ltrim(self.key, -PIPELINE_QUEUE_MAX_ITEMS, -1)
+            pipe.execute()
+
+    def consume(self, max_items=1000, timeout=None):
+        popped = self.client.blpop([self.key], timeout=max(1, int(timeout)) if timeout else 0)
+        if not popped:
+            return []
+        return [json.loads(popped[1])] + self.drain(max_items - 1)
+
+    def drain(self, max_items=1000):
+        if max_items < 1:
+            return []
+        return [json.loads(value) for value in self.client.lpop(self.key, max_items) or []]
+
+    def size(self):
+        return self.client.llen(self.key)
+
+
+def get_redis_client():
+    host = os.environ.get("REDIS_HOST", "localhost")
+    port = int(os.environ.get("REDIS_PORT", 6379))
+    db = int(os.environ.get("REDIS_DB", 0))
+    client = redis.Redis(host=host, port=port, db=db + 1, socket_connect_timeout=2)
+    client.ping()
+    return client
+
+
+def _create_queue(stage):
+    global _redis_client, _redis_unavailable
+    if PIPELINE_QUEUE_BACKEND != "local" and not _redis_unavailable:
+        try:
+            if _redis_client is None:
+                _redis_client = get_redis_client()
+            return RedisStageQueue(stage, _redis_client)
+        except redis.RedisError as e:
+            if PIPELINE_QUEUE_BACKEND == "redis":
+                raise
+            _redis_unavailable = True
+            print(f"Redis unavailable for pipeline queues ({str(e)}), using in-process queues")
+    return LocalStageQueue(stage)
+
+
+def get_stage_queue(stage):
+    stage_queue = _queues.get(stage)
+    if stage_queue is None:
+        with _queues_lock:
+            stage_queue = _queues.get(stage)
+            if stage_queue is None:
+                stage_queue = _create_queue(stage)
+                _queues[stage] = stage_queue
+    return stage_queue
+
+
+def enable_stage_publishing():
+    global _publishing_enabled
+    _publishing_enabled = True
+
+
+def publish_stage_items(stage, items):
+    items = list(items)
+    if not items or not _publishing_enabled:
+        return 0
+    try:
+        get_stage_queue(stage).publish(items)
+        return len(items)
+    except Exception as e:
+        print(f"Could not publish {len(items)} items to {stage} queue: {str(e)}")
+        return 0
+
+
+def wait_for_stage_items(stage, timeout, max_items=1000, settle_seconds=0.0):
+    stage_queue = get_stage_queue(stage)
+    items = stage_queue.consume(max_items=max_items, timeout=timeout)
+    if items and settle_seconds:
+        time.sleep(settle_seconds)
+        items.extend(stage_queue.drain(max_items))
+    return items
@@ -0,0 +1,282 @@
+import collections
+import importlib
+import io
+import multiprocessing
+import os
+import resource
+import runpy
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from contextlib import redirect_stderr, redirect_stdout
+from models.tasks_schemas import TASK_TYPES
+
+PYTHON_EXECUTABLES = {"python", "python3", sys.executable}
+
+
+def parse_module_command(command):
+    try:
+        parts = shlex.split(command)
+    except ValueError:
+        return None
+    if len(parts) < 3 or parts[0] not in PYTHON_EXECUTABLES or parts[1] != "-m":
+        return None
+    return parts[2], parts[3:]
+
+
+def get_registered_modules():
+    modules = set()
+    for task_type in TASK_TYPES.values():
+        parsed = parse_module_command(task_type["command"])
+        if parsed:
+            modules.add(parsed[0])
+    return modules
+
+
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def read_peak_rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def build_output(stdout, stderr):
+    return f"STDOUT:\n{stdout}\n\nSTDERR:\n{stderr}" if stderr else stdout
+
+
+def warm_worker(modules):
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except BaseException as e:
+            print(f"WARNING: Could not preload {module}: {str(e)}")
+
+
+def run_module_in_process(module, argv):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    reset_peak_rss()
+    cpu_start = time.process_time()
+    status, error_message = "success", None
+    saved_argv = sys.argv
+    sys.argv = [module, *argv]
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            runpy.run_module(module, run_name="__main__", alter_sys=True)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            status, error_message = "failed", stderr.getvalue() or f"Process exited with code {e.code}"
+    except BaseException:
+        status, error_message = "failed", traceback.format_exc()
+    finally:
+        sys.argv = saved_argv
+    return {
+        "status": status,
+        "error_message": error_message,
+        "output": build_output(stdout.getvalue(), stderr.getvalue()),
+        "cpu_time": time.process_time() - cpu_start,
+        "peak_rss_kb": read_peak_rss_kb(),
+    }
+
+
+def run_command_subprocess(command, timeout):
+    process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    streams = {}
+    readers = [
+        threading.Thread(target=lambda name, stream: streams.__setitem__(name, stream.read()), args=(name, stream), daemon=True)
+        for name, stream in (("stdout", process.stdout), ("stderr", process.stderr))
+    ]
+    for reader in readers:
+        reader.start()
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        _, wait_status, usage = os.wait4(process.pid, 0)
+    finally:
+        timer.cancel()
+    process.returncode = os.waitstatus_to_exitcode(wait_status)
+    for reader in readers:
+        reader.join()
+    stdout, stderr = streams.get("stdout", ""), streams.get("stderr", "")
+    if timed_out.is_set():
+        status, error_message = "failed", f"Task timed out after {timeout} seconds"
+    elif process.returncode == 0:
+        status, error_message = "success", None
+    else:
+        status, error_message = "failed", stderr if stderr else f"Process exited with code {process.returncode}"
+    return {
+        "status": status,
+        "error_message": error_message,
+        "output": build_output(stdout, stderr),
+        "cpu_time": usage.ru_utime + usage.ru_stime,
+        "peak_rss_kb": usage.ru_maxrss,
+    }
+
+
+def worker_main(conn, modules):
+    # own process group, so killing an overdue worker also stops the processes its task started
+    os.setpgrp()
+    warm_worker(modules)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        conn.send(run_module_in_process(*task))
+
+
+class PoolWorker:
+    def __init__(self, context, modules):
+        self.conn, child_conn = context.Pipe()
+        # not daemonic: pipeline tasks start process pools of their own
+        self.process = context.Process(target=worker_main, args=(child_conn, modules))
+        self.process.start()
+        child_conn.close()
+        self.future = None
+        self.started = None
+        self.tasks_run = 0
+        self.timed_out = None
+
+    def kill(self):
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            self.process.kill()
+
+
+class TaskWorkerPool:
+    """
+    Long-lived spawn workers that keep pipeline imports warm between task runs. Each worker
+    runs one task at a time over its own pipe, so an overdue task can be killed and its
+    worker replaced without touching the others.
+    """
+
+    def __init__(self, max_workers=5, max_tasks_per_child=50, modules=None):
+        self.max_workers = max_workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.modules = set(modules) if modules is not None else get_registered_modules()
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._pending = collections.deque()
+        self._workers = []
+        self._shutdown = False
+
+    def supports(self, command):
+        parsed = parse_module_command(command)
+        return parsed is not None and parsed[0] in self.modules
+
+    def submit(self, command):
+        module, argv = parse_module_command(command)
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Worker pool is shut down")
+            self._pending.append((future, (module, argv)))
+            self._dispatch()
+        return future
+
+    def _spawn(self):
+        worker = PoolWorker(self._context, sorted(self.modules))
+        self._workers.append(worker)
+        threading.Thread(target=self._collect, args=(worker,), name=f"task-worker-{worker.process.pid}", daemon=True).start()
+        return worker
+
+    def _dispatch(self):
+        while self._pending:
+            idle = next((worker for worker in self._workers if worker.future is None), None)
+            if idle is None:
+                if len(self._workers) >= self.max_workers:
+                    return
+                idle = self._spawn()
+            future, task = self._pending.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            idle.future, idle.started = future, time.monotonic()
+            try:
+                idle.conn.send(task)
+            except OSError:
+                pass  # the worker died; its collector fails the future
+
+    def _collect(self, worker):
+        while True:
+            try:
+                result = worker.conn.recv()
+            except (EOFError, OSError):
+                result = None
+            with self._lock:
+                future, worker.future, worker.started = worker.future, None, None
+                retire = result is None
+                if result is not None:
+                    worker.tasks_run += 1
+                    if worker.tasks_run >= self.max_tasks_per_child:
+                        retire = True
+                        worker.conn.send(None)
+                if retire:
+                    self._workers.remove(worker)
+                if not self._shutdown:
+                    self._dispatch()
+            if future is not None:
+                if result is not None:
+                    future.set_result(result)
+                elif worker.timed_out:
+                    future.set_exception(TimeoutError(f"Task timed out after {worker.timed_out} seconds"))
+                else:
+                    future.set_exception(RuntimeError(f"Worker process exited with code {worker.process.exitcode}"))
+            if retire:
+                worker.process.join()
+                worker.conn.close()
+                return
+
+    def expire(self, timeout):
+        """Kill the workers whose current task has run longer than timeout; other tasks keep running."""
+        now = time.monotonic()
+        with self._lock:
+            overdue = [worker for worker in self._workers if worker.started is not None and now - worker.started > timeout]
+            for worker in overdue:
+                print(f"WARNING: Task in worker {worker.process.pid} exceeded {timeout}s, killing it")
+                worker.timed_out = timeout
+                worker.kill()
+        return len(overdue)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            self._shutdown = True
+            pending, self._pending = list(self._pending), collections.deque()
+            workers = list(self._workers)
+        for future, _ in pending:
+            future.cancel()
+        for worker in workers:
+            if wait:
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+            else:
+                worker.kill()
+        for worker in workers:
+            worker.process.join()
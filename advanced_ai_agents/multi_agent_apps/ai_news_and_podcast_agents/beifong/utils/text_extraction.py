@@ -0,0 +1,128 @@
+import re
+import lxml.html
+import tiktoken
+
+EXTRACTOR_VERSION = 1
+PROMPT_ENCODING_MODEL = "gpt-4o"
+NOISE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "iframe", "svg", "button", "template"]
+NOISE_HINTS = re.compile(r"comment|sidebar|footer|header|menu|nav|promo|related|share|social|subscribe|cookie|banner|advert|popup", re.I)
+CONTENT_HINTS = re.compile(r"article|content|entry|main|post|story|text|body", re.I)
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "h1", "h2", "h3", "h4", "blockquote", "pre", "td"}
+
+_encoding = None
+
+
+def get_encoding():
+    global _encoding
+    if _encoding is None:
+        _encoding = tiktoken.encoding_for_model(PROMPT_ENCODING_MODEL)
+    return _encoding
+
+
+def truncate_to_tokens(text, max_tokens):
+    tokens = get_encoding().encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text, len(tokens)
+    return get_encoding().decode(tokens[:max_tokens]), max_tokens
+
+
+def _class_weight(element):
+    hints = f"{element.get('class', '')} {element.get('id', '')}"
+    weight = 0
+    if CONTENT_HINTS.search(hints):
+        weight += 25
+    if NOISE_HINTS.search(hints):
+        weight -= 25
+    return weight
+
+
+def _link_density(element):
+    text_length = len(element.text_content())
+    if not text_length:
+        return 1.0
+    link_length = sum(len(link.text_content()) for link in element.iter("a"))
+    return link_length / text_length
+
+
+def _best_candidate(root):
+    for tag in ("article", "main"):
+        candidates = [element for element in root.iter(tag) if len(element.text_content().strip()) > 500]
+        if candidates:
+            return max(candidates, key=lambda element: len(element.text_content()))
+    scores = {}
+    for paragraph in root.iter("p", "pre", "blockquote"):
+        text = paragraph.text_content().strip()
+        if len(text) < 25:
+            continue
+        score = 1 + text.count(",") + min(len(text) // 100, 3)
+        parent = paragraph.getparent()
+        if parent is None:
+            continue
+        scores[parent] = scores.get(parent, _class_weight(parent)) + score
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] = scores.get(grandparent, _class_weight(grandparent)) + score / 2
+    if not scores:
+        return None
+    return max(scores, key=lambda element: scores[element] * (1 - _link_density(element)))
+
+
+def _block_text(element):
+    lines = []
+
+    def flush(parts):
+        text = " ".join("".join(parts).split())
+        if text:
+            lines.append(text)
+        parts.clear()
+
+    def walk(node, parts):
+        if node.text and isinstance(node.tag, str):
+            parts.append(node.text)
+        for child in node:
+            if child.tag in BLOCK_TAGS:
+                flush(parts)
+                child_parts = []
+                walk(child, child_parts)
+                flush(child_parts)
+            elif child.tag == "br":
+                parts.append(" ")
+            elif isinstance(child.tag, str):
+                walk(child, parts)
+            if child.tail:
+                parts.append(child.tail)
+
+    parts = []
+    walk(element, parts)
+    flush(parts)
+    if not lines:
+        lines = [line.strip() for line in element.text_content().splitlines() if line.strip()]
+    return "\n".join(lines)
+
+
+def extract_main_text(raw_html):
+    if not raw_html or not raw_html.strip():
+        return ""
+    try:
+        root = lxml.html.fromstring(raw_html)
+    except (lxml.etree.ParserError, ValueError):
+        return ""
+    for element in root.xpath("//" + " | //".join(NOISE_TAGS)):
+        element.drop_tree()
+    for element in root.xpath("//*[@class or @id]"):
+        if element.getparent() is not None and NOISE_HINTS.search(f"{element.get('class', '')} {element.get('id', '')}") and _link_density(element) > 0.5:
+            element.drop_tree()
+    candidate = _best_candidate(root)
+    text = _block_text(candidate) if candidate is not None else ""
+    if len(text) < 200:
+        text = _block_text(root)
+    return text
+
+
+def extract_for_prompt(raw_html, max_tokens=8000):
+    try:
+        text = extract_main_text(raw_html)
+    except Exception as e:
+        print(f"Error extracting article text: {str(e)}")
+        text = ""
+    return truncate_to_tokens(text, max_tokens)
@@ -1,17 +1,60 @@
 # ruff: noqa: E402
 import os
+import threading
 import warnings
-from typing import List, Any
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Iterator, List, Optional
 import numpy as np
-import soundfile as sf
+from .audio_assembly import StreamingAudioAssembler
 from .translate_podcast import translate_script
+from .tts_cache import segment_cache_key
 
 os.environ["PYTHONWARNINGS"] = "ignore"
 os.environ["TORCH_CPP_LOG_LEVEL"] = "ERROR"
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
 warnings.filterwarnings("ignore")
 
-from kokoro import KPipeline
+from kokoro import KModel, KPipeline
+
+KOKORO_REPO_ID = "hexgrad/Kokoro-82M"
+# each worker process loads its own KModel and torch runtime
+KOKORO_WORKER_MEMORY_BYTES = int(os.environ.get("KOKORO_WORKER_MEMORY_BYTES", 1536 * 1024 * 1024))
+
+
+def get_memory_limit_bytes() -> Optional[int]:
+    """The container's cgroup memory limit, or the machine's physical memory."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value.isdigit() and int(value) < 1 << 60:
+            return int(value)
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def default_kokoro_workers() -> int:
+    workers = min(4, (os.cpu_count() or 1) // 2)
+    memory_limit = get_memory_limit_bytes()
+    if memory_limit is not None:
+        # leave room for the parent process alongside the workers
+        workers = min(workers, memory_limit // KOKORO_WORKER_MEMORY_BYTES - 1)
+    return max(1, workers)
+
+
+KOKORO_WORKERS = int(os.environ.get("KOKORO_WORKERS", default_kokoro_workers()))
+KOKORO_BATCH_SIZE = int(os.environ.get("KOKORO_BATCH_SIZE", 8))
+
+_model = None
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+_engine = None
 
 
 class ScriptEntry:
@@ -20,16 +63,16 @@ class ScriptEntry:
         self.speaker = speaker
 
 
-def create_slience_audio(silence_duration: float, sampling_rate: int) -> np.ndarray:
-    return np.zeros(int(sampling_rate * silence_duration), dtype=np.float32)
-
-
-def text_to_speech(pipeline: KPipeline, text: str, speaker_id: int, sampling_rate: int, lang_code: str) -> np.ndarray:
+def get_kokoro_voice(speaker_id: int, lang_code: str) -> str:
     if lang_code == "h":
         voices = {1: "hf_alpha", 2: "hm_omega"}
     else:
         voices = {1: "af_heart", 2: "bm_lewis"}
-    voice = voices[speaker_id]
+    return voices[speaker_id]
+
+
+def text_to_speech(pipeline: KPipeline, text: str, speaker_id: int, sampling_rate: int, lang_code: str) -> np.ndarray:
+    voice = get_kokoro_voice(speaker_id, lang_code)
     audio_chunks = []
     for _, _, audio in pipeline(text, voice=voice, speed=1.0):
         if audio is not None:
@@ -43,46 +86,127 @@ def text_to_speech(pipeline: KPipeline, text: str, speaker_id: int, sampling_rat
         return np.zeros(0, dtype=np.float32)
 
 
-def create_audio_segments(
-    pipeline: KPipeline,
+def get_kokoro_pipeline(lang_code: str) -> KPipeline:
+    global _model
+    with _pipelines_lock:
+        pipeline = _pipelines.get(lang_code)
+        if pipeline is None:
+            if _model is None:
+                _model = KModel(repo_id=KOKORO_REPO_ID).eval()
+            pipeline = KPipeline(lang_code=lang_code, repo_id=KOKORO_REPO_ID, model=_model)
+            _pipelines[lang_code] = pipeline
+        return pipeline
+
+
+def init_kokoro_worker(torch_threads: int) -> None:
+    import torch
+
+    torch.set_num_threads(torch_threads)
+
+
+def synthesize_lines(lang_code: str, lines: List[tuple], sampling_rate: int) -> List[np.ndarray]:
+    pipeline = get_kokoro_pipeline(lang_code)
+    return [text_to_speech(pipeline, text, speaker, sampling_rate=sampling_rate, lang_code=lang_code) for text, speaker in lines]
+
+
+class KokoroEngine:
+    """Long-lived Kokoro service; each worker process keeps one loaded pipeline per language code."""
+
+    def __init__(self, workers: int = KOKORO_WORKERS, batch_size: int = KOKORO_BATCH_SIZE):
+        self.workers = workers
+        self.batch_size = batch_size
+        self._executor = None
+        self._pool_unavailable = False
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None and self.workers > 1 and not self._pool_unavailable:
+                torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_kokoro_worker,
+                    initargs=(torch_threads,),
+                )
+            return self._executor
+
+    def synthesize(self, lang_code: str, lines: List[tuple], sampling_rate: int) -> List[np.ndarray]:
+        if len(lines) <= 1:
+            return synthesize_lines(lang_code, lines, sampling_rate)
+        batch_size = max(1, min(self.batch_size, -(-len(lines) // self.workers)))
+        batches = [lines[i : i + batch_size] for i in range(0, len(lines), batch_size)]
+        try:
+            # the pool starts its processes on submit, which fails in a daemonic parent or when spawn does
+            executor = self._get_executor()
+            futures = [executor.submit(synthesize_lines, lang_code, batch, sampling_rate) for batch in batches] if executor else None
+        except Exception as e:
+            print(f"Kokoro worker pool could not start ({e!r}), rendering in process from now on")
+            with self._lock:
+                self._pool_unavailable = True
+            self.shutdown()
+            futures = None
+        if futures is None:
+            return synthesize_lines(lang_code, lines, sampling_rate)
+        try:
+            return [audio for future in futures for audio in future.result()]
+        except BrokenProcessPool as e:
+            print(f"Kokoro worker pool failed ({e}), rendering in process")
+            self.shutdown()
+            return synthesize_lines(lang_code, lines, sampling_rate)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+
+def get_kokoro_engine() -> KokoroEngine:
+    global _engine
+    with _pipelines_lock:
+        if _engine is None:
+            _engine = KokoroEngine()
+        return _engine
+
+
+def iter_audio_segments(
+    engine: KokoroEngine,
     script: Any,
-    silence_duration: float,
     sampling_rate: int,
     lang_code: str,
-) -> List[np.ndarray]:
-    audio_segments = []
-    silence = create_slience_audio(silence_duration, sampling_rate)
+    segment_cache=None,
+) -> Iterator[np.ndarray]:
+    """Yield each line's audio in script order, rendering uncached lines one engine-sized window at a time."""
     entries = script if isinstance(script, list) else script.entries
+    lines = []
     for entry in entries:
         text = entry["text"] if isinstance(entry, dict) else entry.text
         speaker = entry["speaker"] if isinstance(entry, dict) else entry.speaker
-        segment_audio = text_to_speech(
-            pipeline,
-            text,
-            speaker,
-            sampling_rate=sampling_rate,
-            lang_code=lang_code,
-        )
-        if len(segment_audio) > 0:
-            try:
-                audio_segments.append(segment_audio)
-            except Exception:
-                fallback_silence = create_slience_audio(len(text) * 0.1, sampling_rate)
-                audio_segments.append(fallback_silence)
-            audio_segments.append(silence)
-    return audio_segments
-
-
-def combine_full_segments(audio_segments: List[np.ndarray]) -> np.ndarray:
-    full_audio = np.concatenate(audio_segments)
-    max_amp = np.max(np.abs(full_audio))
-    if max_amp > 0:
-        full_audio = full_audio / max_amp * 0.9
-    return full_audio
-
-
-def write_to_disk(output_path: str, full_audio: np.ndarray, sampling_rate: int) -> None:
-    return sf.write(output_path, full_audio, sampling_rate, subtype="PCM_16")
+        lines.append((text, speaker))
+    window = max(1, engine.workers * engine.batch_size)
+    rendered_lines = 0
+    for start in range(0, len(lines), window):
+        window_lines = lines[start : start + window]
+        keys = [
+            segment_cache_key("kokoro", "kokoro", get_kokoro_voice(speaker, lang_code), text, lang_code=lang_code, speed=1.0)
+            for text, speaker in window_lines
+        ]
+        rendered = [None] * len(window_lines)
+        if segment_cache is not None:
+            for i, key in enumerate(keys):
+                cached = segment_cache.get(key)
+                if cached is not None:
+                    rendered[i] = cached[0]
+        missing = [i for i, audio in enumerate(rendered) if audio is None]
+        if missing:
+            rendered_lines += len(missing)
+            for i, audio in zip(missing, engine.synthesize(lang_code, [window_lines[i] for i in missing], sampling_rate)):
+                rendered[i] = audio
+                if segment_cache is not None and len(audio) > 0:
+                    segment_cache.put(keys[i], audio, sampling_rate)
+        yield from rendered
+    print(f"Rendered {rendered_lines} of {len(lines)} lines with Kokoro")
 
 
 def create_podcast(
@@ -91,8 +215,8 @@ def create_podcast(
     silence_duration: float = 0.7,
     sampling_rate: int = 24_000,
     lang_code: str = "b",
-) -> str:
-    pipeline = KPipeline(lang_code=lang_code)
+    segment_cache=None,
+) -> Optional[str]:
     if lang_code != "b":
         if isinstance(script, list):
             script = translate_script(script, lang_code)
@@ -100,10 +224,12 @@ def create_podcast(
             script = translate_script(script.entries, lang_code)
     output_path = os.path.abspath(output_path)
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    audio_segments = create_audio_segments(pipeline, script, silence_duration, sampling_rate, lang_code)
-    full_audio = combine_full_segments(audio_segments)
-    write_to_disk(output_path, full_audio, sampling_rate)
-    return output_path
+    with StreamingAudioAssembler(output_path, sampling_rate, peak=0.9) as assembler:
+        for segment_audio in iter_audio_segments(get_kokoro_engine(), script, sampling_rate, lang_code, segment_cache):
+            if len(segment_audio) > 0:
+                assembler.add(segment_audio)
+                assembler.add_silence(silence_duration)
+        return assembler.finish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from typing import Callable, Optional, Tuple
+import numpy as np
+import soundfile as sf
+from db.config import get_tts_cache_dir
+
+TTS_CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+SEGMENT_SUFFIX = ".flac"
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def segment_cache_key(engine: str, model: str, voice: str, text: str, **extra) -> str:
+    payload = {"engine": engine, "model": model, "voice": voice, "text": text, **extra}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class TTSSegmentCache:
+    """Content-addressed store of synthesized segments with size-bounded LRU eviction."""
+
+    def __init__(self, cache_dir: str, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + SEGMENT_SUFFIX)
+
+    def _scan(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(SEGMENT_SUFFIX):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+        return entries
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, int]]:
+        path = self._path(key)
+        try:
+            samples, sampling_rate = sf.read(path, dtype="float32")
+            os.utime(path)
+        except Exception:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return samples, sampling_rate
+
+    def put(self, key: str, samples: np.ndarray, sampling_rate: int) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            sf.write(temp_path, np.clip(samples, -1.0, 1.0), sampling_rate, format="FLAC", subtype="PCM_24")
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"Could not cache TTS segment: {e}")
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            return
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry[1] for entry in self._scan())
+            else:
+                self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(self._scan())
+        self._total_bytes = sum(entry[1] for entry in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if self._total_bytes <= target:
+                break
+            try:
+                os.unlink(path)
+                self._total_bytes -= size
+            except FileNotFoundError:
+                pass
+
+    def fetch(self, key: str, synthesize: Callable[[], Optional[Tuple[np.ndarray, int]]]) -> Optional[Tuple[np.ndarray, int]]:
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        result = synthesize()
+        if result is not None and len(result[0]) > 0:
+            self.put(key, result[0], result[1])
+        return result
+
+
+def get_tts_segment_cache() -> Optional[TTSSegmentCache]:
+    global _cache
+    if TTS_CACHE_MAX_BYTES <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = TTSSegmentCache(get_tts_cache_dir(), TTS_CACHE_MAX_BYTES)
+        return _cache
+
+
+def synthesize_with_cache(segment_cache, key_parts: dict, synthesize):
+    if segment_cache is None:
+        return synthesize()
+    return segment_cache.fetch(segment_cache_key(**key_parts), synthesize)
@@ -1,28 +1,63 @@
+import inspect
 import os
 from typing import Any, Callable, Optional
 from utils.load_api_keys import load_api_key
+from utils.audio_encoding import finalize_podcast_audio
+from utils.tts_cache import get_tts_segment_cache
 
 _TTS_ENGINES = {}
 TTS_OPENAI_MODEL = "gpt-4o-mini-tts"
 TTS_ELEVENLABS_MODEL = "eleven_multilingual_v2"
 
 
+def _accepts_segment_cache(generator_func: Callable) -> bool:
+    try:
+        parameters = inspect.signature(generator_func).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(parameter.name == "segment_cache" or parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters)
+
+
 def register_tts_engine(name: str, generator_func: Callable):
-    _TTS_ENGINES[name.lower()] = generator_func
+    """
+    Register an audio generator called as generator_func(script, output_path, language_code,
+    silence_duration, voice_map). A generator that also takes a segment_cache keyword gets a
+    TTSSegmentCache or None and should fetch each dialog line through it so unchanged lines
+    are not re-synthesized; other generators are called without it.
+    """
+    _TTS_ENGINES[name.lower()] = (generator_func, _accepts_segment_cache(generator_func))
 
 
 def generate_podcast_audio(
-    script: Any, output_path: str, tts_engine: str = "kokoro", language_code: str = "en", silence_duration: float = 0.7, voice_map=None
+    script: Any,
+    output_path: str,
+    tts_engine: str = "kokoro",
+    language_code: str = "en",
+    silence_duration: float = 0.7,
+    voice_map=None,
+    use_cache: bool = True,
 ) -> Optional[str]:
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     engine_name = tts_engine.lower()
     if engine_name not in _TTS_ENGINES:
         print(f"Unsupported TTS engine: {tts_engine}")
         return None
+    generator_func, accepts_segment_cache = _TTS_ENGINES[engine_name]
+    segment_cache = get_tts_segment_cache() if use_cache and accepts_segment_cache else None
+    hits_before, misses_before = (segment_cache.hits, segment_cache.misses) if segment_cache else (0, 0)
+    options = {"segment_cache": segment_cache} if accepts_segment_cache else {}
     try:
-        return _TTS_ENGINES[engine_name](
-            script=script, output_path=output_path, language_code=language_code, silence_duration=silence_duration, voice_map=voice_map
+        result = generator_func(
+            script=script,
+            output_path=output_path,
+            language_code=language_code,
+            silence_duration=silence_duration,
+            voice_map=voice_map,
+            **options,
         )
+        if segment_cache:
+            print(f"TTS segment cache: {segment_cache.hits - hits_before} reused, {segment_cache.misses - misses_before} synthesized")
+        return finalize_podcast_audio(result) if result else result
     except Exception as e:
         import traceback
 
@@ -32,7 +67,7 @@ def generate_podcast_audio(
 
 
 def register_default_engines():
-    def elevenlabs_generator(script, output_path, language_code, silence_duration, voice_map):
+    def elevenlabs_generator(script, output_path, language_code, silence_duration, voice_map, segment_cache=None):
         from utils.text_to_audio_elevenslab import create_podcast as elevenlabs_create_podcast
 
         if voice_map is None:
@@ -46,19 +81,25 @@ def register_default_engines():
             voice_map=voice_map,
             elevenlabs_model=TTS_ELEVENLABS_MODEL,
             api_key=load_api_key("ELEVENSLAB_API_KEY"),
+            segment_cache=segment_cache,
         )
 
-    def kokoro_generator(script, output_path, language_code, silence_duration, voice_map):
+    def kokoro_generator(script, output_path, language_code, silence_duration, voice_map, segment_cache=None):
         from utils.text_to_audio_kokoro import create_podcast as kokoro_create_podcast
 
         kokoro_lang_code = "b"
         if language_code == "hi":
             kokoro_lang_code = "h"
         return kokoro_create_podcast(
-            script=script, output_path=output_path, silence_duration=silence_duration, sampling_rate=24_000, lang_code=kokoro_lang_code
+            script=script,
+            output_path=output_path,
+            silence_duration=silence_duration,
+            sampling_rate=24_000,
+            lang_code=kokoro_lang_code,
+            segment_cache=segment_cache,
         )
 
-    def openai_generator(script, output_path, language_code, silence_duration, voice_map):
+    def openai_generator(script, output_path, language_code, silence_duration, voice_map, segment_cache=None):
         from utils.text_to_audio_openai import create_podcast as openai_create_podcast
 
         if voice_map is None:
@@ -74,6 +115,7 @@ def register_default_engines():
             model=model,
             voice_map=voice_map,
             api_key=load_api_key("OPENAI_API_KEY"),
+            segment_cache=segment_cache,
         )
 
     register_tts_engine("elevenlabs", elevenlabs_generator)
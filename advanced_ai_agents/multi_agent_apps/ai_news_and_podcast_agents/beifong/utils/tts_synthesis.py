@@ -0,0 +1,103 @@
+import io
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Optional, Tuple
+import numpy as np
+import soundfile as sf
+
+TTS_MAX_CONCURRENCY = int(os.environ.get("TTS_MAX_CONCURRENCY", 4))
+# lower ElevenLabs tiers allow only a few concurrent requests
+ELEVENLABS_MAX_CONCURRENCY = int(os.environ.get("ELEVENLABS_MAX_CONCURRENCY", 2))
+TTS_RATE_LIMIT_RETRIES = int(os.environ.get("TTS_RATE_LIMIT_RETRIES", 5))
+TTS_RATE_LIMIT_BASE_DELAY_SEC = 1.0
+TTS_RATE_LIMIT_MAX_DELAY_SEC = 30.0
+
+
+def get_entry_fields(entry: Any) -> Tuple[int, str]:
+    if hasattr(entry, "speaker"):
+        return entry.speaker, entry.text
+    return entry["speaker"], entry["text"]
+
+
+def decode_audio_bytes(audio_data: bytes) -> Optional[Tuple[np.ndarray, int]]:
+    try:
+        samples, frame_rate = sf.read(io.BytesIO(audio_data), dtype="float32")
+        if samples.ndim == 2:
+            samples = samples.mean(axis=1)
+        return samples, frame_rate
+    except Exception as e:
+        print(f"Soundfile could not decode audio in memory: {e}")
+    try:
+        from pydub import AudioSegment
+
+        audio_segment = AudioSegment.from_file(io.BytesIO(audio_data), format="mp3")
+        samples = np.array(audio_segment.get_array_of_samples())
+        if audio_segment.channels == 2:
+            samples = samples.reshape(-1, 2).mean(axis=1)
+        max_possible_value = float(2 ** (8 * audio_segment.sample_width - 1))
+        return samples.astype(np.float32) / max_possible_value, audio_segment.frame_rate
+    except Exception as e:
+        print(f"All audio decoding methods failed: {e}")
+    return None
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    response = getattr(error, "response", None)
+    status_code = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    return status_code == 429 or type(error).__name__ == "RateLimitError"
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(error, "headers", None) or getattr(getattr(error, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def call_with_rate_limit_retry(request: Callable[[], Any], retries: int = TTS_RATE_LIMIT_RETRIES) -> Any:
+    """
+    Call request, retrying with exponential backoff while the TTS API answers 429.
+    Other errors, and a rate limit that outlasts the retries, are raised to the caller.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return request()
+        except Exception as e:
+            if attempt >= retries or not is_rate_limit_error(e):
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = TTS_RATE_LIMIT_BASE_DELAY_SEC * 2**attempt * (1 + random.random())
+            delay = min(delay, TTS_RATE_LIMIT_MAX_DELAY_SEC)
+            print(f"TTS request rate limited, retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+            time.sleep(delay)
+
+
+def iter_synthesized_segments(
+    synthesize: Callable[[int, str], Optional[Tuple[np.ndarray, int]]],
+    entries: list,
+    max_workers: int = TTS_MAX_CONCURRENCY,
+) -> Iterator[Tuple[int, Optional[Tuple[np.ndarray, int]]]]:
+    """
+    Synthesize script entries with up to max_workers requests in flight and yield
+    (index, result) in script order as soon as each leading segment is ready.
+    """
+    entries = list(entries)
+    window = max(1, max_workers) * 2
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {}
+        next_submit = 0
+        for index in range(len(entries)):
+            while next_submit < len(entries) and next_submit < index + window:
+                speaker_id, text = get_entry_fields(entries[next_submit])
+                futures[next_submit] = executor.submit(synthesize, speaker_id, text)
+                next_submit += 1
+            try:
+                result = futures.pop(index).result()
+            except Exception as e:
+                print(f"Failed to synthesize entry {index + 1}: {e}")
+                result = None
+            yield index, result
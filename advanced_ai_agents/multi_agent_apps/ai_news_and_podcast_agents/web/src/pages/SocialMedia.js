@@ -28,6 +28,7 @@ const SocialMedia = () => {
       perPage: 10,
       totalPages: 1,
       total: 0,
+      cursors: [],
    });
    const [isFilterOpen, setIsFilterOpen] = useState(false);
    const [selectedPost, setSelectedPost] = useState(null);
@@ -46,8 +47,10 @@ const SocialMedia = () => {
    const fetchPosts = async () => {
       try {
          setLoading(true);
+         const page = pagination.page;
          const response = await api.socialMedia.getAll({
-            page: pagination.page,
+            page,
+            cursor: pagination.cursors[page - 1] || undefined,
             per_page: pagination.perPage,
             platform: filters.platform || undefined,
             sentiment: filters.sentiment || undefined,
@@ -57,11 +60,16 @@ const SocialMedia = () => {
             search: filters.search || undefined,
          });
          setPosts(response.data.items || []);
-         setPagination({
-            page: response.data.page || 1,
-            perPage: response.data.per_page || 10,
-            totalPages: response.data.total_pages || 1,
-            total: response.data.total || 0,
+         setPagination(prev => {
+            const cursors = [...prev.cursors];
+            cursors[page] = response.data.next_cursor || undefined;
+            return {
+               page: response.data.page || 1,
+               perPage: response.data.per_page || 10,
+               totalPages: response.data.total_pages || 1,
+               total: response.data.total || 0,
+               cursors,
+            };
          });
       } catch (error) {
          console.error('Error fetching social media posts:', error);
@@ -111,14 +119,14 @@ const SocialMedia = () => {
          dateTo: '',
          search: '',
       });
-      setPagination(prev => ({ ...prev, page: 1 }));
+      setPagination(prev => ({ ...prev, page: 1, cursors: [] }));
    };
    const handleFilterChange = (name, value) => {
       setFilters(prev => ({
          ...prev,
          [name]: value,
       }));
-      setPagination(prev => ({ ...prev, page: 1 }));
+      setPagination(prev => ({ ...prev, page: 1, cursors: [] }));
    };
    const handlePrevPage = () => {
       if (pagination.page > 1) {
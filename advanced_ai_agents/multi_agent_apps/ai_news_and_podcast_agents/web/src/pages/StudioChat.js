@@ -35,6 +35,7 @@ const PodcastSession = () => {
    const [availableLanguages, setAvailableLanguages] = useState([{ code: 'en', name: 'English' }]);
    const chatContainerRef = useRef(null);
    const pollTimerRef = useRef(null);
+   const eventSourceRef = useRef(null);
    const messagesEndRef = useRef(null);
    const inputRef = useRef(null);
    console.log('webSearchRecording', webSearchRecording);
@@ -66,7 +67,7 @@ const PodcastSession = () => {
       };
       window.addEventListener('resize', handleResize);
       return () => {
-         if (pollTimerRef.current) clearInterval(pollTimerRef.current);
+         stopTaskUpdates();
          window.removeEventListener('resize', handleResize);
       };
    }, [sessionId]);
@@ -223,10 +224,7 @@ const PodcastSession = () => {
          setMessages([]);
          setSessionState({});
          setCurrentStage('welcome');
-         if (pollTimerRef.current) {
-            clearInterval(pollTimerRef.current);
-            pollTimerRef.current = null;
-         }
+         stopTaskUpdates();
          setIsProcessing(false);
          setProcessingType(null);
          setCurrentTaskId(null);
@@ -330,19 +328,116 @@ const PodcastSession = () => {
       }
    };
 
-   const startPollingForCompletion = (taskId = null) => {
-      if (pollTimerRef.current) clearInterval(pollTimerRef.current);
-      const pollInterval = 3000;
-      const maxPolls = 100;
-      let pollCount = 0;
+   const stopTaskUpdates = () => {
+      if (pollTimerRef.current) {
+         clearInterval(pollTimerRef.current);
+         pollTimerRef.current = null;
+      }
+      if (eventSourceRef.current) {
+         eventSourceRef.current.close();
+         eventSourceRef.current = null;
+      }
+   };
 
-      // Store the current session ID at poll start time to ensure consistency
-      const currentSessionId = sessionId;
+   const handleTaskFinished = result => {
+      stopTaskUpdates();
+      setIsProcessing(false);
+      setProcessingType(null);
+      setCurrentTaskId(null);
+
+      // Only add the final response to the chat if it's not a processing status message
+      if (result.response) {
+         const responseText = result.response;
+         if (
+            !responseText.includes('being processed') &&
+            !responseText.includes('still being processed') &&
+            !responseText.includes('Please check the status')
+         ) {
+            setMessages(prev => [...prev, { role: 'assistant', content: responseText }]);
+         }
+      }
+
+      // Update session state if provided
+      if (result.session_state) {
+         updateSessionState(result.session_state);
+      }
+   };
 
-      // If a taskId is provided, update the current task ID
+   // Subscribe to pushed task events, falling back to polling if the stream is unavailable
+   const startPollingForCompletion = (taskId = null) => {
+      stopTaskUpdates();
+      const currentSessionId = sessionId;
       if (taskId) {
          setCurrentTaskId(taskId);
       }
+      if (typeof window.EventSource === 'undefined') {
+         startStatusPolling(currentSessionId, taskId);
+         return;
+      }
+
+      const eventSource = new window.EventSource(
+         api.podcastAgent.getEventsUrl(currentSessionId, taskId)
+      );
+      eventSourceRef.current = eventSource;
+      let finished = false;
+
+      const parseEvent = event => {
+         try {
+            const data = JSON.parse(event.data);
+            return data.session_id && data.session_id !== currentSessionId ? null : data;
+         } catch (error) {
+            console.error('Error parsing task event:', error);
+            return null;
+         }
+      };
+
+      eventSource.addEventListener('recording', event => {
+         const data = parseEvent(event);
+         if (data && data.browser_recording_path) {
+            setWebSearchRecording(data.browser_recording_path);
+         }
+      });
+      eventSource.addEventListener('started', event => {
+         const data = parseEvent(event);
+         if (data && data.process_type) setProcessingType(data.process_type);
+      });
+      eventSource.addEventListener('state', event => {
+         const data = parseEvent(event);
+         if (!data) return;
+         if (data.stage) setCurrentStage(data.stage);
+         if (!data.stage_changed) return;
+         // Events carry only the stage; fetch the full state when it moves on
+         api.podcastAgent
+            .checkStatus(currentSessionId)
+            .then(response => {
+               if (eventSourceRef.current === eventSource && response.data.session_state) {
+                  updateSessionState(response.data.session_state);
+               }
+            })
+            .catch(error => console.error('Error fetching session state:', error));
+      });
+      const onFinished = event => {
+         const data = parseEvent(event);
+         if (!data) return;
+         finished = true;
+         handleTaskFinished(data.result || {});
+      };
+      eventSource.addEventListener('completed', onFinished);
+      eventSource.addEventListener('failed', onFinished);
+      eventSource.onerror = () => {
+         if (finished || eventSourceRef.current !== eventSource) return;
+         console.log('Task event stream unavailable - falling back to polling');
+         eventSource.close();
+         eventSourceRef.current = null;
+         startStatusPolling(currentSessionId, taskId);
+      };
+   };
+
+   const startStatusPolling = (currentSessionId, taskId = null) => {
+      if (pollTimerRef.current) clearInterval(pollTimerRef.current);
+      const pollInterval = 3000;
+      const maxPolls = 100;
+      let pollCount = 0;
 
       pollTimerRef.current = setInterval(async () => {
          // First verify we're still on the same session as when polling started
@@ -386,30 +481,7 @@ const PodcastSession = () => {
 
             // If the task is complete (is_processing is false)
             if (statusResponse.data.is_processing === false) {
-               clearInterval(pollTimerRef.current);
-               setIsProcessing(false);
-               setProcessingType(null);
-               setCurrentTaskId(null);
-
-               // Only add the final response to the chat if it's not a processing status message
-               if (statusResponse.data.response) {
-                  // Don't add processing messages to the chat
-                  const responseText = statusResponse.data.response;
-                  if (
-                     !responseText.includes('being processed') &&
-                     !responseText.includes('still being processed') &&
-                     !responseText.includes('Please check the status')
-                  ) {
-                     setMessages(prev => [...prev, { role: 'assistant', content: responseText }]);
-                  }
-               }
-
-               // Update session state if provided
-               if (statusResponse.data.session_state) {
-                  updateSessionState(statusResponse.data.session_state);
-               }
-
-               
+               handleTaskFinished(statusResponse.data);
             }
             // If it's still processing but there's a status update
             else if (
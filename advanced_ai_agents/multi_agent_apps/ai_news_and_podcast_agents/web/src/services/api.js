@@ -165,6 +165,9 @@ const endpoints = {
             session_id: sessionId,
             task_id: taskId,
          }),
+      getEventsUrl: (sessionId, taskId = null) =>
+         `${API_BASE_URL}/api/podcast-agent/events/${sessionId}` +
+         (taskId ? `?task_id=${encodeURIComponent(taskId)}` : ''),
       getLatestMessage: sessionId =>
          api.get(`/api/podcast-agent/latest_message?session_id=${sessionId}`),
       listSessions: (page = 1, perPage = 10) =>